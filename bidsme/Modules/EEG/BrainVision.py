@@ -34,7 +34,10 @@ from ..common import retrieveFormDict
 from .EEG import EEG, channel_types
 from . import _EDF
 from .._formats import _MNE
+from .. import _sniffer
+from .. import _handles
 from .._formats.MNE import MNE
+from .._formats import EEGheader
 logger = logging.getLogger(__name__)
 
 
@@ -42,7 +45,7 @@ class BrainVision(EEG):
     _type = "BrainVision"
 
     __slots__ = ["_FILE_CACHE",
-                 "_mne",
+                 "_mne", "_header",
                  "_data_file",
                  "_marker_file"
                  ]
@@ -61,12 +64,15 @@ class BrainVision(EEG):
                        "TriggerChannelCount"}
 
     _file_extentions = [".vhdr"]
+    _signature = _sniffer.BrainVision
+    _metafields = (_EDF.metafields,)
 
     def __init__(self, rec_path=""):
         super().__init__()
 
         self._FILE_CACHE = None
         self.mne = MNE()
+        self._header = None
         self._data_file = None
         self._marker_file = None
 
@@ -96,7 +102,12 @@ class BrainVision(EEG):
                 logger.warning('{}: file {} is hidden'
                                .format(cls.formatIdentity(),
                                        file))
-            MNE.test_raw(file, ".vhdr")
+            # parsed header is reused by _loadFile
+            header = EEGheader.readBrainVision(file)
+            # size of handle is taken as size of EDF header,
+            # of same order as parsed channels information
+            _handles.store(cls, file, header,
+                           256 * (len(header.channels) + 1))
             return True
         return False
 
@@ -113,15 +124,15 @@ class BrainVision(EEG):
             self.clearCache()
 
             self._ext = ".vhdr"
-            self.mne.load_raw(path, self._ext)
+            self._header = _handles.take(type(self), path)
+            if self._header is None:
+                self._header = EEGheader.readBrainVision(path)
+            self._FILE_CACHE = path
 
             base = path[:-len(self._ext)]
 
-            # Loading channels information
-            self.load_channels(base)
-            self.count_channels()
-            self.load_events(base)
-            self.load_electrodes(base)
+            # channels, events and electrodes are loaded when accessed
+            self.deferTables(base)
 
             self._marker_file = None
             self._data_file = None
@@ -147,13 +158,35 @@ class BrainVision(EEG):
                 self.testMetaFields()
 
     def _load_channels(self) -> pandas.DataFrame:
-        return self.mne.load_channels()
+        return self._header.load_channels()
 
     def _load_events(self) -> pandas.DataFrame:
-        return self.mne.load_events(stim_channels=channel_types["TRIG"])
+        return self._header.load_events(stim_channels=channel_types["TRIG"])
 
     def _load_electrodes(self) -> pandas.DataFrame:
-        return self.mne.load_electrodes()
+        if not self._header.coordinates:
+            return None
+        return self.__getRaw().load_electrodes()
+
+    def __getRaw(self) -> MNE:
+        """
+        Returns the mne reader of current file, loading
+        the raw file at first call. Only electrodes
+        and full dump needs the raw file.
+
+        Returns
+        -------
+        MNE
+        """
+        if self.mne.CACHE is None:
+            self.mne.load_raw(self._FILE_CACHE, self._ext)
+        return self.mne
+
+    def clearCache(self) -> None:
+        self.mne.CACHE = None
+        self._header = None
+        self._FILE_CACHE = None
+        self.deferTables(None)
 
     def _getAcqTime(self) -> datetime:
         """
@@ -165,7 +198,10 @@ class BrainVision(EEG):
         datetime
             datetime of acquisition of current scan
         """
-        return self.mne.CACHE.info["meas_date"].replace(tzinfo=None)
+        meas_date = self._header.info["meas_date"]
+        if meas_date is None:
+            return None
+        return meas_date.replace(tzinfo=None)
 
     def dump(self) -> dict:
         """
@@ -179,7 +215,7 @@ class BrainVision(EEG):
             all data must be of basic python class: str, int, float,
             date, time, datetime
         """
-        d = dict(self.mne.CACHE.info)
+        d = dict(self.__getRaw().CACHE.info)
         return d
 
     def _getField(self, field: list, prefix: str = ""):
@@ -213,8 +249,12 @@ class BrainVision(EEG):
         try:
             if field[0] in self.__specialFields:
                 res = self._adaptMetaField(field[0])
+            elif field[0] in self._header.info:
+                res = retrieveFormDict(field, self._header.info,
+                                       fail_on_not_found=True,
+                                       fail_on_last_not_found=True)
             else:
-                res = retrieveFormDict(field, self.mne.CACHE.info,
+                res = retrieveFormDict(field, self.__getRaw().CACHE.info,
                                        fail_on_not_found=True,
                                        fail_on_last_not_found=True)
         except Exception:
@@ -262,18 +302,19 @@ class BrainVision(EEG):
 
     def _adaptMetaField(self, field):
         if field.endswith("ChannelCount"):
+            self.loadTables("channels")
             field = field[:-len("ChannelCount")]
             return self._channels_count.get(field, 0)
         if field == "RecordingDuration":
-            return self.mne.getDuration()
+            if self._header.duration is not None:
+                return self._header.duration
+            return self.__getRaw().getDuration()
         if field == "RecordingType":
-            if self.mne.isContinious():
-                return "continuous"
-            else:
-                return "epoched"
+            # files are always read as continuous raw
+            return "continuous"
         return None
 
-    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> None:
+    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> list:
         """
         Virtual function that copies bidsified data files to
         its destinattion.
@@ -287,9 +328,16 @@ class BrainVision(EEG):
             bidsified name without extention
         ext: str
             extention of the data file
+
+        Returns
+        -------
+        list(str):
+            paths to all written files
         """
+        self.loadTables()
 
         out_base = os.path.join(directory, bidsname)
+        written = [out_base + ext]
         f_in = open(self.currentFile(), "r")
         f_out = open(out_base + ext, "w")
         for line in f_in.readlines():
@@ -323,6 +371,7 @@ class BrainVision(EEG):
         if self._data_file:
             f = os.path.join(self._recPath, self._data_file)
             shutil.copy2(f, out_base + ".eeg")
+            written.append(out_base + ".eeg")
 
         if self._marker_file:
             f_in = open(os.path.join(self._recPath, self._marker_file), "r")
@@ -345,6 +394,7 @@ class BrainVision(EEG):
                 f_out.write(line)
             f_in.close()
             f_out.close()
+            written.append(out_base + ".vmrk")
 
         dest_base = out_base.rsplit("_", 1)[0]
 
@@ -365,7 +415,9 @@ class BrainVision(EEG):
                                       sep="\t", na_rep="n/a",
                                       header=True, index=True,
                                       line_terminator="\n")
+            written.append(dest_base + "_channels.tsv")
             self._chan_BIDS.DumpDefinitions(dest_base + "_channels.json")
+            written.append(dest_base + "_channels.json")
 
         if self.TableEvents is not None and\
                 not self.TableEvents.index.empty:
@@ -384,7 +436,9 @@ class BrainVision(EEG):
                                     sep="\t", na_rep="n/a",
                                     header=True, index=True,
                                     line_terminator="\n")
+            written.append(dest_base + "_events.tsv")
             self._task_BIDS.DumpDefinitions(dest_base + "_events.json")
+            written.append(dest_base + "_events.json")
 
         if self.TableElectrodes is not None and\
                 not self.TableElectrodes.index.empty:
@@ -398,14 +452,17 @@ class BrainVision(EEG):
                       if col in columns
                       and self.TableElectrodes[col].notna().any()]
 
-            self.TableElectrodes.to_csv(dest_base + "_events.tsv",
+            self.TableElectrodes.to_csv(dest_base + "_electrodes.tsv",
                                         columns=active,
                                         sep="\t", na_rep="n/a",
                                         header=True, index=True,
                                         line_terminator="\n")
-            self._elec_BIDS.DumpDefinitions(dest_base + "_events.json")
+            written.append(dest_base + "_electrodes.tsv")
+            self._elec_BIDS.DumpDefinitions(dest_base + "_electrodes.json")
+            written.append(dest_base + "_electrodes.json")
+        return written
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         """
         Virtual function to Copy raw (non-bidsified) file
         to destination.
@@ -418,16 +475,21 @@ class BrainVision(EEG):
 
         Returns
         -------
-        str:
-            path to copied file
+        list(str):
+            paths to all copied files, starting
+            with the copied header file
         """
+        self.loadTables()
         shutil.copy2(self.currentFile(), destination)
+        written = [os.path.join(destination, self.currentFile(True))]
         if self._data_file:
             f = os.path.join(self._recPath, self._data_file)
             shutil.copy2(f, destination)
+            written.append(os.path.join(destination, os.path.basename(f)))
         if self._marker_file:
             f = os.path.join(self._recPath, self._marker_file)
             shutil.copy2(f, destination)
+            written.append(os.path.join(destination, os.path.basename(f)))
 
         base = os.path.splitext(self.currentFile(True))[0]
         dest_base = os.path.join(destination, base)
@@ -436,14 +498,17 @@ class BrainVision(EEG):
                                       sep="\t", na_rep="n/a",
                                       header=True, index=True,
                                       line_terminator="\n")
+            written.append(dest_base + "_channels.tsv")
         if self.TableEvents is not None:
             self.TableEvents.to_csv(dest_base + "_events.tsv",
                                     sep="\t", na_rep="n/a",
                                     header=True, index=True,
                                     line_terminator="\n")
+            written.append(dest_base + "_events.tsv")
         if self.TableElectrodes is not None:
             self.TableElectrodes.to_csv(dest_base + "_electrodes.tsv",
                                         sep="\t", na_rep="n/a",
                                         header=True, index=True,
                                         line_terminator="\n")
-        return os.path.join(destination, self.currentFile(True))
+            written.append(dest_base + "_electrodes.tsv")
+        return written
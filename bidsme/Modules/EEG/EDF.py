@@ -32,7 +32,10 @@ from ..common import retrieveFormDict
 from .EEG import EEG, channel_types
 from . import _EDF
 from .._formats import _MNE
+from .. import _sniffer
+from .. import _handles
 from .._formats.MNE import MNE
+from .._formats import EEGheader
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +45,7 @@ class EDF(EEG):
     _type = "EDF"
 
     __slots__ = ["_FILE_CACHE",
-                 "_mne",
+                 "_mne", "_header",
                  "_sub_info", "_rec_info"
                  ]
 
@@ -60,13 +63,16 @@ class EDF(EEG):
                        "TriggerChannelCount"}
 
     _file_extentions = [".edf"]
+    _signature = _sniffer.EDF
+    _metafields = (_EDF.metafields,)
 
     def __init__(self, rec_path=""):
 
         EEG.__init__(self)
 
         self._FILE_CACHE = None
-        self.mne = MNE.MNE()
+        self.mne = MNE()
+        self._header = None
 
         self._sub_info = list()
         self._ses_info = list()
@@ -98,7 +104,12 @@ class EDF(EEG):
                                .format(cls.formatIdentity(),
                                        file))
 
-            MNE.test_raw(file, ".edf")
+            # parsed header is reused by _loadFile
+            header = EEGheader.readEDF(file)
+            # size of handle is taken as size of EDF header,
+            # of same order as parsed channels information
+            _handles.store(cls, file, header,
+                           256 * (len(header.channels) + 1))
             return True
         return False
 
@@ -115,24 +126,18 @@ class EDF(EEG):
             self.clearCache()
 
             self._ext = ".edf"
-            self.mne.load_raw(path, self._ext)
+            self._header = _handles.take(type(self), path)
+            if self._header is None:
+                self._header = EEGheader.readEDF(path)
+            self._FILE_CACHE = path
 
             base = path[:-len(self._ext)]
 
-            # Loading channels information
-            self.load_channels(base)
-            self.count_channels()
+            # channels, events and electrodes are loaded when accessed
+            self.deferTables(base)
 
-            self.load_events(base)
-            self.load_electrodes(base)
-
-            # mne do not retrieve subject and recording info
-            with open(path, "rb") as f:
-                f.seek(8)
-                res = f.read(80).decode("ascii").strip()
-                self._sub_info = res.split(" ")
-                res = f.read(80).decode("ascii").strip()
-                self._rec_info = res.split(" ")
+            self._sub_info = self._header.patient.strip().split(" ")
+            self._rec_info = self._header.recording.strip().split(" ")
 
             if self.setManufacturer(self._ext, _MNE.MANUFACTURERS):
                 self.resetMetaFields()
@@ -140,13 +145,35 @@ class EDF(EEG):
                 self.testMetaFields()
 
     def _load_channels(self) -> pandas.DataFrame:
-        return self.mne.load_channels()
+        return self._header.load_channels()
 
     def _load_events(self) -> pandas.DataFrame:
-        return self.mne.load_events(stim_channels=channel_types["TRIG"])
+        return self._header.load_events(stim_channels=channel_types["TRIG"])
 
     def _load_electrodes(self) -> pandas.DataFrame:
-        return self.mne.load_electrodes()
+        if not self._header.coordinates:
+            return None
+        return self.__getRaw().load_electrodes()
+
+    def __getRaw(self) -> MNE:
+        """
+        Returns the mne reader of current file, loading
+        the raw file at first call. Only electrodes
+        and full dump needs the raw file.
+
+        Returns
+        -------
+        MNE
+        """
+        if self.mne.CACHE is None:
+            self.mne.load_raw(self._FILE_CACHE, self._ext)
+        return self.mne
+
+    def clearCache(self) -> None:
+        self.mne.CACHE = None
+        self._header = None
+        self._FILE_CACHE = None
+        self.deferTables(None)
 
     def _getAcqTime(self) -> datetime:
         """
@@ -158,7 +185,7 @@ class EDF(EEG):
         datetime
             datetime of acquisition of current scan
         """
-        return self.mne.CACHE.info["meas_date"]
+        return self._header.info["meas_date"]
 
     def dump(self) -> dict:
         """
@@ -172,7 +199,7 @@ class EDF(EEG):
             all data must be of basic python class: str, int, float,
             date, time, datetime
         """
-        d = dict(self.mne.CACHE.info)
+        d = dict(self.__getRaw().CACHE.info)
         return d
 
     def _getField(self, field: list, prefix: str = ""):
@@ -206,8 +233,12 @@ class EDF(EEG):
         try:
             if field[0] in self.__specialFields:
                 res = self._adaptMetaField(field[0])
+            elif field[0] in self._header.info:
+                res = retrieveFormDict(field, self._header.info,
+                                       fail_on_not_found=True,
+                                       fail_on_last_not_found=True)
             else:
-                res = retrieveFormDict(field, self.mne.CACHE.info,
+                res = retrieveFormDict(field, self.__getRaw().CACHE.info,
                                        fail_on_not_found=True,
                                        fail_on_last_not_found=True)
         except Exception:
@@ -291,15 +322,16 @@ class EDF(EEG):
 
     def _adaptMetaField(self, field):
         if field.endswith("ChannelCount"):
+            self.loadTables("channels")
             field = field[:-len("ChannelCount")]
             return self._channels_count.get(field, 0)
         if field == "RecordingDuration":
-            return self.mne.getDuration()
+            if self._header.duration is not None:
+                return self._header.duration
+            return self.__getRaw().getDuration()
         if field == "RecordingType":
-            if self.mne.isContinious():
-                return "continuous"
-            else:
-                return "epoched"
+            # files are always read as continuous raw
+            return "continuous"
         return None
 
 
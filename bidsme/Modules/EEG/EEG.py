@@ -115,7 +115,8 @@ class EEG(baseModule):
     _task_BIDS.LoadDefinitions(os.path.join(paths.templates,
                                             "EEG_events.json"))
 
-    __slots__ = ["TableChannels", "TableElectrodes", "TableEvents",
+    __slots__ = ["_table_channels", "_table_electrodes", "_table_events",
+                 "_tables_base", "_tables_pending",
                  "_channels_count"]
 
     # Lists of EOG and Misc channels names
@@ -124,12 +125,98 @@ class EEG(baseModule):
         self.resetMetaFields()
         self.manufacturer = None
 
-        self.TableChannels = None
-        self.TableElectrodes = None
-        self.TableEvents = None
+        self._table_channels = None
+        self._table_electrodes = None
+        self._table_events = None
+        # base name of current file and tables not loaded yet
+        self._tables_base = None
+        self._tables_pending = set()
 
         self._channels_count = dict.fromkeys(channel_kinds, 0)
 
+    @property
+    def TableChannels(self) -> pandas.DataFrame:
+        """
+        Channels table of current file, loaded at first access
+        """
+        self.loadTables("channels")
+        return self._table_channels
+
+    @TableChannels.setter
+    def TableChannels(self, value: pandas.DataFrame) -> None:
+        self._tables_pending.discard("channels")
+        self._table_channels = value
+
+    @property
+    def TableEvents(self) -> pandas.DataFrame:
+        """
+        Events table of current file, loaded at first access
+        """
+        self.loadTables("events")
+        return self._table_events
+
+    @TableEvents.setter
+    def TableEvents(self, value: pandas.DataFrame) -> None:
+        self._tables_pending.discard("events")
+        self._table_events = value
+
+    @property
+    def TableElectrodes(self) -> pandas.DataFrame:
+        """
+        Electrodes table of current file, loaded at first access
+        """
+        self.loadTables("electrodes")
+        return self._table_electrodes
+
+    @TableElectrodes.setter
+    def TableElectrodes(self, value: pandas.DataFrame) -> None:
+        self._tables_pending.discard("electrodes")
+        self._table_electrodes = value
+
+    def deferTables(self, base_name: str) -> None:
+        """
+        Resets channels, events and electrodes tables,
+        which will be loaded from given file at their first
+        access, or by loadTables.
+
+        Parameters
+        ----------
+        base_name: str
+            file path without extention, if None, tables
+            are just reset
+        """
+        self._table_channels = None
+        self._table_electrodes = None
+        self._table_events = None
+        self._channels_count = dict.fromkeys(channel_kinds, 0)
+        self._tables_base = base_name
+        self._tables_pending.clear()
+        if base_name is not None:
+            self._tables_pending.update(("channels", "events",
+                                         "electrodes"))
+
+    def loadTables(self, *tables) -> None:
+        """
+        Loads the given tables (channels, events or electrodes)
+        if they are not loaded yet. If no tables are given,
+        all tables are loaded.
+
+        Loading channels table also counts the channels.
+        """
+        if not tables:
+            tables = ("channels", "events", "electrodes")
+        for table in tables:
+            if table not in self._tables_pending:
+                continue
+            self._tables_pending.discard(table)
+            if table == "channels":
+                self.load_channels(self._tables_base)
+                self.count_channels()
+            elif table == "events":
+                self.load_events(self._tables_base)
+            elif table == "electrodes":
+                self.load_electrodes(self._tables_base)
+
     def resetMetaFields(self) -> None:
         """
         Resets currently defined meta fields dictionaries
@@ -151,6 +238,7 @@ class EEG(baseModule):
         for mod in _EEG.eeg_meta_optional_modality:
             self.metaFields_opt[mod] = {key: None for key in
                                         _EEG.eeg_meta_optional_modality[mod]}
+        self._meta_plan.clear()
 
     def load_channels(self, base_name: str, ):
         """
@@ -292,7 +380,9 @@ class EEG(baseModule):
                                    "column '{}'"
                                    .format(self.recIdentity(), col_name))
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
+        self.loadTables()
+        written = [os.path.join(destination, self.currentFile(True))]
         base = os.path.splitext(self.currentFile(True))[0]
         dest_base = os.path.join(destination, base)
         if self.TableChannels is not None:
@@ -300,21 +390,24 @@ class EEG(baseModule):
                                       sep="\t", na_rep="n/a",
                                       header=True, index=True,
                                       line_terminator="\n")
+            written.append(dest_base + "_channels.tsv")
         if self.TableEvents is not None:
             self.TableEvents.to_csv(dest_base + "_events.tsv",
                                     sep="\t", na_rep="n/a",
                                     header=True, index=True,
                                     line_terminator="\n")
+            written.append(dest_base + "_events.tsv")
         if self.TableElectrodes is not None:
             self.TableElectrodes.to_csv(dest_base + "_electrodes.tsv",
                                         sep="\t", na_rep="n/a",
                                         header=True, index=True,
                                         line_terminator="\n")
+            written.append(dest_base + "_electrodes.tsv")
         shutil.copy2(self.currentFile(), destination)
-        return os.path.join(destination, self.currentFile(True))
+        return written
 
     def _copy_bidsified(self, directory: str,
-                        bidsname: str, ext: str) -> None:
+                        bidsname: str, ext: str) -> list:
         """
         Function that copies bidsified data files to
         its destinattion, with additional export of
@@ -329,10 +422,17 @@ class EEG(baseModule):
             bidsified name without extention
         ext: str
             extention of the data file
+
+        Returns
+        -------
+        list(str):
+            paths to all written files
         """
+        self.loadTables()
         dest_base = os.path.join(directory, bidsname)
 
         shutil.copy2(self.currentFile(), dest_base + ext)
+        written = [dest_base + ext]
 
         dest_base = dest_base.rsplit("_", 1)[0]
 
@@ -353,7 +453,9 @@ class EEG(baseModule):
                                       sep="\t", na_rep="n/a",
                                       header=True, index=True,
                                       line_terminator="\n")
+            written.append(dest_base + "_channels.tsv")
             self._chan_BIDS.DumpDefinitions(dest_base + "_channels.json")
+            written.append(dest_base + "_channels.json")
 
         if self.TableEvents is not None and\
                 not self.TableEvents.index.empty:
@@ -372,7 +474,9 @@ class EEG(baseModule):
                                     sep="\t", na_rep="n/a",
                                     header=True, index=True,
                                     line_terminator="\n")
+            written.append(dest_base + "_events.tsv")
             self._task_BIDS.DumpDefinitions(dest_base + "_events.json")
+            written.append(dest_base + "_events.json")
 
         if self.TableElectrodes is not None and\
                 not self.TableElectrodes.index.empty:
@@ -386,12 +490,15 @@ class EEG(baseModule):
                       if col in columns
                       and self.TableElectrodes[col].notna().any()]
 
-            self.TableElectrodes.to_csv(dest_base + "_events.tsv",
+            self.TableElectrodes.to_csv(dest_base + "_electrodes.tsv",
                                         columns=active,
                                         sep="\t", na_rep="n/a",
                                         header=True, index=True,
                                         line_terminator="\n")
-            self._elec_BIDS.DumpDefinitions(dest_base + "_events.json")
+            written.append(dest_base + "_electrodes.tsv")
+            self._elec_BIDS.DumpDefinitions(dest_base + "_electrodes.json")
+            written.append(dest_base + "_electrodes.json")
+        return written
 
     @abstractmethod
     def _load_channels(self) -> pandas.DataFrame:
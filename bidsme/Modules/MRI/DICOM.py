@@ -26,6 +26,7 @@
 from .MRI import MRI
 from . import _DICOM
 from .. import _dicom_common
+from .. import _sniffer
 
 import os
 import logging
@@ -38,9 +39,14 @@ logger = logging.getLogger(__name__)
 class DICOM(MRI):
     _type = "DICOM"
 
-    __slots__ = ["_DICOM_CACHE", "_DICOMFILE_CACHE"]
+    __slots__ = ["_DICOM_CACHE", "_DICOMFILE_CACHE", "_DICOM_TAGS"]
 
     _file_extentions = [".dcm", ".DCM", ".ima", ".IMA"]
+    _signature = _sniffer.DICOM
+    _metafields = (_DICOM.metafields,)
+    _series_fields = frozenset(_dicom_common.series_fields)
+    # tags of elements read from headers, None to read all elements
+    _header_tags = None
 
     __specialFields = {}
 
@@ -49,6 +55,7 @@ class DICOM(MRI):
 
         self._DICOM_CACHE = None
         self._DICOMFILE_CACHE = ""
+        self._DICOM_TAGS = None
         self.switches["exportHeader"] = True
 
         if rec_path:
@@ -84,12 +91,25 @@ class DICOM(MRI):
             return False
         return False
 
+    @classmethod
+    def setRequiredFields(cls, fields: set) -> None:
+        super().setRequiredFields(fields)
+        if fields is None:
+            cls._header_tags = None
+        else:
+            cls._header_tags = _dicom_common.fieldsTags(
+                    set(fields) | cls.getDependencies().fieldNames())
+
+    @classmethod
+    def _readHeader(cls, path: str) -> pydicom.dataset.FileDataset:
+        return _dicom_common.readHeader(path, cls._header_tags)
+
     def _loadFile(self, path: str) -> None:
         if path != self._DICOMFILE_CACHE:
-            # The DICM tag may be missing for anonymized DICOM files
-            dicomdict = pydicom.dcmread(path, stop_before_pixels=True)
+            dicomdict = self._getHeader(path)
             self._DICOMFILE_CACHE = path
             self._DICOM_CACHE = dicomdict
+            self._DICOM_TAGS = self._header_tags
             if self.setManufacturer(self.getField("Manufacturer"),
                                     _DICOM.manufacturers):
                 self.resetMetaFields()
@@ -106,17 +126,27 @@ class DICOM(MRI):
     def dump(self):
         if self._DICOM_CACHE is None:
             self.loadFile(0)
+        if self._DICOM_TAGS is not None:
+            self.__loadFullHeader()
         res = _dicom_common.extractStruct(self._DICOM_CACHE)
         for f in self.__specialFields:
             res[f] = self._getField([f])
         return res
 
+    @classmethod
+    def _compilePath(cls, path: list) -> list:
+        return _dicom_common.compilePath(path)
+
     def _getField(self, field: list):
         res = None
         try:
             if field[0] in self.__specialFields:
                 res = self._adaptMetaField(field[0])
             else:
+                if self._DICOM_TAGS is not None:
+                    tag = _dicom_common.fieldTag(field[0])
+                    if tag is not None and tag not in self._DICOM_TAGS:
+                        self.__loadFullHeader()
                 res = _dicom_common.retrieveFromDataset(
                         field,
                         self._DICOM_CACHE,
@@ -148,6 +178,7 @@ class DICOM(MRI):
         del self._DICOM_CACHE
         self._DICOM_CACHE = None
         self._DICOMFILE_CACHE = ""
+        self._DICOM_TAGS = None
 
     def _getSubId(self) -> str:
         return str(self.getField("PatientID"))
@@ -158,5 +189,16 @@ class DICOM(MRI):
     ########################
     # Additional fonctions #
     ########################
+    def __loadFullHeader(self) -> None:
+        """
+        Replaces the partially read header of current
+        file by the full one
+        """
+        logger.debug("{}: Reading full header of {}"
+                     .format(self.formatIdentity(),
+                             self.currentFile(False)))
+        self._DICOM_CACHE = _dicom_common.readHeader(self._DICOMFILE_CACHE)
+        self._DICOM_TAGS = None
+
     def _adaptMetaField(self, name):
         return None
@@ -49,7 +49,7 @@ class MRI(baseModule):
     def _post_copy_bidsified(self,
                              directory: str,
                              bidsname: str,
-                             ext: str) -> None:
+                             ext: str) -> list:
         """
         Copies bidsified data files to its destinattion.
 
@@ -67,14 +67,21 @@ class MRI(baseModule):
             bidsified name without extention
         ext: str
             extention of the data file
+
+        Returns
+        -------
+        list(str):
+            paths to copied bvec and bval files
         """
         bids_base = os.path.join(directory, bidsname)
+        written = list()
 
         if self.Modality() == "dwi":
             bvec = tools.change_ext(self.currentFile(), "bvec")
             if os.path.isfile(bvec):
                 shutil.copy2(bvec,
                              bids_base + ".bvec")
+                written.append(bids_base + ".bvec")
             else:
                 logger.warning("{} missing bvec file for diffusion recording"
                                .format(self.recIdentity()))
@@ -82,9 +89,11 @@ class MRI(baseModule):
             if os.path.isfile(bval):
                 shutil.copy2(bval,
                              bids_base + ".bval")
+                written.append(bids_base + ".bval")
             else:
                 logger.warning("{} missing bval file for diffusion recording"
                                .format(self.recIdentity()))
+        return written
 
     def resetMetaFields(self) -> None:
         """
@@ -112,3 +121,4 @@ class MRI(baseModule):
             self.metaFields_opt[mod] = {
                 key: None for key in
                 _MRI.optional_modality[mod]}
+        self._meta_plan.clear()
@@ -34,6 +34,8 @@ from bidsme.tools import tools
 from .MRI import MRI
 from ..common import retrieveFormDict
 from .. import _nifti_common
+from .. import _sniffer
+from .. import _handles
 
 
 logger = logging.getLogger(__name__)
@@ -52,7 +54,8 @@ class NIFTI(MRI):
                        "PatientId",
                        "SessionId"}
 
-    _file_extentions = [".nii", ".hdr"]
+    _file_extentions = [".nii", ".nii.gz", ".hdr"]
+    _signature = _sniffer.NIFTI
 
     def __init__(self, rec_path=""):
         super().__init__()
@@ -90,25 +93,24 @@ class NIFTI(MRI):
                            .format(cls.formatIdentity(),
                                    file))
         try:
-            return _nifti_common.isValidNIFTI(file)
+            head = _nifti_common.readHead(file)
         except Exception:
             return False
+        if _nifti_common.isValidNIFTI(head):
+            # header is parsed by _loadFile
+            _handles.store(cls, file, head, len(head))
+            return True
         return False
 
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            self._endianness, self._nii_type = _nifti_common.getEndType(path)
+            head = _handles.take(type(self), path)
+            if head is None:
+                head = _nifti_common.readHead(path)
+            self._endianness, self._nii_type, self._NIFTI_CACHE =\
+                _nifti_common.parseNIFTI(path, head)
             self._FILE_CACHE = path
 
-            if self._nii_type == "n+2":
-                self._NIFTI_CACHE =\
-                        _nifti_common.parceNIFTIheader_2(path,
-                                                         self._endianness)
-            else:
-                self._NIFTI_CACHE =\
-                        _nifti_common.parceNIFTIheader_1(path,
-                                                         self._endianness)
-
     def dump(self):
         if self._NIFTI_CACHE is not None:
             return str(self._NIFTI_CACHE)
@@ -133,34 +135,37 @@ class NIFTI(MRI):
             res = None
         return res
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         if os.path.isfile(os.path.join(destination,
                                        self.currentFile(True))):
             logger.warning("{}: File {} exists at destination"
                            .format(self.recIdentity(),
                                    self.currentFile(True)))
         shutil.copy2(self.currentFile(), destination)
+        written = [os.path.join(destination, self.currentFile(True))]
         if self._nii_type == "ni1":
             data_file = tools.change_ext(self.currentFile(), "img")
             shutil.copy2(data_file, destination)
-        return os.path.join(destination, self.currentFile(True))
+            written.append(os.path.join(destination,
+                                        os.path.basename(data_file)))
+        return written
 
-    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> None:
+    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> list:
+        out_fname = os.path.join(directory, bidsname + ext)
         if self._nii_type == "ni1":
-            shutil.copy2(self.currentFile(),
-                         os.path.join(directory, bidsname + ext))
+            shutil.copy2(self.currentFile(), out_fname)
             data_file = tools.change_ext(self.currentFile(), "img")
             shutil.copy2(data_file,
                          os.path.join(directory, bidsname + ".img"))
+            return [out_fname, os.path.join(directory, bidsname + ".img")]
+        if self.switches["zipFile"] and\
+                not self.currentFile().endswith(".gz"):
+            with open(self.currentFile(), 'rb') as f_in:
+                with gzip.open(out_fname, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
         else:
-            out_fname = os.path.join(directory, bidsname + ext)
-            if self.zip:
-                with open(self.currentFile(), 'rb') as f_in:
-                    with gzip.open(out_fname, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-            else:
-                shutil.copy2(self.currentFile(),
-                             os.path.join(directory, bidsname + ext))
+            shutil.copy2(self.currentFile(), out_fname)
+        return [out_fname]
 
     def _getAcqTime(self) -> datetime:
         return None
@@ -169,7 +174,10 @@ class NIFTI(MRI):
         return self.index
 
     def recId(self):
-        return os.path.splitext(self.currentFile(True))[0]
+        base = self.currentFile(True)
+        if base.endswith(".gz"):
+            base = base[:-3]
+        return os.path.splitext(base)[0]
 
     def _getSubId(self) -> str:
         return None
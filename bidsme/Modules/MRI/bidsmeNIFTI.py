@@ -45,6 +45,7 @@ class bidsmeNIFTI(MRI):
                  ]
 
     _file_extentions = [".nii", ".nii.gz"]
+    _metafields = (_DICOM.metafields,)
 
     def __init__(self, rec_path=""):
         super().__init__()
@@ -91,23 +92,33 @@ class bidsmeNIFTI(MRI):
                 return True
         return False
 
+    @staticmethod
+    def __headerPath(path: str) -> str:
+        path_dir, base = os.path.split(path)
+        return os.path.join(path_dir,
+                            "header_dump_" + tools.change_ext(base, "json"))
+
+    @classmethod
+    def _sidecarFiles(cls, file: str) -> list:
+        return [cls.__headerPath(file)]
+
+    @classmethod
+    def _readHeader(cls, path: str) -> dict:
+        with open(cls.__headerPath(path), "r") as f:
+            return json.load(f)
+
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            # The DICM tag may be missing for anonymized DICOM files
-            path_dir, base = os.path.split(path)
-            header = os.path.join(path_dir,
-                                  "header_dump_"
-                                  + tools.change_ext(base, "json"))
+            header = self.__headerPath(path)
             try:
-                with open(header, "r") as f:
-                    dicomdict = json.load(f)
-                    self._headerData = {
-                            "format": dicomdict["format"],
-                            "acqDateTime": dicomdict["acqDateTime"],
-                            "manufacturer": dicomdict["manufacturer"],
-                            }
-                    dicomdict["header"]
-                    self.custom = dicomdict["custom"]
+                dicomdict = self._getHeader(path)
+                self._headerData = {
+                        "format": dicomdict["format"],
+                        "acqDateTime": dicomdict["acqDateTime"],
+                        "manufacturer": dicomdict["manufacturer"],
+                        }
+                dicomdict["header"]
+                self.custom = dicomdict["custom"]
             except json.JSONDecodeError:
                 logger.error("{}: corrupted header {}"
                              .format(self.formatIdentity(),
@@ -177,7 +188,7 @@ class bidsmeNIFTI(MRI):
         self._HEADER_CACHE = None
         self._FILE_CACHE = ""
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         if os.path.isfile(os.path.join(destination,
                                        self.currentFile(True))):
             logger.warning("{}: File {} exists at destination"
@@ -185,7 +196,9 @@ class bidsmeNIFTI(MRI):
                                    self.currentFile(True)))
         shutil.copy2(self.currentFile(), destination)
         shutil.copy2(self._header_file, destination)
-        return os.path.join(destination, self.currentFile(True))
+        return [os.path.join(destination, self.currentFile(True)),
+                os.path.join(destination,
+                             os.path.basename(self._header_file))]
 
     def _getSubId(self) -> str:
         return self._headerData["subId"]
@@ -37,6 +37,7 @@ from . import _hmriNIFTI
 
 from ..common import action_value
 from ..common import retrieveFormDict
+from .. import _lazyjson
 
 
 logger = logging.getLogger(__name__)
@@ -62,6 +63,7 @@ class hmriNIFTI(MRI):
                        }
 
     _file_extentions = [".nii", ".nii.gz"]
+    _metafields = (_hmriNIFTI.metafields,)
 
     def __init__(self, rec_path=""):
         super().__init__()
@@ -109,8 +111,10 @@ class hmriNIFTI(MRI):
                 acqpar = cls.__loadJsonDump(file)
                 manufacturer = acqpar.get("Manufacturer").strip()
                 if manufacturer.lower() == "siemens":
-                    acqpar["CSASeriesHeaderInfo"]
-                    acqpar["CSAImageHeaderInfo"]
+                    # CSA headers are decoded only when used
+                    for key in ("CSASeriesHeaderInfo", "CSAImageHeaderInfo"):
+                        if key not in acqpar:
+                            raise KeyError(key)
             except json.JSONDecodeError as e:
                 logger.error("{}:{} corrupted file {}"
                              .format(cls.formatIdentity(),
@@ -134,10 +138,17 @@ class hmriNIFTI(MRI):
                 return False
         return False
 
+    @classmethod
+    def _sidecarFiles(cls, file: str) -> list:
+        return [tools.change_ext(file, "json")]
+
+    @classmethod
+    def _readHeader(cls, path: str) -> dict:
+        return cls.__loadJsonDump(path)
+
     def _loadFile(self, path: str) -> None:
         if path != self._DICOMFILE_CACHE:
-            # The DICM tag may be missing for anonymized DICOM files
-            dicomdict = self.__loadJsonDump(path)
+            dicomdict = self._getHeader(path)
             self._DICOMFILE_CACHE = path
             self._DICOMDICT_CACHE = dicomdict
 
@@ -145,17 +156,8 @@ class hmriNIFTI(MRI):
             manufacturer = self._DICOMDICT_CACHE["Manufacturer"]
             manuf_changed = self.setManufacturer(manufacturer,
                                                  _hmriNIFTI.manufacturers)
-            if self.manufacturer == "Siemens":
-                self.__csas = self._DICOMDICT_CACHE["CSASeriesHeaderInfo"]
-                self.__csai = self._DICOMDICT_CACHE["CSAImageHeaderInfo"]
-                self.__phoenix = self.__csas.get("MrPhoenixProtocol", {})
-                if not self.__phoenix:
-                    self.__phoenix = self.__csas.get("MrProtocol", {})
-                if "sWipMemBlock" in self.__phoenix:
-                    self.__alFree = \
-                        self.__phoenix["sWipMemBlock"].get("alFree", [])
-                    self.__adFree = \
-                        self.__phoenix["sWipMemBlock"].get("adFree", [])
+            # CSA headers are decoded by __loadCSA when needed
+            self.__csas = None
 
             if manuf_changed:
                 self.resetMetaFields()
@@ -230,16 +232,17 @@ class hmriNIFTI(MRI):
         self._DICOMDICT_CACHE = None
         self._DICOMFILE_CACHE = ""
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         if os.path.isfile(os.path.join(destination,
                                        self.currentFile(True))):
             logger.warning("{}: File {} exists at destination"
                            .format(self.recIdentity(),
                                    self.currentFile(True)))
+        header_file = tools.change_ext(self.currentFile(), "json")
         shutil.copy2(self.currentFile(), destination)
-        shutil.copy2(tools.change_ext(self.currentFile(), "json"),
-                     destination)
-        return os.path.join(destination, self.currentFile(True))
+        shutil.copy2(header_file, destination)
+        return [os.path.join(destination, self.currentFile(True)),
+                os.path.join(destination, os.path.basename(header_file))]
 
     def _getSubId(self) -> str:
         return str(self.getField("PatientID"))
@@ -261,6 +264,8 @@ class hmriNIFTI(MRI):
                 return "j"
             return None
         if self.manufacturer == "Siemens":
+            if self.__csas is None:
+                self.__loadCSA()
             if name == "NumberOfMeasurements":
                 value = self.__phoenix.get("lRepetitions", 0) + 1
             elif name == "PhaseEncodingSign":
@@ -337,8 +342,26 @@ class hmriNIFTI(MRI):
 
         return value
 
+    def __loadCSA(self) -> None:
+        """
+        Retrieves Siemens CSA headers and protocol of current file
+        """
+        self.__csas = self._DICOMDICT_CACHE["CSASeriesHeaderInfo"]
+        self.__csai = self._DICOMDICT_CACHE["CSAImageHeaderInfo"]
+        self.__phoenix = self.__csas.get("MrPhoenixProtocol", {})
+        if not self.__phoenix:
+            self.__phoenix = self.__csas.get("MrProtocol", {})
+        if "sWipMemBlock" in self.__phoenix:
+            self.__alFree = \
+                self.__phoenix["sWipMemBlock"].get("alFree", [])
+            self.__adFree = \
+                self.__phoenix["sWipMemBlock"].get("adFree", [])
+
     @staticmethod
     def __loadJsonDump(file: str) -> dict:
+        """
+        Loads acquisition parameters from json dump. Large values,
+        like CSA headers, are decoded only when accessed
+        """
         json_dump = tools.change_ext(file, "json")
-        with open(json_dump, "r") as f:
-            return json.load(f)["acqpar"][0]
+        return _lazyjson.loadListItem(json_dump, "acqpar", 0)
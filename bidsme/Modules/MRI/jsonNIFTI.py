@@ -86,13 +86,20 @@ class jsonNIFTI(MRI):
                 return True
         return False
 
+    @classmethod
+    def _sidecarFiles(cls, file: str) -> list:
+        return [tools.change_ext(file, "json")]
+
+    @classmethod
+    def _readHeader(cls, path: str) -> dict:
+        with open(tools.change_ext(path, "json"), "r") as f:
+            return json.load(f)
+
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            # The DICM tag may be missing for anonymized DICOM files
             header = tools.change_ext(path, "json")
             try:
-                with open(header, "r") as f:
-                    dicomdict = json.load(f)
+                dicomdict = self._getHeader(path)
             except json.JSONDecodeError:
                 logger.error("{}: corrupted header {}"
                              .format(self.formatIdentity(),
@@ -142,7 +149,7 @@ class jsonNIFTI(MRI):
         self._HEADER_CACHE = None
         self._FILE_CACHE = ""
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         if os.path.isfile(os.path.join(destination,
                                        self.currentFile(True))):
             logger.warning("{}: File {} exists at destination"
@@ -150,7 +157,9 @@ class jsonNIFTI(MRI):
                                    self.currentFile(True)))
         shutil.copy2(self.currentFile(), destination)
         shutil.copy2(self._header_file, destination)
-        return os.path.join(destination, self.currentFile(True))
+        return [os.path.join(destination, self.currentFile(True)),
+                os.path.join(destination,
+                             os.path.basename(self._header_file))]
 
     def _getSubId(self) -> str:
         return ""
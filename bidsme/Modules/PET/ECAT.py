@@ -25,12 +25,12 @@
 from .PET import PET
 from ..common import action_value
 from . import _ECAT
+from .. import _sniffer
+from .. import _ecat_common
 
 import logging
-import numpy
 
 from datetime import datetime
-from nibabel import ecat
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +42,8 @@ class ECAT(PET):
     __specialFields = {"ScanStart", "InjectionStart",
                        "FramesStart", "FramesDuration"}
     _file_extentions = [".v"]
+    _signature = _sniffer.ECAT
+    _metafields = (_ECAT.metafields,)
 
     def __init__(self, rec_path=""):
         super().__init__()
@@ -83,9 +85,10 @@ class ECAT(PET):
 
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            e = ecat.load(path)
-            self._ECAT_CACHE = e.header
-            self._SUB_CACHE = e.get_subheaders().subheaders
+            self.clearCache()
+            e = _ecat_common.ECATFile(path)
+            self._ECAT_CACHE = e
+            self._SUB_CACHE = e.subheaders
             self._FILE_CACHE = path
             self.setManufacturer("Unknown", {})
             self.resetMetaFields()
@@ -98,13 +101,9 @@ class ECAT(PET):
     def dump(self):
         if self._ECAT_CACHE is None:
             self.loadFile(0)
-        res = dict()
-        for key, val in self._ECAT_CACHE.items():
-            res[key] = self.__transform(val)
+        res = dict(self._ECAT_CACHE.header)
         for index, im in enumerate(self._SUB_CACHE):
-            res[index] = dict()
-            for key in im.dtype.names:
-                res[index][key] = self.__transform(im[key])
+            res[index] = dict(im)
         for f in self.__specialFields:
             res[f] = self._getField([f])
 
@@ -119,9 +118,8 @@ class ECAT(PET):
                 if field[0].isdigit():
                     it = int(field[0])
                     res = self._SUB_CACHE[it][field[1]]
-                    res = self.__transform(res)
                 else:
-                    res = self.__transform(self._ECAT_CACHE[field[0]])
+                    res = self._ECAT_CACHE.getField(field[0])
                     if len(field) > 1:
                         res = res[int(field[1])]
         except Exception as e:
@@ -162,32 +160,20 @@ class ECAT(PET):
         return True
 
     def clearCache(self) -> None:
-        del self._ECAT_CACHE
-        del self._SUB_CACHE
+        if self._ECAT_CACHE is not None:
+            self._ECAT_CACHE.close()
         self._ECAT_CACHE = None
         self._SUB_CACHE = None
-
-    @staticmethod
-    def __transform(val: numpy.ndarray) -> object:
-        tmp = val.tolist()
-        if isinstance(tmp, bytes):
-            try:
-                tmp = tmp.decode()
-            except UnicodeError:
-                logger.debug("Can't decode bytes string")
-                tmp = "BytesString"
-        return tmp
+        self._FILE_CACHE = ""
 
     def _adaptMetaField(self, name):
         value = None
         if name == "FramesStart":
-            value = [self.__transform(frame["frame_start_time"]) / 1000
-                     for frame in self._SUB_CACHE]
-            return value
+            value = self._SUB_CACHE.column("frame_start_time") / 1000
+            return value.tolist()
         if name == "FramesDuration":
-            value = [self.__transform(frame["frame_duration"]) / 1000
-                     for frame in self._SUB_CACHE]
-            return value
+            value = self._SUB_CACHE.column("frame_duration") / 1000
+            return value.tolist()
         if name == "ScanStart":
             return 0
         if name == "InjectionStart":
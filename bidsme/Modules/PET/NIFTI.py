@@ -35,6 +35,8 @@ from .PET import PET
 
 from ..common import retrieveFormDict
 from .. import _nifti_common
+from .. import _sniffer
+from .. import _handles
 
 
 logger = logging.getLogger(__name__)
@@ -46,7 +48,8 @@ class NIFTI(PET):
     __slots__ = ["_NIFTI_CACHE", "_FILE_CACHE",
                  "_nii_type", "_endiannes"
                  ]
-    _file_extentions = [".nii", ".hdr"]
+    _file_extentions = [".nii", ".nii.gz", ".hdr"]
+    _signature = _sniffer.NIFTI
 
     __specialFields = {"AcquisitionTime",
                        "SeriesNumber",
@@ -87,22 +90,22 @@ class NIFTI(PET):
                 logger.debug('{}: Missing .img file'
                              .format(cls.formatIdentity()))
                 return False
-        return _nifti_common.isValidNIFTI(file)
+        head = _nifti_common.readHead(file)
+        if _nifti_common.isValidNIFTI(head):
+            # header is parsed by _loadFile
+            _handles.store(cls, file, head, len(head))
+            return True
+        return False
 
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            self._endianness, self._nii_type = _nifti_common.getEndType(path)
+            head = _handles.take(type(self), path)
+            if head is None:
+                head = _nifti_common.readHead(path)
+            self._endianness, self._nii_type, self._NIFTI_CACHE =\
+                _nifti_common.parseNIFTI(path, head)
             self._FILE_CACHE = path
 
-            if self._nii_type == "n+2":
-                self._NIFTI_CACHE =\
-                        _nifti_common.parceNIFTIheader_2(path,
-                                                         self._endianness)
-            else:
-                self._NIFTI_CACHE =\
-                        _nifti_common.parceNIFTIheader_1(path,
-                                                         self._endianness)
-
     def dump(self):
         if self._NIFTI_CACHE is not None:
             return str(self._NIFTI_CACHE)
@@ -127,22 +130,22 @@ class NIFTI(PET):
             res = None
         return res
 
-    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> None:
+    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> list:
+        out_fname = os.path.join(directory, bidsname + ext)
         if self._nii_type == "ni1":
-            shutil.copy2(self.currentFile(),
-                         os.path.join(directory, bidsname + ext))
+            shutil.copy2(self.currentFile(), out_fname)
             data_file = tools.change_ext(self.currentFile(), "img")
             shutil.copy2(data_file,
                          os.path.join(directory, bidsname + ".img"))
+            return [out_fname, os.path.join(directory, bidsname + ".img")]
+        if self.switches["zipFile"] and\
+                not self.currentFile().endswith(".gz"):
+            with open(self.currentFile(), 'rb') as f_in:
+                with gzip.open(out_fname, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
         else:
-            out_fname = os.path.join(directory, bidsname + ext)
-            if self.zip:
-                with open(self.currentFile(), 'rb') as f_in:
-                    with gzip.open(out_fname, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-            else:
-                shutil.copy2(self.currentFile(),
-                             os.path.join(directory, bidsname + ext))
+            shutil.copy2(self.currentFile(), out_fname)
+        return [out_fname]
 
     def _getAcqTime(self) -> datetime:
         return None
@@ -151,7 +154,10 @@ class NIFTI(PET):
         return self.index
 
     def recId(self):
-        return os.path.splitext(self.currentFile(True))[0]
+        base = self.currentFile(True)
+        if base.endswith(".gz"):
+            base = base[:-3]
+        return os.path.splitext(base)[0]
 
     def _getSubId(self) -> str:
         return None
@@ -68,3 +68,4 @@ class PET(baseModule):
             self.metaFields_opt[mod] = {
                 key: None for key in
                 _PET.optional_modality[mod]}
+        self._meta_plan.clear()
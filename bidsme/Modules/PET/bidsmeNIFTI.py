@@ -45,6 +45,7 @@ class bidsmeNIFTI(PET):
                  ]
 
     _file_extentions = [".nii", ".nii.gz"]
+    _metafields = (_DICOM.metafields, _ECAT.metafields)
 
     def __init__(self, rec_path=""):
         super().__init__()
@@ -86,22 +87,33 @@ class bidsmeNIFTI(PET):
                          .format(cls.formatIdentity()))
             return False
 
+    @staticmethod
+    def __headerPath(path: str) -> str:
+        path, base = os.path.split(path)
+        base, ext = os.path.splitext(base)
+        return os.path.join(path, "header_dump_" + base + ".json")
+
+    @classmethod
+    def _sidecarFiles(cls, file: str) -> list:
+        return [cls.__headerPath(file)]
+
+    @classmethod
+    def _readHeader(cls, path: str) -> dict:
+        with open(cls.__headerPath(path), "r") as f:
+            return json.load(f)
+
     def _loadFile(self, path: str) -> None:
         if path != self._FILE_CACHE:
-            # The DICM tag may be missing for anonymized DICOM files
-            path, base = os.path.split(path)
-            base, ext = os.path.splitext(base)
-            header = os.path.join(path, "header_dump_" + base + ".json")
+            header = self.__headerPath(path)
             try:
-                with open(header, "r") as f:
-                    dicomdict = json.load(f)
-                    self._headerData = {
-                            "format": dicomdict["format"],
-                            "acqDateTime": dicomdict["acqDateTime"],
-                            "manufacturer": dicomdict["manufacturer"],
-                            }
-                    dicomdict["header"]
-                    self.custom = dicomdict["custom"]
+                dicomdict = self._getHeader(path)
+                self._headerData = {
+                        "format": dicomdict["format"],
+                        "acqDateTime": dicomdict["acqDateTime"],
+                        "manufacturer": dicomdict["manufacturer"],
+                        }
+                dicomdict["header"]
+                self.custom = dicomdict["custom"]
             except json.JSONDecodeError:
                 logger.error("{}: corrupted header {}"
                              .format(self.formatIdentity(),
@@ -173,7 +185,7 @@ class bidsmeNIFTI(PET):
         self._HEADER_CACHE = None
         self._FILE_CACHE = ""
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         if os.path.isfile(os.path.join(destination,
                                        self.currentFile(True))):
             logger.warning("{}: File {} exists at destination"
@@ -181,7 +193,9 @@ class bidsmeNIFTI(PET):
                                    self.currentFile(True)))
         shutil.copy2(self.currentFile(), destination)
         shutil.copy2(self._header_file, destination)
-        return os.path.join(destination, self.currentFile(True))
+        return [os.path.join(destination, self.currentFile(True)),
+                os.path.join(destination,
+                             os.path.basename(self._header_file))]
 
     def _getSubId(self) -> str:
         return self._headerData["subId"]
@@ -29,6 +29,33 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# fields retrieved directly by DICOM formats, always read from headers
+required_fields = ["SpecificCharacterSet", "Modality", "Manufacturer",
+                   "PatientID", "SeriesNumber", "SeriesDescription",
+                   "ProtocolName"] +\
+                  [Id + suffix
+                   for Id in ("Acquisition", "Content", "Instance")
+                   for suffix in ("DateTime", "Date", "Time")]
+
+# fields of patient, study, series and equipment modules,
+# identical for all files of a serie
+series_fields = ["PatientID", "PatientName", "PatientBirthDate",
+                 "PatientSex", "PatientAge", "PatientSize", "PatientWeight",
+                 "StudyInstanceUID", "StudyID", "StudyDate", "StudyTime",
+                 "StudyDescription", "AccessionNumber",
+                 "ReferringPhysicianName",
+                 "SeriesInstanceUID", "SeriesNumber", "SeriesDescription",
+                 "SeriesDate", "SeriesTime", "Modality", "ProtocolName",
+                 "BodyPartExamined", "PatientPosition",
+                 "Manufacturer", "ManufacturerModelName",
+                 "DeviceSerialNumber", "StationName", "SoftwareVersions",
+                 "InstitutionName", "InstitutionAddress",
+                 "InstitutionalDepartmentName", "MagneticFieldStrength"]
+
+
+# tag of Modality element, checked by isValidDICOM
+modality_tag = pydicom.tag.Tag("Modality")
+
 
 def isValidDICOM(file: str, mod: list = []) -> bool:
     """
@@ -57,7 +84,11 @@ def isValidDICOM(file: str, mod: list = []) -> bool:
             return True
 
         dcmfile.seek(0)
-        ds = pydicom.dcmread(dcmfile, specific_tags=["Modality"])
+        # reading stops after Modality tag
+        ds = pydicom.filereader.read_partial(
+                dcmfile,
+                stop_when=lambda tag, VR, length: tag > modality_tag,
+                specific_tags=[modality_tag])
         if "Modality" not in ds:
             logger.warnng('{}: DICOM file misses Modality tag'
                           .format(file))
@@ -102,10 +133,11 @@ def retrieveFromDataset(
     count = 0
     try:
         for f in path:
-            f = f.strip()
-            tag = getTag(f)
-            if tag is not None:
-                f = tag
+            if isinstance(f, str):
+                f = f.strip()
+                tag = getTag(f)
+                if tag is not None:
+                    f = tag
             if isinstance(value, pydicom.dataset.Dataset):
                 value = value[f]
             elif isinstance(value, pydicom.dataelem.DataElement):
@@ -138,6 +170,31 @@ def retrieveFromDataset(
     return res
 
 
+def compilePath(path: list) -> list:
+    """
+    Resolves the tags in given path, as passed to
+    retrieveFromDataset, into pydicom tags, other
+    elements are kept unchanged
+
+    Parameters
+    ----------
+    path: list
+        list of strings representing path to value
+
+    Returns
+    -------
+    list
+    """
+    res = list()
+    for f in path:
+        tag = getTag(f.strip())
+        if tag is None:
+            res.append(f)
+        else:
+            res.append(pydicom.tag.Tag(tag))
+    return res
+
+
 def getTag(tag: str) -> tuple:
     """
     Parces a DICOM tag from string into a tuple of int
@@ -163,6 +220,92 @@ def getTag(tag: str) -> tuple:
         return None
 
 
+def fieldTag(field: str) -> pydicom.tag.BaseTag:
+    """
+    Returns the tag of top-level element retrieved by given field,
+    as passed to baseModule.getField, i.e. with optional prefixes
+    and path to nested elements: 'scale-3:(2005, 140f)/0/Field'
+
+    Parameters
+    ----------
+    field: str, pydicom.tag.BaseTag
+        field to parse, or tag resolved by compilePath
+
+    Returns
+    -------
+    pydicom.tag.BaseTag:
+        tag of element, or None if field is not a valid tag
+        or keyword
+    """
+    if isinstance(field, pydicom.tag.BaseTag):
+        return field
+    name = field.split(":")[-1].split("/")[0].strip()
+    tag = getTag(name)
+    if tag is not None:
+        return pydicom.tag.Tag(tag)
+    tag = pydicom.datadict.tag_for_keyword(name)
+    if tag is None:
+        return None
+    return pydicom.tag.Tag(tag)
+
+
+def fieldsTags(fields: set) -> frozenset:
+    """
+    Returns set of tags of top-level elements needed to
+    retrieve given fields, together with required_fields.
+    Fields that are not valid tags or keywords are ignored
+
+    Parameters
+    ----------
+    fields: set
+        fields to parse
+
+    Returns
+    -------
+    frozenset
+    """
+    res = set()
+    for field in required_fields:
+        res.add(fieldTag(field))
+    for field in fields:
+        res.add(fieldTag(field))
+    res.discard(None)
+    return frozenset(res)
+
+
+def readHeader(path: str, tags: frozenset = None) -> pydicom.FileDataset:
+    """
+    Reads the header of DICOM file, without pixel data.
+
+    If tags are given, only these top-level elements (with
+    their nested elements) are parsed, and reading stops
+    at first element after them
+
+    Parameters
+    ----------
+    path: str
+        path to DICOM file
+    tags: frozenset
+        tags to read, if None, all elements are read
+
+    Returns
+    -------
+    pydicom.FileDataset
+    """
+    # The DICM tag may be missing for anonymized DICOM files
+    if tags is None:
+        return pydicom.dcmread(path, stop_before_pixels=True)
+
+    last_tag = max(tags)
+
+    def stop_when(tag, VR, length):
+        return tag > last_tag or tag == 0x7fe00010
+
+    with open(path, "rb") as f:
+        return pydicom.filereader.read_partial(f, stop_when=stop_when,
+                                               specific_tags=list(tags))
+
+
 def DICOMtransform(element: pydicom.dataelem.DataElement,
                    clean: bool = False):
     if element is None:
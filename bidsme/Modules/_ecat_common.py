@@ -0,0 +1,223 @@
+###############################################################################
+# _ecat_common.py provides the memory-mapped reading of ECAT headers,
+# decoding the frames subheaders only when accessed
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import logging
+import mmap
+import numpy
+import sys
+
+from nibabel import ecat
+
+logger = logging.getLogger(__name__)
+
+# size of ECAT file blocks, main header, matrix lists
+# and subheaders starts at the begining of block
+block_size = ecat.BLOCK_SIZE
+
+# main header and frame subheader, in native endianess
+main_header = ecat.hdr_dtype
+sub_header = ecat.subhdr_dtype
+
+# software version identifying the endianess
+_sw_version = 74
+_native = "<" if sys.byteorder == "little" else ">"
+_swapped = ">" if _native == "<" else "<"
+
+
+def transform(val: numpy.ndarray) -> object:
+    """
+    Converts numpy value into python object,
+    decoding bytes strings
+    """
+    tmp = val.tolist()
+    if isinstance(tmp, bytes):
+        try:
+            tmp = tmp.decode()
+        except UnicodeError:
+            logger.debug("Can't decode bytes string")
+            tmp = "BytesString"
+    return tmp
+
+
+class Subheaders(object):
+    """
+    Sequence of frames subheaders, each subheader is decoded
+    into dictionary at its first access
+    """
+    __slots__ = ["_map", "_dtype", "_blocks", "_decoded"]
+
+    def __init__(self, mapped: mmap.mmap, dtype: numpy.dtype,
+                 blocks: numpy.ndarray):
+        """
+        Parameters
+        ----------
+        mapped: mmap.mmap
+            mapped ECAT file
+        dtype: numpy.dtype
+            subheader dtype, in file endianess
+        blocks: numpy.ndarray
+            0-based indices of subheaders blocks
+        """
+        self._map = mapped
+        self._dtype = dtype
+        self._blocks = blocks
+        self._decoded = [None] * len(blocks)
+
+    def __len__(self) -> int:
+        return len(self._decoded)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> dict:
+        res = self._decoded[index]
+        if res is None:
+            rec = numpy.frombuffer(self._map, self._dtype, 1,
+                                   int(self._blocks[index]) * block_size)[0]
+            res = {key: transform(rec[key]) for key in self._dtype.names}
+            self._decoded[index] = res
+        return res
+
+    def column(self, name: str) -> numpy.ndarray:
+        """
+        Returns the values of given field for all subheaders,
+        read in one pass without decoding the subheaders
+
+        Parameters
+        ----------
+        name: str
+            name of subheader field
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        dtype, offset = self._dtype.fields[name][:2]
+        # view of field as if subheader was at the start of every block
+        count = (len(self._map) - offset - dtype.itemsize) // block_size + 1
+        if len(self._blocks) > 0 and (self._blocks.min() < 0
+                                      or self._blocks.max() >= count):
+            raise IndexError("subheader block out of file")
+        view = numpy.ndarray(shape=(max(count, 0),), dtype=dtype,
+                             buffer=self._map, offset=offset,
+                             strides=(block_size,))
+        return view[self._blocks]
+
+
+class ECATFile(object):
+    """
+    ECAT file, with main header decoded at opening
+    and frames subheaders decoded when accessed.
+
+    File is memory-mapped and is kept open until closed.
+    """
+    __slots__ = ["path", "header", "subheaders", "_map"]
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path: str
+            path to ECAT file
+
+        Raises
+        ------
+        ValueError:
+            if file is too short to contain main header
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        endian = _native
+        if numpy.frombuffer(self._map, main_header, 1)[0]["sw_version"]\
+                != _sw_version:
+            endian = _swapped
+        dtype = main_header.newbyteorder(endian)
+        rec = numpy.frombuffer(self._map, dtype, 1)[0]
+        self.header = {key: transform(rec[key]) for key in dtype.names}
+
+        mlist = self.__readMatrixList(endian)
+        blocks = mlist[:, 1]
+        empty = numpy.flatnonzero(blocks == 0)
+        if len(empty) > 0:
+            blocks = blocks[:empty[0]]
+        self.subheaders = Subheaders(self._map,
+                                     sub_header.newbyteorder(endian),
+                                     blocks.astype(numpy.int64) - 1)
+
+    def __readMatrixList(self, endian: str) -> numpy.ndarray:
+        """
+        Reads the matrix list, chained over several blocks,
+        completed by zeros up to the number of frames
+        from main header.
+        Each row is composed of matrix identifier,
+        subheader block, last data block and matrix status.
+        """
+        dt = numpy.dtype(numpy.int32).newbyteorder(endian)
+        mlists = list()
+        visited = set()
+        block_no = 2
+        while block_no not in visited\
+                and block_no * block_size <= len(self._map):
+            visited.add(block_no)
+            rows = numpy.frombuffer(self._map, dt, 32 * 4,
+                                    (block_no - 1) * block_size)\
+                .reshape(32, 4)
+            n_unused, block_no, _, n_rows = rows[0].tolist()
+            if n_unused + n_rows != 31:
+                logger.debug("{}: Invalid matrix list".format(self.path))
+                mlists = list()
+                break
+            mlists.append(rows[1:n_rows + 1])
+            # chained blocks are never before the first one
+            if block_no <= 2:
+                break
+
+        nframes = max(self.header["num_frames"], 0)
+        mlist = numpy.zeros((nframes, 4), dtype=numpy.int32)
+        if mlists:
+            data = numpy.vstack(mlists)[:nframes]
+            mlist[:len(data)] = data
+        return mlist
+
+    def getField(self, name: str) -> object:
+        """
+        Returns the value of main header field
+
+        Raises
+        ------
+        ValueError:
+            if field is not defined in main header
+        """
+        if name not in self.header:
+            raise ValueError("no field of name {}".format(name))
+        return self.header[name]
+
+    def close(self) -> None:
+        """
+        Closes the mapping of file
+        """
+        self._map.close()
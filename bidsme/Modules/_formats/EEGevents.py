@@ -0,0 +1,245 @@
+###############################################################################
+# EEGevents.py provides the extraction of EEG events from annotations
+# and stim channels, read by chunks of samples
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import logging
+
+import numpy
+import pandas
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+# Events are detected as mne.find_events does with its default
+# parameters, and annotations are retrieved as in mne.Annotations
+
+# columns of events table
+event_columns = ["onset", "duration", "sample", "trial_type", "value"]
+
+# number of bytes of data read at once
+chunk_size = 8 * 1024 * 1024
+
+# minimal number of samples between two events of stim channel
+shortest_event = 2
+
+
+class StimChannel(object):
+    """
+    Detector of the events of a stim channel, which values
+    are passed by consecutive chunks.
+
+    Only the changes of value are kept in memory, so the
+    memory used is independent of the length of channel.
+    """
+    __slots__ = ["name", "n_samples", "_last", "_steps", "_negative"]
+
+    def __init__(self, name: str):
+        """
+        Parameters
+        ----------
+        name: str
+            name of stim channel
+        """
+        self.name = name
+        self.n_samples = 0
+        self._last = None
+        # list of arrays of (sample, previous value, new value)
+        self._steps = list()
+        self._negative = False
+
+    def feed(self, values: numpy.ndarray) -> None:
+        """
+        Detects the changes of value in the next chunk of channel
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            values of consecutive samples
+        """
+        values = values.astype(numpy.int64).ravel()
+        if len(values) == 0:
+            return
+        if not self._negative and values.min() < 0:
+            self._negative = True
+        values = numpy.abs(values)
+
+        if self._last is None:
+            full = values
+            offset = 1
+        else:
+            full = numpy.concatenate(([self._last], values))
+            offset = 0
+        changed = numpy.flatnonzero(full[1:] != full[:-1])
+        if len(changed) > 0:
+            self._steps.append(numpy.column_stack(
+                (changed + self.n_samples + offset,
+                 full[changed], full[changed + 1])))
+        self._last = values[-1]
+        self.n_samples += len(values)
+
+    def events(self) -> numpy.ndarray:
+        """
+        Returns the detected events, each event being
+        the onset of increasing value
+
+        Returns
+        -------
+        numpy.ndarray:
+            array of (sample, value) of events
+        """
+        if self._negative:
+            logger.warning("Trigger channel {} contains negative values, "
+                           "using absolute value".format(self.name))
+        empty = numpy.empty((0, 2), dtype=numpy.int64)
+        if not self._steps:
+            return empty
+        steps = numpy.concatenate(self._steps)
+        if steps[-1, 2] != 0:
+            steps = numpy.append(steps,
+                                 [[self.n_samples, steps[-1, 2], 0]], axis=0)
+
+        onsets = steps[:, 2] > steps[:, 1]
+        offsets = (onsets | (steps[:, 2] == 0)) & (steps[:, 1] > 0)
+        onset_idx = numpy.flatnonzero(onsets)
+        offset_idx = numpy.flatnonzero(offsets)
+        if len(onset_idx) == 0 or len(offset_idx) == 0:
+            return empty
+
+        # orphaned offset at start and onset at end
+        if onset_idx[0] > offset_idx[0]:
+            offset_idx = offset_idx[1:]
+        if len(offset_idx) == 0:
+            return empty
+        if onset_idx[-1] > offset_idx[-1]:
+            onset_idx = onset_idx[:-1]
+
+        events = steps[onset_idx][:, [0, 2]]
+        n_short = numpy.count_nonzero(numpy.diff(events[:, 0])
+                                      < shortest_event)
+        if n_short > 0:
+            logger.warning("Trigger channel {}: {} events are shorter "
+                           "than {} samples"
+                           .format(self.name, n_short, shortest_event))
+        return events
+
+
+def cropAnnotations(onset: numpy.ndarray, duration: numpy.ndarray,
+                    description: numpy.ndarray, tmax: float) -> tuple:
+    """
+    Removes annotations outside of recording and clips
+    the ones overlapping its limits, keeping the onsets with
+    microseconds precision
+
+    Parameters
+    ----------
+    onset: numpy.ndarray
+        onsets of annotations in seconds
+    duration: numpy.ndarray
+        durations of annotations in seconds
+    description: numpy.ndarray
+        descriptions of annotations
+    tmax: float
+        end of recording in seconds
+
+    Returns
+    -------
+    tuple(onset, duration, description)
+    """
+    onset = numpy.round(numpy.asarray(onset, dtype=numpy.float64) * 1e6)
+    duration = numpy.asarray(duration, dtype=numpy.float64)
+    description = numpy.asarray(description, dtype=object)
+    tmax = numpy.round(tmax * 1e6)
+    span = numpy.round(numpy.nan_to_num(duration) * 1e6)
+    offset = onset + span
+
+    keep = (onset <= tmax) & (offset >= 0)
+    clipped = keep & ((onset < 0) | (offset > tmax))
+    duration = numpy.where(clipped,
+                           (numpy.minimum(offset, tmax)
+                            - numpy.maximum(onset, 0)) / 1e6,
+                           duration)
+    onset = numpy.maximum(onset, 0) / 1e6
+    return onset[keep], duration[keep], description[keep]
+
+
+def eventsTable(sfreq: float, annotations: tuple,
+                stims: list, first_time: float = 0.,
+                first_samp: int = 0) -> DataFrame:
+    """
+    Creates the events table from annotations and
+    stim channels events
+
+    Parameters
+    ----------
+    sfreq: float
+        sampling frequency
+    annotations: tuple
+        tuple of arrays (onset, duration, description)
+        of annotations, onset and duration in seconds
+    stims: list
+        list of (channel name, events), with events
+        as returned by StimChannel.events
+    first_time: float
+        time of first sample of recording
+    first_samp: int
+        index of first sample of recording
+
+    Returns
+    -------
+    DataFrame
+        resulting dataframe, indexed and sorted by onset
+    """
+    a_onset, a_duration, a_desc = annotations
+    a_onset = numpy.asarray(a_onset, dtype=numpy.float64)
+    a_desc = numpy.array([d[:-1] if d.endswith("/") else d
+                          for d in a_desc], dtype=object)
+
+    onset = [a_onset - first_time]
+    duration = [numpy.asarray(a_duration, dtype=numpy.float64)]
+    sample = [(a_onset * sfreq).astype(numpy.int64)]
+    trial_type = [a_desc]
+    value = [numpy.zeros(len(a_onset), dtype=numpy.int64)]
+    mask = [numpy.ones(len(a_onset), dtype=bool)]
+
+    for name, events in stims:
+        samples = events[:, 0] - first_samp
+        onset.append(samples / sfreq)
+        duration.append(numpy.zeros(len(events)))
+        sample.append(samples)
+        trial_type.append(numpy.full(len(events), name, dtype=object))
+        value.append(events[:, 1])
+        mask.append(numpy.zeros(len(events), dtype=bool))
+
+    onset = numpy.concatenate(onset)
+    order = numpy.argsort(onset, kind="stable")
+    df = DataFrame({
+        "onset": onset[order],
+        "duration": numpy.concatenate(duration)[order],
+        "sample": numpy.concatenate(sample)[order],
+        "trial_type": numpy.concatenate(trial_type)[order],
+        "value": pandas.arrays.IntegerArray(
+            numpy.concatenate(value)[order],
+            numpy.concatenate(mask)[order])
+        }, columns=event_columns)
+    df.set_index("onset", inplace=True)
+    return df
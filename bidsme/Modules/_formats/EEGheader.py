@@ -0,0 +1,955 @@
+###############################################################################
+# EEGheader.py provides the native reading of EDF and BrainVision headers,
+# retrieving metadata and channels list without loading raw data
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import re
+import logging
+import configparser
+
+from datetime import datetime, timezone
+
+import numpy
+from pandas import DataFrame
+
+from . import EEGevents
+
+logger = logging.getLogger(__name__)
+
+# Values retrieved from headers follows the mne-python readers
+# (mne.io.read_raw_edf and mne.io.read_raw_brainvision), as called
+# by MNE format, so the same metadata is retrieved with and without
+# loading the raw file
+
+# channel names of EDF+ annotations, not reported as channels
+edf_annotations = ("EDF Annotations", "BDF Annotations")
+# EDF channels names (in lower case) identified as trigger
+edf_stim = ("status", "trigger")
+# size of EDF data samples
+edf_sample_size = {".edf": 2, ".bdf": 3}
+# EDF units (in microvolts or millivolts) scaled by mne
+edf_unit_scale = {"\u03bcV": 1e-6, "\u00b5V": 1e-6, "\x83\xcaV": 1e-6,
+                  "uV": 1e-6, "mV": 1e-3}
+# EDF+ time-stamped annotations lists
+edf_tal = re.compile(rb"([+-]\d+\.?\d*)(\x15(\d+\.?\d*))?"
+                     rb"(\x14.*?)\x14\x00")
+
+# size of BrainVision binary data samples
+vhdr_sample_size = {"INT_16": 2, "INT_32": 4, "IEEE_FLOAT_32": 4}
+vhdr_dtype = {"INT_16": "<i2", "INT_32": "<i4", "IEEE_FLOAT_32": "<f4"}
+# BrainVision units scaled by mne
+vhdr_unit_scale = {"µV": 1e-6, "uV": 1e-6, "mV": 1e-3, "nV": 1e-9,
+                   "µS": 1e-6, "uS": 1e-6}
+# BrainVision channel name identified as trigger
+vhdr_stim = "STI 014"
+
+# SI units (in lower case) accepted as channels units,
+# other units are reported as n/a
+_unit_prefixes = ("yocto", "zepto", "atto", "femto", "pico", "nano",
+                  "micro", "milli", "centi", "deci", "deca", "hecto",
+                  "kilo", "mega", "giga", "tera", "peta", "exa",
+                  "zetta", "yotta",
+                  "y", "z", "a", "f", "p", "n", "µ", "m", "c", "d",
+                  "da", "h", "k", "M", "G", "T", "P", "E", "Z", "Y")
+_unit_names = ("metre", "kilogram", "second", "ampere", "kelvin", "mole",
+               "candela", "radian", "steradian", "hertz", "newton",
+               "pascal", "joule", "watt", "coulomb", "volt", "farad",
+               "ohm", "siemens", "weber", "tesla", "henry",
+               "degree Celsius", "lumen", "lux", "becquerel", "gray",
+               "sievert", "katal",
+               "m", "kg", "s", "A", "K", "mol", "cd", "rad", "sr", "Hz",
+               "N", "Pa", "J", "W", "C", "V", "F", "Ω", "S", "Wb", "T",
+               "H", "°C", "lm", "lx", "Bq", "Gy", "Sv", "kat")
+valid_units = frozenset([(prefix + unit).lower()
+                         for prefix in ("",) + _unit_prefixes
+                         for unit in _unit_names] + ["n/a"])
+# common spellings of microvolts
+_unit_remap = {"uv": "µV", "μv": "µV", "\x83\xeav": "µV"}
+
+# columns of channels table
+channel_columns = ["name", "type", "units",
+                   "low_cutoff", "high_cutoff",
+                   "sampling_frequency", "status"]
+
+
+class EEGheader(object):
+    """
+    Metadata of EEG file, parsed from its header.
+
+    info contains the keys of mne measurement info that
+    are retrievable from header (sfreq, meas_date, nchan,
+    ch_names, highpass, lowpass, bads, and subject_info
+    for EDF)
+
+    Events are read from data file by format-specific
+    subclasses, implementing annotations and readChannels
+    """
+    __slots__ = ["path", "info", "channels", "duration", "coordinates",
+                 "patient", "recording"]
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.info = dict()
+        # list of (name, BIDS type, units)
+        self.channels = list()
+        # duration of recording, None if not retrievable from header
+        self.duration = None
+        # True if header defines coordinates of electrodes
+        self.coordinates = False
+        # EDF patient and recording identification fields
+        self.patient = ""
+        self.recording = ""
+
+    def load_channels(self) -> DataFrame:
+        """
+        Creates the channels table, with same values as
+        MNE.load_channels
+
+        Returns:
+        --------
+        DataFrame
+            resulting dataframe, indexed by channel name
+        """
+        n_channels = len(self.channels)
+        d_chs = {"name": [ch[0] for ch in self.channels],
+                 "type": [ch[1] for ch in self.channels],
+                 "units": [ch[2] for ch in self.channels],
+                 "low_cutoff": [self.info["highpass"]] * n_channels,
+                 "high_cutoff": [self.info["lowpass"]] * n_channels,
+                 "sampling_frequency": [self.info["sfreq"]] * n_channels,
+                 "status": ["good"] * n_channels
+                 }
+        df = DataFrame(d_chs, columns=channel_columns)
+        df.set_index('name', inplace=True)
+        return df
+
+    def load_events(self, stim_channels: list = []) -> DataFrame:
+        """
+        Creates the events table from annotations and
+        stim channels, with same values as MNE.load_events.
+
+        Stim channels are read together in a single pass
+        over data file.
+
+        Parameters:
+        ----------
+        stim_channels: list of str
+            list of channels used as markers, in addition
+            to trigger channels identified from header
+
+        Returns:
+        --------
+        DataFrame
+            resulting dataframe, indexed by onset
+        """
+        names = [ch[0] for ch in self.channels
+                 if ch[1] == "TRIG" or ch[0] in stim_channels]
+        detectors = [EEGevents.StimChannel(name) for name in names]
+        if detectors:
+            for values in self.readChannels(names):
+                for detector, val in zip(detectors, values):
+                    detector.feed(val)
+        return EEGevents.eventsTable(self.info["sfreq"],
+                                     self.annotations(),
+                                     [(det.name, det.events())
+                                      for det in detectors])
+
+    def annotations(self) -> tuple:
+        """
+        Reads annotations stored in file, cropped to recording
+
+        Returns
+        -------
+        tuple(onset, duration, description)
+            arrays of onsets and durations in seconds,
+            and of descriptions
+        """
+        raise NotImplementedError
+
+    def readChannels(self, names: list):
+        """
+        Reads the values of given channels by chunks of samples,
+        as scaled by mne
+
+        Parameters
+        ----------
+        names: list of str
+            names of channels to read
+
+        Yields
+        ------
+        list of numpy.ndarray
+            values of next chunk of samples, one array per channel
+        """
+        raise NotImplementedError
+
+
+def _uniqueNames(ch_names: list) -> list:
+    """
+    Renames duplicated channels by appending running numbers,
+    as mne do
+    """
+    if len(set(ch_names)) == len(ch_names):
+        return ch_names
+    ch_names = list(ch_names)
+    suffixes = tuple("abcdefghijklmnopqrstuvwxyz")
+    counts = dict()
+    for name in ch_names:
+        counts[name] = counts.get(name, 0) + 1
+    for stem in [name for name, count in counts.items() if count > 1]:
+        overlaps = [idx for idx, name in enumerate(ch_names) if name == stem]
+        for count, idx in enumerate(overlaps):
+            for suffix in (count,) + suffixes:
+                name = "{}-{}".format(stem, suffix)
+                if name not in ch_names:
+                    break
+            if name in ch_names:
+                raise ValueError("Duplicated channel name {}".format(name))
+            ch_names[idx] = name
+    return ch_names
+
+
+def _checkUnit(unit: str) -> str:
+    """
+    Returns unit as reported by mne, with microvolts
+    spelled µV and unknown units replaced by n/a
+    """
+    if unit.lower() in valid_units:
+        return unit
+    return _unit_remap.get(unit.lower(), "n/a")
+
+
+def _edfString(value: bytes) -> str:
+    return value.decode("latin-1").split("\x00")[0]
+
+
+def _edfPatient(id_info: list) -> dict:
+    """
+    Parses EDF+ patient identification into mne subject_info
+    """
+    res = dict()
+    if not id_info:
+        return res
+    res["his_id"] = id_info[0]
+    if len(id_info) < 4:
+        return res
+    res["sex"] = {"M": 1, "F": 2}.get(id_info[1], 0)
+    try:
+        birthday = datetime.strptime(id_info[2], "%d-%b-%Y")
+        res["birthday"] = (birthday.year, birthday.month, birthday.day)
+    except ValueError:
+        pass
+    names = id_info[3].split("_")
+    if len(names) == 2:
+        res["first_name"], res["last_name"] = names
+    elif len(names) == 3:
+        res["first_name"], res["middle_name"], res["last_name"] = names
+    else:
+        res["last_name"] = id_info[3]
+    for info in id_info[4:]:
+        key, sep, value = info.partition("=")
+        try:
+            if key in ("weight", "height"):
+                res[key] = float(value)
+            elif key == "hand":
+                res[key] = int(value)
+        except ValueError:
+            logger.debug("Invalid patient information {}".format(info))
+    return res
+
+
+def _decode(value: bytes) -> str:
+    """
+    Decodes utf-8 string, falling back to latin-1
+    """
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        logger.debug("Invalid utf-8 string {}".format(value))
+        return value.decode("latin-1")
+
+
+class EDFheader(EEGheader):
+    """
+    Header of EDF or BDF file, with the layout of its data records
+    """
+    __slots__ = ["_offset", "_n_records", "_samps", "_sample_size",
+                 "_signals", "_tal", "_cal", "_shift", "_gain",
+                 "_buf_len"]
+
+    def __init__(self, path: str = ""):
+        super().__init__(path)
+        # size of headers in bytes
+        self._offset = 0
+        self._n_records = 0
+        # number of samples per record of each signal
+        self._samps = numpy.zeros(0, dtype=numpy.int64)
+        self._sample_size = 2
+        # signal of each channel and signals of annotations
+        self._signals = list()
+        self._tal = list()
+        # scaling of channels values, as done by mne
+        self._cal = numpy.ones(0)
+        self._shift = numpy.zeros(0)
+        self._gain = numpy.ones(0)
+        # number of samples per record at sampling frequency
+        self._buf_len = 0
+
+    def __records(self):
+        """
+        Yields the consecutive chunks of data records,
+        as arrays of bytes of shape (records, record size)
+        """
+        record_bytes = int(self._samps.sum()) * self._sample_size
+        if self._n_records <= 0 or record_bytes <= 0:
+            return
+        data = numpy.memmap(self.path, dtype=numpy.uint8, mode="r",
+                            offset=self._offset,
+                            shape=(self._n_records, record_bytes))
+        n_per = max(EEGevents.chunk_size // record_bytes, 1)
+        for start in range(0, self._n_records, n_per):
+            yield data[start:start + n_per]
+
+    def __bounds(self, signal: int) -> slice:
+        """
+        Returns the bytes of given signal within data record
+        """
+        start = int(self._samps[:signal].sum()) * self._sample_size
+        return slice(start,
+                     start + int(self._samps[signal]) * self._sample_size)
+
+    def __decode(self, block: numpy.ndarray, signal: int) -> numpy.ndarray:
+        """
+        Decodes the samples of given signal from block of records,
+        returning array of shape (records, samples)
+        """
+        raw = numpy.ascontiguousarray(block[:, self.__bounds(signal)])
+        if self._sample_size == 2:
+            return raw.view("<i2").astype(numpy.int32)
+        raw = raw.reshape(len(raw), -1, 3).astype(numpy.int32)
+        res = raw[:, :, 0] + (raw[:, :, 1] << 8) + (raw[:, :, 2] << 16)
+        res[res >= (1 << 23)] -= 1 << 24
+        return res
+
+    def readChannels(self, names: list):
+        """
+        Reads the values of given channels by chunks of records.
+        Channels with lower sampling frequency are upsampled
+        by repeating values (mne resamples them by FFT, which
+        is done only for trigger channels here).
+        """
+        idx = [self.info["ch_names"].index(name) for name in names]
+        for block in self.__records():
+            res = list()
+            for i in idx:
+                signal = self._signals[i]
+                n_samps = int(self._samps[signal])
+                val = (self.__decode(block, signal) * self._cal[i]
+                       + self._shift[i]) * self._gain[i]
+                if n_samps != self._buf_len:
+                    hold = numpy.arange(self._buf_len) * n_samps\
+                        // self._buf_len
+                    val = val[:, hold]
+                elif self.channels[i][1] == "TRIG":
+                    val = numpy.bitwise_and(val.astype(numpy.int64),
+                                            2**17 - 1)
+                res.append(val.ravel())
+            yield res
+
+    def annotations(self) -> tuple:
+        """
+        Parses the EDF+ time-stamped annotations lists,
+        one chunk of data records at a time
+        """
+        onset = list()
+        duration = list()
+        description = list()
+        if self._tal:
+            ch_names = set(self.info["ch_names"])
+            bounds = [self.__bounds(signal) for signal in self._tal]
+            # onset, duration and description of annotations,
+            # used to merge annotations of different channels
+            keys = set()
+            offset = 0.
+            first = True
+            for block in self.__records():
+                tals = numpy.concatenate([block[:, b] for b in bounds],
+                                         axis=1).tobytes()
+                for match in edf_tal.finditer(tals):
+                    t_onset = float(match.group(1)) + offset
+                    t_duration = float(match.group(3))\
+                        if match.group(3) else 0.
+                    descs = match.group(4).split(b"\x14")[1:]
+                    for desc in descs:
+                        if not desc:
+                            continue
+                        desc = _decode(desc)
+                        parts = desc.split("@@")
+                        if len(parts) > 1 and parts[1] in ch_names:
+                            desc = parts[0]
+                            if (t_onset, t_duration, desc) in keys:
+                                continue
+                        keys.add((t_onset, t_duration, desc))
+                        onset.append(t_onset)
+                        duration.append(t_duration)
+                        description.append(desc)
+                    # first record starts at fraction of second
+                    # given by first (time-keeping) annotation
+                    if first and not all(descs):
+                        offset = -t_onset
+                    first = False
+        n_times = self._n_records * self._buf_len
+        return EEGevents.cropAnnotations(onset, duration, description,
+                                         n_times / self.info["sfreq"])
+
+
+def readEDF(path: str) -> EDFheader:
+    """
+    Parses the fixed header and signals headers of EDF file
+
+    Parameters
+    ----------
+    path: str
+        path to EDF file
+
+    Returns
+    -------
+    EDFheader
+
+    Raises
+    ------
+    ValueError:
+        if header is corrupted
+    """
+    res = EDFheader(path)
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        fixed = f.read(256)
+        if len(fixed) < 256:
+            raise ValueError("Header too short")
+        nchan = int(_edfString(fixed[252:256]))
+        signals = f.read(256 * nchan)
+        if len(signals) < 256 * nchan:
+            raise ValueError("Signals header too short")
+        f.seek(0, os.SEEK_END)
+        n_bytes = f.tell()
+
+    res.patient = fixed[8:88].decode("latin-1")
+    res.recording = fixed[88:168].decode("latin-1")
+
+    # meas_date, with year from recording identification if available
+    rec_info = res.recording.rstrip().split(" ")
+    startdate = None
+    if len(rec_info) == 5:
+        try:
+            startdate = datetime.strptime(rec_info[1], "%d-%b-%Y")
+        except ValueError:
+            pass
+    if startdate is not None:
+        day, month, year = startdate.day, startdate.month, startdate.year
+    else:
+        day, month, year = [int(x) for x in
+                            fixed[168:176].decode("latin-1").split(".")]
+        year = year + 2000 if year < 85 else year + 1900
+    hour, minute, sec = [int(x) for x in
+                         fixed[176:184].decode("latin-1").split(".")]
+    try:
+        meas_date = datetime(year, month, day, hour, minute, sec,
+                             tzinfo=timezone.utc)
+    except ValueError:
+        logger.debug("Invalid date")
+        meas_date = None
+
+    header_nbytes = int(_edfString(fixed[184:192]))
+    n_records = int(_edfString(fixed[236:244]))
+    record_length = float(_edfString(fixed[244:252]))
+    if record_length == 0:
+        record_length = 1.
+
+    # signals headers are stored field by field
+    def field(offset: int, size: int) -> list:
+        start = offset * nchan
+        return [signals[start + i * size:start + (i + 1) * size]
+                for i in range(nchan)]
+
+    labels = [v.strip().decode("latin-1") for v in field(0, 16)]
+    units = [v.strip().decode("latin-1") for v in field(16 + 80, 8)]
+    ranges = [numpy.array([float(_edfString(v).replace(",", "."))
+                           for v in field(16 + 80 + 8 + i * 8, 8)])
+              for i in range(4)]
+    prefiltering = [_edfString(v).strip()
+                    for v in field(16 + 80 + 8 + 4 * 8, 80)][:-1]
+    all_samps = numpy.array([int(_edfString(v))
+                             for v in field(16 + 80 + 8 + 4 * 8 + 80, 8)])
+
+    sel = [idx for idx, name in enumerate(labels)
+           if name not in edf_annotations]
+    res._tal = [idx for idx, name in enumerate(labels)
+                if name in edf_annotations]
+    res._signals = sel
+    ch_names = _uniqueNames([labels[idx] for idx in sel])
+    units = [units[idx] for idx in sel]
+    if sel:
+        n_samps = all_samps[sel]
+    else:
+        n_samps = all_samps[[0]]
+
+    lower = [name.lower() for name in ch_names]
+    stim = {lower.index(name) for name in edf_stim if name in lower}
+    not_stim = [idx for idx in range(len(n_samps)) if idx not in stim]
+    if not not_stim:
+        not_stim = list(range(len(n_samps)))
+    buf_len = int(n_samps[not_stim].max())
+    sfreq = buf_len / record_length
+
+    # filters
+    highpass = [v for filt in prefiltering
+                for v in re.findall(r"HP:\s*([0-9]+[.]*[0-9]*)", filt)]
+    lowpass = [v for filt in prefiltering
+               for v in re.findall(r"LP:\s*([0-9]+[.]*[0-9]*)", filt)]
+    hp = 0.
+    lp = sfreq / 2.
+    if highpass:
+        try:
+            hp = float(highpass[0])
+        except ValueError:
+            hp = 0.
+    if lowpass and lowpass[0] not in ("NaN", "0", "0.0"):
+        lp = float(lowpass[0])
+    if numpy.isnan(hp):
+        hp = 0.
+    if numpy.isnan(lp):
+        lp = sfreq / 2.
+    if hp > lp:
+        hp = 0.
+        lp = sfreq / 2.
+
+    # number of records may be wrong in interrupted recordings
+    sample_size = edf_sample_size.get(ext, 2)
+    read_records = (n_bytes - header_nbytes) // sample_size\
+        // int(numpy.sum(all_samps))
+    if n_records != read_records:
+        n_records = read_records
+    n_times = int(n_records * buf_len)
+
+    # scaling of digital values to physical ones
+    phys_min, phys_max, dig_min, dig_max = [r[sel] for r in ranges]
+    cal = dig_max - dig_min
+    cal[~numpy.isfinite(cal) | (cal == 0)] = 1
+    phys_range = phys_max - phys_min
+    phys_range[phys_range == 0] = 1
+    res._cal = phys_range / cal
+    res._shift = phys_min - dig_min * res._cal
+    res._gain = numpy.array([edf_unit_scale.get(unit, 1.)
+                             for unit in units])
+    stim_idx = sorted(stim)
+    res._gain[stim_idx] = 1
+    if sample_size == 3:
+        res._cal[stim_idx] = 1
+        res._shift[stim_idx] = 0
+    res._offset = header_nbytes
+    res._n_records = n_records
+    res._samps = all_samps
+    res._sample_size = sample_size
+    res._buf_len = buf_len
+
+    res.info = {"sfreq": float(sfreq),
+                "meas_date": meas_date,
+                "nchan": len(ch_names),
+                "ch_names": ch_names,
+                "highpass": hp,
+                "lowpass": lp,
+                "bads": [],
+                "subject_info": _edfPatient(
+                    res.patient.rstrip().split(" "))
+                }
+    res.channels = [(name, "TRIG" if idx in stim else "EEG",
+                     _checkUnit(units[idx]))
+                    for idx, name in enumerate(ch_names)]
+    res.duration = (n_times - 1) / sfreq
+    return res
+
+
+def _bvDecode(text: bytes) -> str:
+    """
+    Decodes BrainVision header or marker file, using
+    its codepage
+    """
+    try:
+        codepage = "utf-8"
+        cp_setting = re.search("Codepage=(.+)",
+                               text.decode("ascii", "ignore"))
+        if cp_setting:
+            codepage = cp_setting.group(1).strip()
+        if codepage == "ANSI":
+            codepage = "cp1252"
+        return text.decode(codepage)
+    except UnicodeDecodeError:
+        return text.decode("latin-1")
+
+
+def _vhdrSettings(path: str) -> str:
+    """
+    Reads and decodes BrainVision header, without its first line
+    """
+    with open(path, "rb") as f:
+        f.readline()
+        settings = f.read()
+    return _bvDecode(settings)
+
+
+def _vhdrFilter(values: list, seconds: bool, is_high: bool,
+                sfreq: float) -> float:
+    """
+    Returns the filter cutoff (in Hz) common to all channels,
+    or the weakest one, None if filter is not set
+    """
+    if len(set(values)) == 1:
+        if values[0] in ("NaN", "Off") or (not is_high and values[0] == "0"):
+            return None
+        if is_high and values[0] == "DC":
+            return 0.
+        value = float(values[0])
+        if seconds:
+            value = 1. / (2 * numpy.pi * value)
+        return value
+
+    off = ("NaN", "Off", "DC") if is_high else ("NaN", "Off", "0")
+    # disabled filters are the weakest ones
+    if is_high == seconds:
+        values = [float(v) if v not in off else numpy.inf for v in values]
+        value = numpy.max(numpy.array(values, dtype=numpy.float64))
+    else:
+        values = [float(v) if v not in off else 0. for v in values]
+        value = numpy.min(numpy.array(values, dtype=numpy.float64))
+    if seconds:
+        with numpy.errstate(divide="ignore"):
+            value = 1. / (2 * numpy.pi * value)
+    elif not is_high and numpy.isinf(value):
+        value = sfreq / 2.
+    return float(value)
+
+
+def _vhdrFilters(settings: list, ch_names: list, info: dict) -> None:
+    """
+    Retrieves the filters settings from the comment section
+    of BrainVision header
+    """
+    idx = None
+    hp_col, lp_col = 4, 5
+    if "Channels" in settings:
+        idx = settings.index("Channels")
+        settings = settings[idx + 1:]
+        for idx, setting in enumerate(settings):
+            if re.match(r"#\s+Name", setting):
+                break
+        else:
+            idx = None
+
+    idx_amp = idx
+    has_names = True
+    if "S o f t w a r e  F i l t e r s" in settings:
+        idx = settings.index("S o f t w a r e  F i l t e r s")
+        for idx, setting in enumerate(settings[idx + 1:], idx + 1):
+            if re.match(r"#\s+Low Cutoff", setting):
+                hp_col, lp_col = 1, 2
+                has_names = False
+                break
+        else:
+            idx = idx_amp
+
+    if not idx:
+        return
+
+    shift = 1 if "Resolution / Unit" in settings[idx] else 0
+    header = re.split(r"\s\s+", settings[idx])
+    hp_s = "[s]" in header[hp_col]
+    lp_s = "[s]" in header[lp_col]
+    highpass = list()
+    lowpass = list()
+    for i, ch in enumerate(ch_names, 1):
+        if has_names:
+            real_shift = shift + len(re.split(r"\s+", ch)) - 1
+        else:
+            real_shift = shift
+        line = re.split(r"\s+", settings[idx + i])
+        highpass.append(line[hp_col + real_shift])
+        lowpass.append(line[lp_col + real_shift])
+
+    if highpass:
+        value = _vhdrFilter(highpass, hp_s, True, info["sfreq"])
+        if value is not None:
+            info["highpass"] = value
+    if lowpass:
+        value = _vhdrFilter(lowpass, lp_s, False, info["sfreq"])
+        if value is not None:
+            info["lowpass"] = value
+
+
+class BVheader(EEGheader):
+    """
+    Header of BrainVision file, with the layout of its data file
+    """
+    __slots__ = ["_data_file", "_marker_file", "_fmt", "_order",
+                 "_cal", "_n_samples", "_skip_lines", "_decimal"]
+
+    def __init__(self, path: str = ""):
+        super().__init__(path)
+        self._data_file = ""
+        self._marker_file = ""
+        # binary format, None for ASCII data
+        self._fmt = None
+        self._order = "MULTIPLEXED"
+        # scaling of channels values, as done by mne
+        self._cal = numpy.ones(0)
+        # number of samples, None if not known
+        self._n_samples = None
+        # ASCII data parameters
+        self._skip_lines = 0
+        self._decimal = "."
+
+    def __asciiLines(self):
+        """
+        Yields the lines of ASCII data file
+        """
+        with open(self._data_file, "rb") as f:
+            for i in range(self._skip_lines):
+                f.readline()
+            for line in f:
+                yield line
+
+    def readChannels(self, names: list):
+        """
+        Reads the values of given channels by chunks of samples
+        """
+        idx = [self.info["ch_names"].index(name) for name in names]
+        nchan = self.info["nchan"]
+        if self._fmt is None:
+            yield from self.__readAscii(idx)
+            return
+
+        dtype = numpy.dtype(vhdr_dtype[self._fmt])
+        n_samples = self._n_samples
+        if n_samples <= 0:
+            return
+        if self._order == "MULTIPLEXED":
+            data = numpy.memmap(self._data_file, dtype=dtype, mode="r",
+                                shape=(n_samples, nchan))
+            step = max(EEGevents.chunk_size // (dtype.itemsize * nchan), 1)
+        else:
+            data = numpy.memmap(self._data_file, dtype=dtype, mode="r",
+                                shape=(nchan, n_samples)).T
+            step = max(EEGevents.chunk_size // dtype.itemsize, 1)
+        for start in range(0, n_samples, step):
+            block = data[start:start + step]
+            yield [block[:, i] * self._cal[i] for i in idx]
+
+    def __readAscii(self, idx: list):
+        """
+        Reads the values of given channels from ASCII data file
+        """
+        step = max(EEGevents.chunk_size // (16 * self.info["nchan"]), 1)
+        values = list()
+        for line in self.__asciiLines():
+            line = line.decode("ascii").strip()
+            if self._decimal != ".":
+                line = line.replace(",", ".")
+            if " " in line:
+                line = line.split()
+            else:
+                line = line.split(",")
+            values.append([float(line[i]) for i in idx])
+            if len(values) >= step:
+                block = numpy.array(values)
+                values = list()
+                yield [block[:, n] * self._cal[i]
+                       for n, i in enumerate(idx)]
+        if values:
+            block = numpy.array(values)
+            yield [block[:, n] * self._cal[i] for n, i in enumerate(idx)]
+
+    def annotations(self) -> tuple:
+        """
+        Parses the markers from marker file
+        """
+        with open(self._marker_file, "rb") as f:
+            text = _bvDecode(f.read())
+        onset = list()
+        duration = list()
+        description = list()
+        m = re.search(r"\[Marker Infos\]", text, re.IGNORECASE)
+        if m:
+            text = text[m.end():]
+            for info in re.findall(r"^Mk\d+=(.*)", text, re.MULTILINE):
+                info = info.split(",")
+                mtype, mdesc, m_onset, m_duration = info[:4]
+                mtype = mtype.replace(r"\1", ",")
+                mdesc = mdesc.replace(r"\1", ",")
+                # BrainVision samples are 1-indexed
+                onset.append(int(m_onset) - 1)
+                duration.append(int(m_duration)
+                                if m_duration.isdigit() else 0)
+                description.append(mtype + "/" + mdesc)
+
+        n_samples = self._n_samples
+        if n_samples is None:
+            n_samples = sum(1 for line in self.__asciiLines())
+        sfreq = self.info["sfreq"]
+        return EEGevents.cropAnnotations(
+            numpy.array(onset, dtype=numpy.float64) / sfreq,
+            numpy.array(duration, dtype=numpy.float64) / sfreq,
+            description, n_samples / sfreq)
+
+
+def readBrainVision(path: str) -> BVheader:
+    """
+    Parses the BrainVision header and the recording date
+    from marker file
+
+    Parameters
+    ----------
+    path: str
+        path to .vhdr file
+
+    Returns
+    -------
+    BVheader
+
+    Raises
+    ------
+    ValueError:
+        if header is not supported
+    """
+    res = BVheader(path)
+    settings = _vhdrSettings(path)
+    if settings.find("[Comment]") != -1:
+        params, settings = settings.split("[Comment]")
+    else:
+        params, settings = settings, ""
+    cfg = configparser.ConfigParser()
+    cfg.read_string(params)
+
+    cinfostr = "Common Infos"
+    if not cfg.has_section(cinfostr):
+        cinfostr = "Common infos"
+    sfreq = 1e6 / cfg.getfloat(cinfostr, "SamplingInterval")
+
+    order = cfg.get(cinfostr, "DataOrientation")
+    if order not in ("MULTIPLEXED", "VECTORIZED"):
+        raise ValueError("Data Orientation {} is not supported"
+                         .format(order))
+    fmt = None
+    if cfg.get(cinfostr, "DataFormat") == "BINARY":
+        fmt = cfg.get("Binary Infos", "BinaryFormat")
+        if fmt not in vhdr_sample_size:
+            raise ValueError("Datatype {} is not supported".format(fmt))
+    elif order == "VECTORIZED":
+        raise ValueError("ASCII vectorized data is not supported")
+    else:
+        res._skip_lines = cfg.getint("ASCII Infos", "SkipLines",
+                                     fallback=0)
+        res._decimal = cfg.get("ASCII Infos", "DecimalSymbol",
+                               fallback=".")
+    res._fmt = fmt
+    res._order = order
+
+    folder = os.path.dirname(path)
+    data_file = os.path.join(folder, cfg.get(cinfostr, "DataFile"))
+    mrk_file = os.path.join(folder, cfg.get(cinfostr, "MarkerFile"))
+    res._data_file = data_file
+    res._marker_file = mrk_file
+
+    meas_date = None
+    regexp = re.compile(r"^Mk\d+=New Segment,.*,\d+,\d+,-?\d+,(\d{20})$")
+    with open(mrk_file, "r") as f:
+        for line in f:
+            match = regexp.findall(line.strip())
+            if match:
+                try:
+                    meas_date = datetime.strptime(match[0],
+                                                  "%Y%m%d%H%M%S%f")\
+                        .replace(tzinfo=timezone.utc)
+                except ValueError:
+                    logger.debug("Invalid date {}".format(match[0]))
+                break
+
+    nchan = cfg.getint(cinfostr, "NumberOfChannels")
+    ch_names = [""] * nchan
+    units = [""] * nchan
+    res._cal = numpy.ones(nchan)
+    ch_dict = dict()
+    for chan, props in cfg.items("Channel Infos"):
+        n = int(re.findall(r"ch(\d+)", chan)[0]) - 1
+        props = props.split(",")
+        if len(props) < 4:
+            props += ("µV",)
+        elif props[3] == "":
+            props[3] = "µV"
+        name = props[0].replace(r"\1", ",")
+        ch_dict[chan] = name
+        ch_names[n] = name
+        units[n] = props[3].replace("\xc2", "")
+        resolution = props[2] if len(props) > 2 else ""
+        if resolution == "":
+            resolution = 1. if units[n] else 1e-6
+        res._cal[n] = float(resolution)\
+            * vhdr_unit_scale.get(units[n], 1.)
+
+    # channels without coordinates are set as misc
+    misc = set()
+    if cfg.has_section("Coordinates"):
+        res.coordinates = True
+        for chan, coords in cfg.items("Coordinates"):
+            if float(coords.split(",")[0]) == 0:
+                misc.add(ch_dict[chan])
+
+    res.info = {"sfreq": sfreq,
+                "meas_date": meas_date,
+                "nchan": nchan,
+                "ch_names": ch_names,
+                "highpass": 0.,
+                "lowpass": sfreq / 2.,
+                "bads": []
+                }
+    _vhdrFilters(settings.splitlines(), ch_names, res.info)
+
+    res.channels = list()
+    for name, unit in zip(ch_names, units):
+        if name in misc:
+            ch_type = "MISC"
+        elif name == vhdr_stim:
+            ch_type = "TRIG"
+        else:
+            ch_type = "EEG"
+        res.channels.append((name, ch_type, _checkUnit(unit)))
+
+    if fmt is not None:
+        n_samples = os.path.getsize(data_file)\
+            // (vhdr_sample_size[fmt] * nchan)
+        res.duration = (n_samples - 1) / sfreq
+        res._n_samples = n_samples
+    return res
+
+
+# file-extension map to header readers
+reader = {".edf": readEDF, ".bdf": readEDF, ".vhdr": readBrainVision}
@@ -22,12 +22,14 @@
 ##############################################################################
 
 import logging
+import numpy
 from pandas import DataFrame
 import mne
 from mne.io.constants import FIFF
 
 
 from . import _MNE
+from . import EEGevents
 
 logger = logging.getLogger(__name__)
 mne.set_log_level(_MNE.log_level)
@@ -41,7 +43,7 @@ class MNE(object):
         self._ext = ""
 
     @staticmethod
-    def test_raw(file: str, ext: str):
+    def test_raw(file: str, ext: str) -> mne.io.BaseRaw:
         """
         test if file can be loaded by mne, just loads
         and see if its crashes
@@ -54,11 +56,17 @@ class MNE(object):
             extension of file, will determine loader,
             if not set, extension used in _ext used
 
+        Returns
+        -------
+        mne.BaseRaw
+            loaded raw file, same as loaded by load_raw
+            with default channels
         """
-        _MNE.reader[ext](file, preload=False)
+        return _MNE.reader[ext](file, preload=False, eog=[], misc=[])
 
     def load_raw(self, file: str, ext: str,
-                 eog: list = [], misc: list = []) -> mne.io.BaseRaw:
+                 eog: list = [], misc: list = [],
+                 raw: mne.io.BaseRaw = None) -> mne.io.BaseRaw:
         """
         load raw mne file
 
@@ -73,12 +81,18 @@ class MNE(object):
             list of EOG channel names
         misc: list
             list of other channel names
+        raw: mne.BaseRaw
+            file already loaded by test_raw, used instead
+            of loading file if no channels are given
 
         mne.BaseRaw
             loaded raw file
         """
-        self.CACHE = _MNE.reader[ext](file, preload=False,
-                                      eog=eog, misc=misc)
+        if raw is not None and not eog and not misc:
+            self.CACHE = raw
+        else:
+            self.CACHE = _MNE.reader[ext](file, preload=False,
+                                          eog=eog, misc=misc)
         self._ext = ext
 
     def load_events(self,
@@ -101,45 +115,35 @@ class MNE(object):
         DataFrame
             resulting dataframe
         """
-        column_base = {"onset", "duration", "trial_type", "sample", "value"}
-        columns = column_base.update(columns)
         sfreq = self.CACHE.info['sfreq']
-        first_time = self.CACHE.first_time
-        first_samp = self.CACHE.first_samp
-
-        evts = self.CACHE.annotations
-        n_evts = len(evts)
-
-        d_evts = {key: [None] * n_evts for key in column_base}
-
-        for idx, ev in enumerate(evts):
-            d_evts["onset"][idx] = ev["onset"] - first_time
-            d_evts["duration"][idx] = ev["duration"]
-            if ev["description"].endswith("/"):
-                d_evts["trial_type"][idx] = ev["description"][:-1]
-            else:
-                d_evts["trial_type"][idx] = ev["description"]
-            d_evts["sample"][idx] = int(ev["onset"] * sfreq)
-
-        df = DataFrame(d_evts, columns=columns)
-
-        for ch in self.CACHE.info["chs"]:
-            if ch["ch_name"] not in stim_channels and ch["kind"] != "sitm":
-                continue
-            evts = mne.find_events(self.CACHE, stim_channel=ch["ch_name"])
-            n_evts = len(n_evts)
-
-            d_evts = {key: [None] * n_evts for key in column_base}
-            for idx, ev in enumerate(evts):
-                d_evts["onset"] = (ev['onset'] - first_samp) / sfreq
-                d_evts["duration"] = 0
-                d_evts["trial_type"] = ch["ch_name"]
-                d_evts["value"] = ev[2]
-                d_evts["sample"] = ev["onset"] - first_samp
-            df = df.append(DataFrame(d_evts, columns=columns))
-
-        df.set_index('onset', inplace=True)
-        df.sort_index(inplace=True, na_position="first")
+        annots = self.CACHE.annotations
+        annotations = (numpy.asarray(annots.onset),
+                       numpy.asarray(annots.duration),
+                       numpy.asarray(annots.description))
+
+        # all stim channels are read together, by chunks of samples
+        picks = [idx for idx, ch in enumerate(self.CACHE.info["chs"])
+                 if ch["ch_name"] in stim_channels
+                 or ch["kind"] == FIFF.FIFFV_STIM_CH]
+        detectors = [EEGevents.StimChannel(self.CACHE.ch_names[idx])
+                     for idx in picks]
+        if picks:
+            n_times = self.CACHE.n_times
+            step = max(EEGevents.chunk_size // (8 * len(picks)), 1)
+            for start in range(0, n_times, step):
+                data = self.CACHE.get_data(picks=picks, start=start,
+                                           stop=min(start + step, n_times))
+                for detector, values in zip(detectors, data):
+                    detector.feed(values)
+
+        df = EEGevents.eventsTable(sfreq, annotations,
+                                   [(det.name, det.events())
+                                    for det in detectors],
+                                   self.CACHE.first_time,
+                                   self.CACHE.first_samp)
+        for col in columns:
+            if col not in df.columns and col != df.index.name:
+                df[col] = None
         return df
 
     def load_channels(self) -> DataFrame:
@@ -216,7 +220,8 @@ class MNE(object):
         idx = 0
         for ch in self.CACHE.info['chs']:
             d_chs["name"][idx] = ch['ch_name']
-            if mne.utils._check_ch_locs([ch]):
+            loc = ch['loc'][:3]
+            if numpy.isfinite(loc).all() and numpy.any(loc):
                 d_chs["x"][idx] = ch['loc'][0]
                 d_chs["y"][idx] = ch['loc'][1]
                 d_chs["z"][idx] = ch['loc'][2]
@@ -224,6 +229,7 @@ class MNE(object):
                 d_chs["x"][idx] = None
                 d_chs["y"][idx] = None
                 d_chs["z"][idx] = None
+            idx += 1
 
         df = DataFrame(d_chs, columns=columns)
         df.set_index('name', inplace=True)
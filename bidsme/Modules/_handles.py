@@ -0,0 +1,137 @@
+###############################################################################
+# _handles.py keeps the results of files parsing done during validation,
+# to be reused when files are loaded
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# maximum total size (in bytes) of handles kept in cache
+max_size = 16 * 2**20
+
+# (class, path): (handle size, handle)
+_cache = dict()
+_cache_size = 0
+_lock = threading.Lock()
+
+
+def store(cls: type, path: str, handle: object, size: int) -> None:
+    """
+    Stores the result of parsing of file during its validation
+    by given class, to be retrieved by take when file is loaded.
+
+    Only small handles, like file headers, are intended to be
+    stored, as all files of folder are validated before the
+    first one is loaded.
+
+    Files are validated in the same order they are loaded,
+    so when cache is full, the new handles are dropped and
+    the first files of folder keeps their handles.
+
+    Parameters
+    ----------
+    cls: type
+        class that parsed the file
+    path: str
+        path to parsed file
+    handle: object
+        result of parsing
+    size: int
+        approximate size of handle in bytes
+    """
+    global _cache_size
+    key = (cls, os.path.normpath(path))
+    with _lock:
+        old = _cache.pop(key, None)
+        if old is not None:
+            _cache_size -= old[0]
+        if _cache_size + size > max_size:
+            return
+        _cache[key] = (size, handle)
+        _cache_size += size
+
+
+def take(cls: type, path: str) -> object:
+    """
+    Retrieves and removes from cache the handle stored for
+    given file and class.
+
+    The handles of files modified since their validation
+    are discarded by Inventory.refresh when files are loaded
+
+    Parameters
+    ----------
+    cls: type
+        class that parsed the file
+    path: str
+        path to parsed file
+
+    Returns
+    -------
+    object:
+        stored handle, or None if not found
+    """
+    global _cache_size
+    key = (cls, os.path.normpath(path))
+    with _lock:
+        cached = _cache.pop(key, None)
+        if cached is None:
+            return None
+        _cache_size -= cached[0]
+    return cached[1]
+
+
+def release(folder: str) -> None:
+    """
+    Removes from cache the handles of files outside of given folder
+
+    Parameters
+    ----------
+    folder: str
+        path to folder which files handles are kept
+    """
+    global _cache_size
+    folder = os.path.normpath(folder)
+    with _lock:
+        for key in [key for key in _cache
+                    if os.path.dirname(key[1]) != folder]:
+            _cache_size -= _cache.pop(key)[0]
+
+
+def discard(path: str) -> None:
+    """
+    Removes from cache the handles of given file,
+    stored by any class
+
+    Parameters
+    ----------
+    path: str
+        path to file
+    """
+    global _cache_size
+    path = os.path.normpath(path)
+    with _lock:
+        for key in [key for key in _cache if key[1] == path]:
+            _cache_size -= _cache.pop(key)[0]
@@ -0,0 +1,240 @@
+###############################################################################
+# _inventory.py provides the cached inventory of files in recording folders
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import logging
+
+from collections import OrderedDict
+
+from . import _handles
+from . import _sniffer
+
+logger = logging.getLogger(__name__)
+
+# maximum number of folders kept in cache
+max_folders = 64
+
+# folder path: (folder modification time, Inventory)
+_cache = OrderedDict()
+
+
+class Inventory(object):
+    """
+    List of entries of a folder, scanned once by os.scandir,
+    with cached results of files validation by module classes.
+
+    The cached results of a file are kept until refresh finds
+    its size or modification time changed since its validation
+    """
+    __slots__ = ["path", "entries", "_by_name", "_states",
+                 "_readable", "_signatures", "_valid"]
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path: str
+            path to the folder to scan
+        """
+        self.path = path
+        with os.scandir(path) as it:
+            self.entries = sorted(it, key=lambda e: e.name)
+        self._by_name = {entry.name: entry for entry in self.entries}
+        # file name: (size, modification time) at validation
+        self._states = dict()
+        # file name: readability
+        self._readable = dict()
+        # file name: set of formats identified by signature
+        self._signatures = dict()
+        # file name: {class: validity}
+        self._valid = dict()
+
+    def names(self) -> list:
+        """
+        Returns sorted list of names of all entries in folder
+        """
+        return [entry.name for entry in self.entries]
+
+    def isValid(self, cls: type, name: str) -> bool:
+        """
+        Returns True if file with given name is valid for
+        given class, with same checks as cls.isValidFile.
+
+        Sub-folders and hidden files are rejected, the readability
+        is tested once per file and format once per file and class.
+        Before testing format, the files with wrong extention, missing
+        sidecar files or wrong signature are rejected without
+        opening them by class.
+
+        The modification of files is not checked, see refresh.
+
+        Parameters
+        ----------
+        cls: type
+            module class
+        name: str
+            name of file within folder
+
+        Returns
+        -------
+        bool
+        """
+        entry = self._by_name.get(name)
+        path = os.path.join(self.path, name)
+        if entry is None:
+            return cls.isValidFile(path)
+        if name.startswith('.') or not entry.is_file():
+            return False
+
+        readable = self._readable.get(name)
+        if readable is None:
+            readable = os.access(path, os.R_OK)
+            self._readable[name] = readable
+        if not readable:
+            raise PermissionError("File {} not readable"
+                                  .format(path))
+        if not cls._isValidExtention(name):
+            return False
+
+        valid = self._valid.setdefault(name, dict())
+        res = valid.get(cls)
+        if res is not None:
+            return res
+        if name not in self._states:
+            # state of file from scan, retrieved once per entry
+            self._states[name] = self.__state(entry.stat)
+        res = self.__preCheck(cls, name, path)\
+            and cls._isValidFormat(path)
+        valid[cls] = res
+        return res
+
+    def refresh(self, name: str) -> None:
+        """
+        Discards the cached validation results and parsed handles
+        of file with given name if its size or modification time
+        changed since its validation.
+
+        Called once when file is loaded, as it is the only
+        place the freshness of results matters
+
+        Parameters
+        ----------
+        name: str
+            name of file within folder
+        """
+        if name not in self._by_name:
+            return
+        path = os.path.join(self.path, name)
+        state = self.__state(lambda: os.stat(path))
+        if self._states.get(name) != state:
+            self._states[name] = state
+            self._readable.pop(name, None)
+            self._signatures.pop(name, None)
+            self._valid.pop(name, None)
+            _handles.discard(path)
+
+    @staticmethod
+    def __state(stat) -> tuple:
+        """
+        Returns size and modification time of file
+        from given stat function, None if file
+        is not accessible
+        """
+        try:
+            st = stat()
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def __preCheck(self, cls: type, name: str, path: str) -> bool:
+        """
+        Fast checks of sidecar files and signature
+        of given file, done before the test by class
+        """
+        for sidecar in cls._sidecarFiles(path):
+            folder, base = os.path.split(sidecar)
+            if os.path.normpath(folder) != self.path:
+                continue
+            entry = self._by_name.get(base)
+            if entry is None or not entry.is_file():
+                logger.debug("{}: Missing sidecar file {}"
+                             .format(cls.formatIdentity(), sidecar))
+                return False
+
+        if cls._signature is None:
+            return True
+        signatures = self._signatures.get(name)
+        if signatures is None:
+            signatures = _sniffer.sniff(path)
+            self._signatures[name] = signatures
+        return cls._signature in signatures
+
+    def hasValid(self, cls: type) -> bool:
+        """
+        Returns True if folder contains at least one file
+        valid for given class
+        """
+        for entry in self.entries:
+            if self.isValid(cls, entry.name):
+                return True
+        return False
+
+    def validFiles(self, cls: type) -> list:
+        """
+        Returns sorted list of names of files valid for given class
+        """
+        return [entry.name for entry in self.entries
+                if self.isValid(cls, entry.name)]
+
+
+def getInventory(folder: str) -> Inventory:
+    """
+    Returns the inventory of given folder.
+
+    Inventories are cached, and re-scanned if the
+    modification time of folder changes, i.e. if entries
+    are added, removed or renamed. Files modified in place
+    are validated again by inventory when loaded.
+
+    Parameters
+    ----------
+    folder: str
+        path to folder, must exist
+
+    Returns
+    -------
+    Inventory
+    """
+    folder = os.path.normpath(folder)
+    mtime = os.stat(folder).st_mtime_ns
+    cached = _cache.get(folder)
+    if cached is not None and cached[0] == mtime:
+        _cache.move_to_end(folder)
+        return cached[1]
+
+    inventory = Inventory(folder)
+    _cache[folder] = (mtime, inventory)
+    _cache.move_to_end(folder)
+    while len(_cache) > max_folders:
+        _cache.popitem(last=False)
+    return inventory
@@ -0,0 +1,302 @@
+###############################################################################
+# _lazyjson.py provides the partial reading of large json files,
+# decoding the large nested objects only when accessed
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import json
+import logging
+import numpy
+
+logger = logging.getLogger(__name__)
+
+# minimal size (in bytes) of nested object or list decoded only
+# when accessed
+lazy_size = 4096
+
+# lookup tables of structural characters and of
+# their change of nesting depth
+_structural = numpy.zeros(256, dtype=bool)
+_structural[list(b'"[]{},\\')] = True
+_delta = numpy.zeros(256, dtype=numpy.int32)
+_delta[list(b'[{')] = 1
+_delta[list(b']}')] = -1
+_opening = frozenset(b'[{')
+_QUOTE = ord('"')
+_BACKSLASH = ord('\\')
+_COMMA = ord(',')
+
+
+class _Raw(object):
+    """
+    Encoded json value, decoded when accessed.
+    Objects are decoded into LazyDict, so their large
+    values are also decoded only when accessed
+    """
+    __slots__ = ["struct", "idx", "start", "stop"]
+
+    def __init__(self, struct: "_Structure", idx: int,
+                 start: int, stop: int):
+        self.struct = struct
+        self.idx = idx
+        self.start = start
+        self.stop = stop
+
+    def __repr__(self) -> str:
+        return "<undecoded json, {} bytes>".format(self.stop - self.start)
+
+    def decode(self) -> object:
+        if self.struct.chars[self.idx] == ord("{"):
+            return _decodeObject(self.struct, self.idx)
+        return json.loads(self.struct.data[self.start:self.stop])
+
+
+class LazyDict(dict):
+    """
+    Dictionary decoded from json object, which large values
+    are decoded at their first access
+    """
+    __slots__ = []
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _Raw):
+            value = value.decode()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        return dict(self.items()) == other
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def isDecoded(self, key) -> bool:
+        """
+        Returns False if value of key is not yet decoded
+        """
+        return not isinstance(dict.get(self, key), _Raw)
+
+
+class _Structure(object):
+    """
+    Positions and nesting depth of structural characters
+    ('[]{},') of json text, outside of strings
+    """
+    __slots__ = ["data", "pos", "chars", "depth", "quotes"]
+
+    def __init__(self, data: bytes):
+        self.data = data
+        arr = numpy.frombuffer(data, dtype=numpy.uint8)
+        pos = numpy.flatnonzero(_structural[arr])
+        chars = arr[pos]
+        quotes = chars == _QUOTE
+        backslash = chars == _BACKSLASH
+        if backslash.any():
+            # quotes preceded by odd number of backslashes are escaped
+            follows = numpy.zeros(len(pos), dtype=bool)
+            follows[1:] = (pos[1:] == pos[:-1] + 1) & backslash[:-1]
+            starts = numpy.flatnonzero(backslash & ~follows)
+            run = numpy.arange(len(pos))\
+                - starts[numpy.maximum(numpy.cumsum(backslash & ~follows)
+                                       - 1, 0)]
+            escaped = numpy.zeros(len(pos), dtype=bool)
+            escaped[1:] = follows[1:] & (run[:-1] % 2 == 0)
+            quotes &= ~escaped
+        outside = (numpy.cumsum(quotes) % 2 == 0)\
+            & ~quotes & ~backslash & ~(chars == _QUOTE)
+        # positions of quotes delimiting strings
+        self.quotes = pos[quotes]
+        self.pos = pos[outside]
+        self.chars = chars[outside]
+        # depth after each character
+        self.depth = numpy.cumsum(_delta[self.chars])
+
+    def index(self, offset: int) -> int:
+        """
+        Returns index of first structural character
+        at or after given offset
+        """
+        return int(numpy.searchsorted(self.pos, offset))
+
+    def depthAt(self, offset: int) -> int:
+        """
+        Returns nesting depth at given offset
+        """
+        idx = self.index(offset)
+        if idx == 0:
+            return 0
+        return int(self.depth[idx - 1])
+
+    def stringEnd(self, offset: int) -> int:
+        """
+        Returns the offset after the end of string
+        starting at given offset
+        """
+        idx = int(numpy.searchsorted(self.quotes, offset))
+        if idx + 1 >= len(self.quotes) or self.quotes[idx] != offset:
+            raise ValueError("invalid string")
+        return int(self.quotes[idx + 1]) + 1
+
+    def isKey(self, offset: int) -> bool:
+        """
+        Returns True if a string starting at given offset
+        is a key of an object, i.e. is followed by colon
+        """
+        idx = int(numpy.searchsorted(self.quotes, offset))
+        if idx % 2 or idx + 1 >= len(self.quotes)\
+                or self.quotes[idx] != offset:
+            return False
+        end = int(self.quotes[idx + 1]) + 1
+        while self.data[end:end + 1] in (b" ", b"\t", b"\n", b"\r"):
+            end += 1
+        return self.data[end:end + 1] == b":"
+
+    def closing(self, idx: int) -> int:
+        """
+        Returns index of character closing the list or
+        object opened by character at given index
+        """
+        level = self.depth[idx] - 1
+        after = numpy.flatnonzero(self.depth[idx:] == level)
+        if len(after) == 0:
+            raise ValueError("unclosed container")
+        return idx + int(after[0])
+
+    def members(self, idx: int) -> list:
+        """
+        Returns list of (start, end) offsets of the members of
+        list or object opened by character at given index
+        """
+        end = self.closing(idx)
+        level = self.depth[idx]
+        inner = slice(idx + 1, end)
+        commas = self.pos[inner][(self.chars[inner] == _COMMA)
+                                 & (self.depth[inner] == level)]
+        bounds = [int(self.pos[idx]) + 1]\
+            + [int(c) for c in commas] + [int(self.pos[end])]
+        res = list()
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start != bounds[0]:
+                start += 1
+            if not self.data[start:stop].strip():
+                if len(bounds) > 2:
+                    raise ValueError("empty member")
+                continue
+            res.append((start, stop))
+        return res
+
+
+def _decodeObject(struct: _Structure, idx: int) -> LazyDict:
+    """
+    Decodes the object opened by structural character
+    at given index, leaving its large values undecoded
+    """
+    data = struct.data
+    res = LazyDict()
+    small = list()
+    for start, stop in struct.members(idx):
+        # offset of key, skipping whitespaces
+        start += len(data[start:stop]) - len(data[start:stop].lstrip())
+        end = struct.stringEnd(start)
+        key = json.loads(data[start:end])
+        colon = data.index(b":", end, stop)
+        v_start = colon + 1
+        v_start += len(data[v_start:stop]) - len(data[v_start:stop].lstrip())
+        v_idx = struct.index(v_start)
+        if stop - v_start >= lazy_size and v_idx < len(struct.pos)\
+                and struct.pos[v_idx] == v_start\
+                and struct.chars[v_idx] in _opening:
+            dict.__setitem__(res, key, _Raw(struct, v_idx, v_start, stop))
+        else:
+            dict.__setitem__(res, key, None)
+            small.append(data[start:stop])
+    if small:
+        for key, value in json.loads(b"{" + b",".join(small) + b"}")\
+                .items():
+            dict.__setitem__(res, key, value)
+    return res
+
+
+def loadListItem(path: str, key: str, index: int) -> dict:
+    """
+    Returns the object data[key][index] of json file at given path,
+    with its large nested objects and lists decoded only when
+    accessed. The rest of file is not decoded.
+
+    If file structure differs from expected one, the file
+    is decoded entirely, raising same exceptions as json.load
+
+    Parameters
+    ----------
+    path: str
+        path to json file
+    key: str
+        key of list in top-level object
+    index: int
+        index of object in list
+
+    Returns
+    -------
+    dict
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    try:
+        struct = _Structure(data)
+        quoted = json.dumps(key).encode("utf-8")
+        offset = data.find(quoted)
+        while offset >= 0 and (struct.depthAt(offset) != 1
+                               or not struct.isKey(offset)):
+            offset = data.find(quoted, offset + 1)
+        if offset < 0:
+            raise ValueError("key not found")
+        idx = struct.index(offset + len(quoted))
+        if struct.chars[idx] != ord("[")\
+                or data[offset + len(quoted):struct.pos[idx]]\
+                .strip() != b":":
+            raise ValueError("not a list")
+        item = struct.members(idx)[index]
+        idx = struct.index(item[0])
+        if struct.chars[idx] != ord("{")\
+                or data[item[0]:struct.pos[idx]].strip():
+            raise ValueError("not an object")
+        return _decodeObject(struct, idx)
+    except (ValueError, IndexError, UnicodeDecodeError) as e:
+        logger.debug("{}: partial decoding failed: {}".format(path, e))
+    return json.loads(data)[key][index]
@@ -21,218 +21,208 @@
 # along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
 ##############################################################################
 
+
+import gzip
 import logging
-import struct
+import numpy
 
 
 logger = logging.getLogger(__name__)
 
-
-def isValidNIFTI(file: str) -> bool:
-    """
-    Returns True if given file is valid, i.e.
-    first 4 bites are 348 or 540 and magic string
-    is one of "ni1", "n+1" or "n+2"
-
-    Parameters
-    ----------
-    file: str
-        path to file (must exist)
-    """
-    with open(file, 'rb') as niifile:
-        d = niifile.read(4)
-        if len(d) != 4:
-            logger.debug('File too short')
-            return False
-
-        hdr = struct.unpack("<i", d)[0]
-        # Nifti 1
-        if hdr in (348, 1543569408):
-            niifile.seek(344, 0)
-            magic = niifile.read(4)
-        # Nifti 2
-        elif hdr in (540, 469893120):
-            niifile.seek(4, 0)
-            magic = niifile.read(4)
-        else:
-            logger.debug("Invalid header size")
-            return False
-        if magic in (b'ni1\x00', b'n+1\x00', b'n+2\x00'):
-            return True
-        else:
-            logger.debug("Invalid magic string")
-            return False
-
-
-def getEndType(path: str) -> tuple:
+# gzip magic number
+gzip_magic = b"\x1f\x8b"
+
+# NIFTI-1 header, in little endian
+header_1 = numpy.dtype([
+    ("sizeof_hdr", "<i4"), ("data_type", "S10"), ("db_name", "S18"),
+    ("extents", "<i4"), ("session_error", "<i2"), ("regular", "S1"),
+    ("diminfo", "u1"), ("dim", "<i2", 8),
+    ("intent_p1", "<f4"), ("intent_p2", "<f4"), ("intent_p3", "<f4"),
+    ("intent_code", "<i2"), ("datatype", "<i2"), ("bitpix", "<i2"),
+    ("slice_start", "<i2"), ("pixdim", "<f4", 8),
+    ("vox_offset", "<f4"), ("scl_slope", "<f4"), ("scl_inter", "<f4"),
+    ("slice_end", "<i2"), ("slice_code", "i1"), ("xyz_units", "i1"),
+    ("cal_max", "<f4"), ("cal_min", "<f4"),
+    ("slice_duration", "<f4"), ("toffset", "<f4"),
+    ("glmax", "<i4"), ("glmin", "<i4"),
+    ("descrip", "S80"), ("aux_file", "S24"),
+    ("qform_code", "<i2"), ("sform_code", "<i2"),
+    ("quatern_b", "<f4"), ("quatern_c", "<f4"), ("quatern_d", "<f4"),
+    ("qoffset_x", "<f4"), ("qoffset_y", "<f4"), ("qoffset_z", "<f4"),
+    ("srow_x", "<f4", 4), ("srow_y", "<f4", 4), ("srow_z", "<f4", 4),
+    ("intent_name", "S16"), ("magic", "S4")
+    ])
+
+# NIFTI-2 header, in little endian
+header_2 = numpy.dtype([
+    ("sizeof_hdr", "<i4"), ("magic", "S8"),
+    ("datatype", "<i2"), ("bitpix", "<i2"), ("dim", "<i8", 8),
+    ("intent_p1", "<f8"), ("intent_p2", "<f8"), ("intent_p3", "<f8"),
+    ("pixdim", "<f8", 8), ("vox_offset", "<i8"),
+    ("scl_slope", "<f8"), ("scl_inter", "<f8"),
+    ("cal_max", "<f8"), ("cal_min", "<f8"),
+    ("slice_duration", "<f8"), ("toffset", "<f8"),
+    ("slice_start", "<i8"), ("slice_end", "<i8"),
+    ("descrip", "S80"), ("aux_file", "S24"),
+    ("qform_code", "<i4"), ("sform_code", "<i4"),
+    ("quatern_b", "<f8"), ("quatern_c", "<f8"), ("quatern_d", "<f8"),
+    ("qoffset_x", "<f8"), ("qoffset_y", "<f8"), ("qoffset_z", "<f8"),
+    ("srow_x", "<f8", 4), ("srow_y", "<f8", 4), ("srow_z", "<f8", 4),
+    ("slice_code", "<i4"), ("xyz_units", "<i4"), ("intent_code", "<i4"),
+    ("intent_name", "S16"), ("dim_info", "u1"), ("unused_str", "S15")
+    ])
+
+# fields of header not reported in parsed dictionary
+_hidden = {
+    header_1: {"sizeof_hdr", "data_type", "db_name", "extents",
+               "session_error", "regular", "magic"},
+    header_2: {"sizeof_hdr", "magic", "dim_info", "unused_str"}
+    }
+
+
+def readHead(path: str) -> bytes:
     """
-    Returns endiannes symbol '>' or '<' and type
-    'ni1', 'n+1', 'n+2' of nifti file
+    Returns the first bytes of file, long enough to contain
+    NIFTI-1 or NIFTI-2 header. Gzipped files are decompressed
+    up to the end of header.
 
     Parameters
     ----------
     path: str
-        path to nifti header file
+        path to file (must exist)
 
     Returns
     -------
-    (str, str):
-        tuple of endianess symbol and nifti type
+    bytes
     """
     with open(path, "rb") as niifile:
-        header_size = struct.unpack("<i", niifile.read(4))[0]
-        if header_size in (348, 540):
-            endian = "<"
-        else:
-            endian = ">"
-
-        if header_size in (348, 1543569408):
-            if path.endswith(".hdr"):
-                ftype = "ni1"
-            else:
-                ftype = "n+1"
-            niifile.seek(40, 0)
-            dim_0 = struct.unpack(endian + "h", niifile.read(2))[0]
-            niifile.seek(344, 0)
-            magic = niifile.read(4).decode().strip("\x00")
-        else:
-            ftype = "n+2"
-            if path.endswith(".hdr"):
-                logger.error("NIFTI: {} .hdr/.img cannot be NIFTI-2"
-                             .format(path))
-                raise Exception("Corrupted file {}".format(path))
-            niifile.seek(16, 0)
-            dim_0 = struct.unpack(endian + "q", niifile.read(8))[0]
-            niifile.seek(4, 0)
-            magic = niifile.read(8).decode().strip("\x00")
-
-        # confirming endianness and magic string
-        if dim_0 < 1 or dim_0 > 7:
-            logger.critical("NIFTI:{} corrupted file -- "
-                            "conflicting endiannes"
-                            .format(path))
-            raise Exception("Corrupted file {}".format(path))
-        if magic != ftype:
-            logger.critical("NIFTI:{} corrupted file -- "
-                            "conflicting format version"
-                            .format(path))
-            raise Exception("Corrupted file {}".format(path))
-
-        return endian, ftype
+        head = niifile.read(header_2.itemsize)
+        if head[:2] != gzip_magic:
+            return head
+        niifile.seek(0)
+        with gzip.GzipFile(fileobj=niifile, mode="rb") as gzfile:
+            return gzfile.read(header_2.itemsize)
 
 
-def parceNIFTIheader_1(path: str, endian: str) -> dict:
+def _headerType(head: bytes) -> tuple:
+    """
+    Returns the endianness symbol and header dtype of
+    given NIFTI header, or (None, None) if header size
+    is not recognized
     """
-    Parces NIFTI1 header and returns resulting dictionary
+    if len(head) < 4:
+        return None, None
+    hdr = int(numpy.frombuffer(head, "<i4", 1)[0])
+    if hdr == 348:
+        return "<", header_1
+    if hdr == 1543569408:
+        return ">", header_1
+    if hdr == 540:
+        return "<", header_2
+    if hdr == 469893120:
+        return ">", header_2
+    return None, None
+
+
+def isValidNIFTI(head: bytes) -> bool:
+    """
+    Returns True if given header is valid, i.e.
+    first 4 bites are 348 or 540 and magic string
+    is one of "ni1", "n+1" or "n+2"
 
     Parameters
     ----------
-    path: str
-        path to nifti1 file
-    endian: str
-        endiannes symbol as defined by struct package
-
-    Returns
-    -------
-    dict:
-        parced header
+    head: bytes
+        first bytes of file, as returned by readHead
     """
-    res = dict()
-    with open(path, "rb") as niifile:
-        header = niifile.read(348)
-
-    res["diminfo"] = struct.unpack("c", header[39:40])[0]
-    res["dim"] = struct.unpack(endian + "8h", header[40:56])
-    res["intent_p1"] = struct.unpack(endian + "f", header[56:60])[0]
-    res["intent_p2"] = struct.unpack(endian + "f", header[60:64])[0]
-    res["intent_p3"] = struct.unpack(endian + "f", header[64:68])[0]
-    res["intent_code"] = struct.unpack(endian + "h", header[68:70])[0]
-    res["datatype"] = struct.unpack(endian + "h", header[70:72])[0]
-    res["bitpix"] = struct.unpack(endian + "h", header[72:74])[0]
-    res["slice_start"] = struct.unpack(endian + "h", header[74:76])[0]
-    res["pixdim"] = struct.unpack(endian + "8f", header[76:108])
-    res["vox_offset"] = struct.unpack(endian + "f", header[108:112])[0]
-    res["scl_slope"] = struct.unpack(endian + "f", header[112:116])[0]
-    res["scl_inter"] = struct.unpack(endian + "f", header[116:120])[0]
-    res["slice_end"] = struct.unpack(endian + "h", header[120:122])[0]
-    res["slice_code"] = struct.unpack(endian + "b", header[122:123])[0]
-    res["xyz_units"] = struct.unpack(endian + "b", header[123:124])[0]
-    res["cal_max"] = struct.unpack(endian + "f", header[124:128])[0]
-    res["cal_min"] = struct.unpack(endian + "f", header[128:132])[0]
-    res["slice_duration"] = struct.unpack(endian + "f", header[132:136])[0]
-    res["toffset"] = struct.unpack(endian + "f", header[136:140])[0]
-    res["glmax"] = struct.unpack(endian + "i", header[140:144])[0]
-    res["glmin"] = struct.unpack(endian + "i", header[144:148])[0]
-    res["descrip"] = header[148:228].decode().strip("\0 ")
-    res["aux_file"] = header[228:252].decode().strip("\0 ")
-    res["qform_code"] = struct.unpack(endian + "h", header[252:254])[0]
-    res["sform_code"] = struct.unpack(endian + "h", header[254:256])[0]
-    res["quatern_b"] = struct.unpack(endian + "f", header[256:260])[0]
-    res["quatern_c"] = struct.unpack(endian + "f", header[260:264])[0]
-    res["quatern_d"] = struct.unpack(endian + "f", header[264:268])[0]
-    res["qoffset_x"] = struct.unpack(endian + "f", header[268:272])[0]
-    res["qoffset_y"] = struct.unpack(endian + "f", header[272:276])[0]
-    res["qoffset_z"] = struct.unpack(endian + "f", header[276:280])[0]
-    res["srow_x"] = struct.unpack(endian + "4f", header[280:296])
-    res["srow_y"] = struct.unpack(endian + "4f", header[296:312])
-    res["srow_z"] = struct.unpack(endian + "4f", header[312:328])
-    res["intent_name"] = header[328:344].decode().strip("\0 ")
-
-    return res
-
-
-def parceNIFTIheader_2(path: str, endian: str) -> dict:
+    if len(head) < 4:
+        logger.debug('File too short')
+        return False
+
+    endian, dtype = _headerType(head)
+    if dtype is None:
+        logger.debug("Invalid header size")
+        return False
+    if dtype is header_1:
+        magic = head[344:348]
+    else:
+        magic = head[4:8]
+    if magic in (b'ni1\x00', b'n+1\x00', b'n+2\x00'):
+        return True
+    else:
+        logger.debug("Invalid magic string")
+        return False
+
+
+def parseNIFTI(path: str, head: bytes) -> tuple:
     """
-    Parces NIFTI2 header and returns resulting dictionary
+    Parses NIFTI-1 or NIFTI-2 header, confirming its endianness
+    and type. Header is decoded in one pass, as structured array.
 
     Parameters
     ----------
     path: str
-        path to nifti2 file
-    endian: str
-        endiannes symbol as defined by struct package
+        path to nifti file, used to identify .hdr/.img pairs
+    head: bytes
+        first bytes of file, as returned by readHead
 
     Returns
     -------
-    dict:
-        parced header
+    (str, str, dict):
+        endianess symbol ('<' or '>'), nifti type ('ni1', 'n+1'
+        or 'n+2') and parsed header
+
+    Raises
+    ------
+    Exception:
+        if header is corrupted
     """
+    endian, dtype = _headerType(head)
+    if dtype is None or len(head) < dtype.itemsize:
+        logger.critical("NIFTI:{} corrupted file -- "
+                        "invalid header size"
+                        .format(path))
+        raise Exception("Corrupted file {}".format(path))
+
+    if dtype is header_1:
+        if path.endswith(".hdr"):
+            ftype = "ni1"
+        else:
+            ftype = "n+1"
+    else:
+        ftype = "n+2"
+        if path.endswith(".hdr"):
+            logger.error("NIFTI: {} .hdr/.img cannot be NIFTI-2"
+                         .format(path))
+            raise Exception("Corrupted file {}".format(path))
+
+    header = numpy.frombuffer(head, dtype.newbyteorder(endian), 1)[0]
+    dim_0 = int(header["dim"][0])
+    magic = header["magic"].split(b"\x00")[0].decode()
+
+    # confirming endianness and magic string
+    if dim_0 < 1 or dim_0 > 7:
+        logger.critical("NIFTI:{} corrupted file -- "
+                        "conflicting endiannes"
+                        .format(path))
+        raise Exception("Corrupted file {}".format(path))
+    if magic != ftype:
+        logger.critical("NIFTI:{} corrupted file -- "
+                        "conflicting format version"
+                        .format(path))
+        raise Exception("Corrupted file {}".format(path))
+
     res = dict()
-    with open(path, "rb") as niifile:
-        header = niifile.read(540)
-
-    res["datatype"] = struct.unpack(endian + "h", header[12:14])[0]
-    res["bitpix"] = struct.unpack(endian + "h", header[14:16])[0]
-    res["dim"] = struct.unpack(endian + "8q", header[16:80])
-    res["intent_p1"] = struct.unpack(endian + "d", header[80:88])[0]
-    res["intent_p2"] = struct.unpack(endian + "d", header[88:96])[0]
-    res["intent_p3"] = struct.unpack(endian + "d", header[96:104])[0]
-    res["pixdim"] = struct.unpack(endian + "8d", header[104:168])
-    res["vox_offset"] = struct.unpack(endian + "q", header[168:176])[0]
-    res["scl_slope"] = struct.unpack(endian + "d", header[176:184])[0]
-    res["scl_inter"] = struct.unpack(endian + "d", header[184:192])[0]
-    res["cal_max"] = struct.unpack(endian + "d", header[192:200])[0]
-    res["cal_min"] = struct.unpack(endian + "d", header[200:208])[0]
-    res["slice_duration"] = struct.unpack(endian + "d", header[208:216])[0]
-    res["toffset"] = struct.unpack(endian + "d", header[216:224])[0]
-    res["slice_start"] = struct.unpack(endian + "q", header[224:232])[0]
-    res["slice_end"] = struct.unpack(endian + "q", header[232:240])[0]
-    res["descrip"] = header[240:320].decode().strip("\0 ")
-    res["aux_file"] = header[320:344].decode().strip("\0 ")
-    res["qform_code"] = struct.unpack(endian + "i", header[344:348])[0]
-    res["sform_code"] = struct.unpack(endian + "i", header[348:352])[0]
-    res["quatern_b"] = struct.unpack(endian + "d", header[352:360])[0]
-    res["quatern_c"] = struct.unpack(endian + "d", header[360:368])[0]
-    res["quatern_d"] = struct.unpack(endian + "d", header[368:376])[0]
-    res["qoffset_x"] = struct.unpack(endian + "d", header[376:384])[0]
-    res["qoffset_y"] = struct.unpack(endian + "d", header[384:392])[0]
-    res["qoffset_z"] = struct.unpack(endian + "d", header[392:400])[0]
-    res["srow_x"] = struct.unpack(endian + "4d", header[400:432])
-    res["srow_y"] = struct.unpack(endian + "4d", header[432:464])
-    res["srow_z"] = struct.unpack(endian + "4d", header[464:496])
-    res["slice_code"] = struct.unpack(endian + "i", header[496:500])[0]
-    res["xyz_units"] = struct.unpack(endian + "i", header[500:504])[0]
-    res["intent_code"] = struct.unpack(endian + "i", header[504:508])[0]
-    res["intent_name"] = header[508:524].decode().strip("\0 ")
-
-    return res
+    for name in dtype.names:
+        if name in _hidden[dtype]:
+            continue
+        value = header[name]
+        if name == "diminfo":
+            res[name] = bytes([int(value)])
+        elif dtype[name].kind == "S":
+            res[name] = value.decode().strip("\0 ")
+        elif dtype[name].shape:
+            res[name] = tuple(value.tolist())
+        else:
+            res[name] = value.item()
+    return endian, ftype, res
@@ -0,0 +1,141 @@
+###############################################################################
+# _sniffer.py provides the identification of file formats by their
+# magic signatures
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import logging
+import struct
+
+logger = logging.getLogger(__name__)
+
+# number of bytes read from the begining of file
+head_size = 1024
+
+DICOM = "DICOM"
+NIFTI = "NIFTI"
+ECAT = "ECAT"
+EDF = "EDF"
+BrainVision = "BrainVision"
+
+
+def sniff(path: str) -> frozenset:
+    """
+    Returns the set of formats that given file may have,
+    based on the first bytes of file.
+
+    The tests are loose enough to never reject a file accepted
+    by corresponding format class, the final decision is up to
+    the class.
+
+    Parameters
+    ----------
+    path: str
+        path to the file to test
+
+    Returns
+    -------
+    frozenset:
+        set of possible formats
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(head_size)
+    except OSError as e:
+        logger.debug("{}: Unable to read file: {}".format(path, e))
+        return frozenset()
+
+    res = set()
+    if isDICOM(head):
+        res.add(DICOM)
+    if isNIFTI(head):
+        res.add(NIFTI)
+    if isECAT(head):
+        res.add(ECAT)
+    if isEDF(head):
+        res.add(EDF)
+    if isBrainVision(head):
+        res.add(BrainVision)
+    return frozenset(res)
+
+
+def isDICOM(head: bytes) -> bool:
+    """
+    DICOM files have 'DICM' string at 0x80
+    """
+    return head[0x80:0x84] == b"DICM"
+
+
+def isNIFTI(head: bytes) -> bool:
+    """
+    NIFTI files starts with header size (348 for NIFTI-1,
+    540 for NIFTI-2) followed by the magic string.
+
+    Gzipped files are accepted, their header being
+    checked by format class
+    """
+    if head[:2] == b"\x1f\x8b":
+        return True
+    if len(head) < 4:
+        return False
+    hdr = struct.unpack("<i", head[0:4])[0]
+    if hdr in (348, 1543569408):
+        magic = head[344:348]
+    elif hdr in (540, 469893120):
+        magic = head[4:8]
+    else:
+        return False
+    return magic in (b'ni1\x00', b'n+1\x00', b'n+2\x00')
+
+
+def isECAT(head: bytes) -> bool:
+    """
+    ECAT files starts with 'MATRIX' magic string
+    """
+    return head[:14].strip(b" \0").startswith(b"MATRIX")
+
+
+def isEDF(head: bytes) -> bool:
+    """
+    EDF header contains numerical fields at fixed positions.
+
+    The version field is not checked by the MNE reader, so the
+    header size and number of signals fields are checked instead
+    """
+    if len(head) < 256:
+        return False
+    try:
+        int(head[184:192].decode("latin-1").split("\0")[0])
+        int(head[252:256].decode("latin-1").split("\0")[0])
+    except ValueError:
+        return False
+    return True
+
+
+def isBrainVision(head: bytes) -> bool:
+    """
+    BrainVision header is a text file, normally starting with
+    'Brain Vision Data Exchange Header File' line.
+
+    The MNE reader only warns on missing or unknown header
+    line, so only text content is checked
+    """
+    return b"\0" not in head
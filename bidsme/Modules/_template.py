@@ -0,0 +1,140 @@
+###############################################################################
+# _template.py provides the parsing of dynamic field templates
+# into reusable lists of segments
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import re
+import logging
+
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# maximum number of parsed templates kept in cache
+max_templates = 4096
+
+# kinds of segments
+TEXT = 0            # (TEXT, text)
+ATTRIBUTE = 1       # (ATTRIBUTE, attribute name)
+CHARACTERISTIC = 2  # (CHARACTERISTIC, characteristic name)
+LABEL = 3           # (LABEL, prefix, name)
+FNAME = 4           # (FNAME, name, compiled regex)
+ERROR = 5           # (ERROR, exception raised at evaluation)
+
+# prefixes of labels
+label_prefixes = frozenset(("bids", "custom", "sub_tsv", "rec_tsv"))
+
+
+class Template(object):
+    """
+    Dynamic field template, as interpreted by
+    baseModule.getDynamicField, parsed into segments:
+        - text outside of '<...>'
+        - '<field>': attributes retrieved by getAttribute
+        - '<<name>>': characteristics
+        - '<<prefix:name>>': labels, table values and
+          values extracted from file name
+
+    Malformed parts are parsed into ERROR segment, raising
+    the exception when evaluated, after the preceding segments.
+    """
+    __slots__ = ["template", "segments", "single"]
+
+    def __init__(self, template: str):
+        """
+        Parameters
+        ----------
+        template: str
+            template to parse
+        """
+        self.template = template
+        self.segments = list()
+        # True if template is composed by only one placeholder
+        self.single = False
+
+        start = 0
+        while start < len(template):
+            pos = template.find('<', start)
+            if pos < 0:
+                self.segments.append((TEXT, template[start:]))
+                break
+            if pos > start:
+                self.segments.append((TEXT, template[start:pos]))
+
+            if template[pos + 1:pos + 2] == "<":
+                pos += 2
+                seek = ">>"
+            else:
+                pos += 1
+                seek = ">"
+            pos2 = template.find(seek, pos)
+            if pos2 < 0:
+                self.segments.append((ERROR, IndexError(
+                    "closing {} from {} not found in {}"
+                    .format(seek, pos, template))))
+                break
+            query = template[pos:pos2]
+            if seek == ">":
+                self.segments.append((ATTRIBUTE, query))
+            else:
+                self.segments.append(self.__parseLabel(query))
+            if pos2 - pos + 2 * len(seek) == len(template):
+                self.single = True
+            start = pos2 + len(seek)
+
+    @staticmethod
+    def __parseLabel(query: str) -> tuple:
+        """
+        Parses the content of '<<...>>' into segment
+        """
+        prefix = ""
+        if ":" in query:
+            prefix, query = query.split(":", 1)
+        if prefix == "":
+            return (CHARACTERISTIC, query)
+        if prefix in label_prefixes:
+            return (LABEL, prefix, query)
+        if prefix == "fname":
+            try:
+                regex = re.compile("{}-([a-zA-Z0-9]+)".format(query))
+            except re.error as e:
+                return (ERROR, e)
+            return (FNAME, query, regex)
+        return (ERROR, KeyError("Unknown prefix {}".format(prefix)))
+
+
+@lru_cache(maxsize=max_templates)
+def getTemplate(template: str) -> Template:
+    """
+    Returns the parsed template, templates are parsed
+    once and cached by their string
+
+    Parameters
+    ----------
+    template: str
+        template to parse
+
+    Returns
+    -------
+    Template
+    """
+    return Template(template)
@@ -33,17 +33,23 @@ import gzip
 
 from datetime import datetime, date, time
 from collections import OrderedDict
+from functools import lru_cache
 
 from .abstract import abstract
 from bidsme.tools import tools
+from bidsme.tools import prefetch
 from bidsme.bidsMeta import MetaField
 from bidsme.bidsMeta import BIDSfieldLibrary
 from bidsme.bidsMeta import BidsSession
 
 from bidsme.bidsmap import Run
+from bidsme.bidsmap import Dependencies
 
 
 from ._constants import ignoremodality, unknownmodality
+from . import _inventory
+from . import _handles
+from . import _template
 from .common import action_value
 
 logger = logging.getLogger(__name__)
@@ -80,7 +86,23 @@ class baseModule(abstract):
                  "manufacturer",
                  "encoding",
                  # dictionary of switches regulating file processing
-                 "switches"
+                 "switches",
+                 # read-ahead of file headers
+                 "_prefetcher",
+                 # inventory of files in recording folder
+                 "_inventory",
+                 # values retrieved from current file by _getField
+                 "_values_cache",
+                 # values of series-invariant fields for current recording
+                 "_series_cache",
+                 # ordered metafields of each modality, as built by
+                 # __getMetaPlan
+                 "_meta_plan",
+                 # auxiliary metafields reused from file to file
+                 "_aux_fields",
+                 # values of series-invariant templates for current
+                 # recording, None if disabled
+                 "_template_cache"
                  ]
 
     _module = "base"
@@ -88,6 +110,41 @@ class baseModule(abstract):
 
     # list of valid file extentions
     _file_extentions = list()
+    # format signature of valid files, as identified by _sniffer,
+    # None if format is not identified by signature
+    _signature = None
+
+    # number of file headers read ahead, 0 to disable read-ahead
+    _prefetch_depth = 0
+    # maximum total size (in bytes) of read-ahead files
+    _prefetch_size = 256 * 2**20
+
+    # metafields definitions tables used by format
+    _metafields = ()
+    # fields with same value for all files of a serie
+    _series_fields = frozenset()
+    # fields added to and removed from _series_fields by bidsmap
+    _series_override = (frozenset(), frozenset())
+    # if True, values of series-invariant fields are retrieved
+    # once per recording, as set by setSeriesFields
+    _cache_series = False
+    # number of files between checks of cached series-invariant
+    # values, 0 to disable checks
+    _series_check = 0
+
+    # fields retrieved from files, as declared by setRequiredFields,
+    # None if any field may be retrieved
+    _required_fields = None
+
+    # characteristics ('<<name>>') with same value for all files
+    # loaded from same folder
+    _folder_characteristics = frozenset(("subject", "session",
+                                         "nfiles", "module", "None"))
+
+    # metafields definitions resolved by setupMetaFields,
+    # (class, manufacturer, definitions id): list of
+    # (table, modality, key, definition)
+    _meta_definitions = dict()
 
     bidsmodalities = dict()
 
@@ -130,6 +187,9 @@ class baseModule(abstract):
         self._recPath = ""
         self.index = -1
         self.attributes = dict()
+        self._values_cache = dict()
+        self._series_cache = dict()
+        self._template_cache = dict()
         self.custom = dict()
         self.labels = OrderedDict()
         self.suffix = ""
@@ -140,6 +200,8 @@ class baseModule(abstract):
         self.metaFields_rec = dict()
         self.metaFields_opt = dict()
         self.metaAuxiliary = dict()
+        self._meta_plan = dict()
+        self._aux_fields = dict()
         self.rec_BIDSvalues = self.rec_BIDSfields.GetTemplate()
         self.sub_BIDSvalues = self.sub_BIDSfields.GetTemplate()
 
@@ -149,6 +211,8 @@ class baseModule(abstract):
 
         self.switches = {"exportHeader": False,
                          "zipFile": False}
+        self._prefetcher = None
+        self._inventory = None
 
     #############################
     # Optional virtual methodes #
@@ -159,7 +223,147 @@ class baseModule(abstract):
         """
         pass
 
-    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> None:
+    @classmethod
+    def _readHeader(cls, path: str) -> object:
+        """
+        Virtual function that parses and returns the header of
+        file at given path. Used by _getHeader, and if defined,
+        allows read-ahead of headers.
+
+        As it may be executed in a background thread,
+        it must not modify the state of class or module.
+
+        Parameters
+        ----------
+        path: str
+            path to the file
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def setRequiredFields(cls, fields: set) -> None:
+        """
+        Declares the fields that will be retrieved from files
+        of this format, allowing formats supporting it to parse
+        only these fields from headers. Other fields must be
+        still retrievable, at the cost of parsing full header.
+
+        Parameters
+        ----------
+        fields: set
+            names of fields, as passed to getField, or None
+            to declare that any field may be retrieved
+        """
+        cls._required_fields = None if fields is None else frozenset(fields)
+
+    @classmethod
+    def getDependencies(cls) -> Dependencies:
+        """
+        Returns the values referenced by the metafields definitions
+        of format, for all manufacturers
+
+        Returns
+        -------
+        Dependencies
+        """
+        res = Dependencies()
+        for definitions in cls._metafields:
+            for meta in definitions.values():
+                for val in meta.values():
+                    if isinstance(val, list):
+                        res.addTemplate([f[0] for f in val])
+                    else:
+                        res.addTemplate(val[0])
+        return res
+
+    @classmethod
+    def fieldScope(cls, field: str) -> str:
+        """
+        Returns 'series' if given field has the same value for
+        all files of a serie, 'file' otherwise
+
+        Parameters
+        ----------
+        field: str
+            field, as passed to getField
+
+        Returns
+        -------
+        str
+        """
+        name = field.split(":")[-1].split("/")[0].strip()
+        include, exclude = cls._series_override
+        if name in include or\
+                (name in cls._series_fields and name not in exclude):
+            return Dependencies.SERIES
+        return Dependencies.FILE
+
+    @classmethod
+    def setSeriesFields(cls, include: set = (), exclude: set = (),
+                        check: int = 0) -> None:
+        """
+        Enables the caching of values of series-invariant fields,
+        retrieved once per recording instead of once per file.
+
+        The series-invariant fields declared by format can be
+        completed or restricted, for ex. by bidsmap.
+        Caching assumes that each recording contains only one
+        serie, and must not be enabled before preparation.
+
+        Parameters
+        ----------
+        include: set
+            fields to consider as series-invariant
+        exclude: set
+            fields declared by format to consider as
+            changing from file to file
+        check: int
+            if positive, the cached values are compared
+            to the values of file each check files
+        """
+        cls._series_override = (frozenset(include), frozenset(exclude))
+        cls._series_check = max(check, 0)
+        cls._cache_series = True
+        baseModule._fieldAccessor.cache_clear()
+        baseModule.templateScope.cache_clear()
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def templateScope(cls, template: str) -> str:
+        """
+        Classifies dynamic field template, as interpreted by
+        getDynamicField:
+            - 'constant': template without placeholders
+            - 'series': template referencing only series-invariant
+              fields and characteristics constant within folder
+              (subject, session, nfiles, module, None)
+            - 'file': template that must be evaluated for each file
+
+        Parameters
+        ----------
+        template: str
+            template to classify
+
+        Returns
+        -------
+        str
+        """
+        scope = Dependencies.CONSTANT
+        for segment in _template.getTemplate(template).segments:
+            kind = segment[0]
+            if kind == _template.TEXT:
+                continue
+            if kind == _template.ATTRIBUTE\
+                    and cls._fieldAccessor(segment[1])[2]:
+                scope = Dependencies.SERIES
+            elif kind == _template.CHARACTERISTIC\
+                    and segment[1] in cls._folder_characteristics:
+                scope = Dependencies.SERIES
+            else:
+                return Dependencies.FILE
+        return scope
+
+    def _copy_bidsified(self, directory: str, bidsname: str, ext: str) -> list:
         """
         Virtual function that copies bidsified data files to
         its destinattion.
@@ -173,6 +377,11 @@ class baseModule(abstract):
             bidsified name without extention
         ext: str
             extention of the data file
+
+        Returns
+        -------
+        list(str):
+            paths to all written files
         """
 
         out_fname = os.path.join(directory, bidsname + ext)
@@ -183,11 +392,12 @@ class baseModule(abstract):
                     shutil.copyfileobj(f_in, f_out)
         else:
             shutil.copy2(self.currentFile(), out_fname)
+        return [out_fname]
 
     def _post_copy_bidsified(self,
                              directory: str,
                              bidsname: str,
-                             ext: str) -> None:
+                             ext: str) -> list:
         """
         Virtual function that performs all post-copy tasks, for ex.
         copy needed auxiliary files or change some internal values
@@ -203,10 +413,15 @@ class baseModule(abstract):
             bidsified name without extention
         ext: str
             extention of the data file
+
+        Returns
+        -------
+        list(str):
+            paths to all written files
         """
-        pass
+        return list()
 
-    def copyRawFile(self, destination: str) -> str:
+    def copyRawFile(self, destination: str) -> list:
         """
         Virtual function to Copy raw (non-bidsified) file
         to destination.
@@ -219,11 +434,12 @@ class baseModule(abstract):
 
         Returns
         -------
-        str:
-            path to copied file
+        list(str):
+            paths to all copied files, starting
+            with the copied data file
         """
         shutil.copy2(self.currentFile(), destination)
-        return os.path.join(destination, self.currentFile(True))
+        return [os.path.join(destination, self.currentFile(True))]
 
     def exportHeader(self, destination: str) -> None:
         """
@@ -312,17 +528,68 @@ class baseModule(abstract):
             logger.debug('{}: Hidden file'
                          .format(cls.formatIdentity()))
             return False
+        return cls._isValidFormat(file)
 
+    @classmethod
+    def _isValidExtention(cls, file: str) -> bool:
+        """
+        Checks if given file have accepted extention
+
+        Parameters
+        ----------
+        file: str
+            path to file
+
+        Returns
+        -------
+        bool:
+            True if extention is accepted
+        """
         if cls._file_extentions:
-            passed = False
             for ext in cls._file_extentions:
                 if file.endswith(ext):
-                    passed = True
-                    break
-            if not passed:
-                # logger.debug("{}: Unaccepted extention"
-                #              .format(cls.formatIdentity()))
-                return False
+                    return True
+            # logger.debug("{}: Unaccepted extention"
+            #              .format(cls.formatIdentity()))
+            return False
+        return True
+
+    @classmethod
+    def _sidecarFiles(cls, file: str) -> list:
+        """
+        Returns the list of paths to sidecar files,
+        required for given file to be valid
+
+        Parameters
+        ----------
+        file: str
+            path to file
+
+        Returns
+        -------
+        list(str):
+            list of paths
+        """
+        return []
+
+    @classmethod
+    def _isValidFormat(cls, file: str) -> bool:
+        """
+        Checks if given file have accepted extention and format.
+        The file is assumed to be existing, readable and not hidden
+
+        Parameters
+        ----------
+        file: str
+            path to file
+
+        Returns
+        -------
+        bool:
+            True if file is valid
+        """
+        if not cls._isValidExtention(file):
+            return False
         try:
             res = cls._isValidFile(file)
             # if res:
@@ -379,10 +646,7 @@ class baseModule(abstract):
         bool:
             True if at least one valid file found
         """
-        for file in os.listdir(rec_path):
-            if cls.isValidFile(os.path.join(rec_path, file)):
-                return True
-        return False
+        return _inventory.getInventory(rec_path).hasValid(cls)
 
     @classmethod
     def getNumFiles(cls, folder: str) -> int:
@@ -401,12 +665,12 @@ class baseModule(abstract):
             number of valid recordings
         """
         count = 0
-        for file in os.listdir(folder):
-            if os.path.basename(file).startswith('.'):
+        inventory = _inventory.getInventory(folder)
+        for file in inventory.names():
+            if file.startswith('.'):
                 logger.warning(f'Ignoring hidden file: {file}')
                 continue
-            full_path = os.path.join(folder, file)
-            if cls.isValidFile(full_path):
+            if inventory.isValid(cls, file):
                 count += 1
         return count
 
@@ -430,15 +694,15 @@ class baseModule(abstract):
             path to file
         """
         idx = 0
-        for file in sorted(os.listdir(folder)):
-            if os.path.basename(file).startswith('.'):
+        inventory = _inventory.getInventory(folder)
+        for file in inventory.names():
+            if file.startswith('.'):
                 logger.warning(f'Ignoring hidden file: {file}')
                 continue
 
-            full_path = os.path.join(folder, file)
-            if self.isValidFile(full_path):
+            if inventory.isValid(self, file):
                 if idx == index:
-                    return full_path
+                    return os.path.join(folder, file)
                 else:
                     idx += 1
         logger.warning("{}/{}: Cant find a valid file at index {} in {}"
@@ -503,15 +767,21 @@ class baseModule(abstract):
         -------
         retrieved value or default
         """
-        fields = field.split(prefix)
-        actions = fields[0:-1]
-        field = fields[-1]
-
-        result = self._getField(field.split(separator))
+        actions, path, series = self._fieldAccessor(field, prefix, separator)
+        if path in self._values_cache:
+            result = self._values_cache[path]
+        else:
+            if series and self._cache_series:
+                result = self.__getSeriesField(path)
+            else:
+                result = self._getField(list(path))
+            self._values_cache[path] = result
 
         if result is None:
             return default
-        for prefix in reversed(actions):
+        if isinstance(result, (list, dict)):
+            result = result.copy()
+        for prefix in actions:
             if isinstance(result, list):
                 for i, val in enumerate(result):
                     result[i] = self._transformField(val, prefix)
@@ -524,6 +794,90 @@ class baseModule(abstract):
             result = result.strip()
         return result
 
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _fieldAccessor(cls, field: str,
+                       prefix: str = ':', separator: str = '/') -> tuple:
+        """
+        Parses field, as passed to getField, into the list of
+        transformations, in order of application, the path
+        passed to _getField, processed by _compilePath, and
+        the switch if field is series-invariant.
+
+        Fields are parsed once per class
+
+        Parameters
+        ----------
+        field: str
+            name of the field to parse
+        prefix: str
+            separater used to identify prefix
+        separator: str
+            character used to separate levels in case
+            of nested fields
+
+        Returns
+        -------
+        tuple(tuple, tuple, bool)
+            transformations, path and series-invariance
+        """
+        fields = field.split(prefix)
+        actions = tuple(reversed(fields[0:-1]))
+        path = tuple(cls._compilePath(fields[-1].split(separator)))
+        series = cls.fieldScope(fields[-1]) == Dependencies.SERIES
+        return actions, path, series
+
+    def __getSeriesField(self, path: tuple) -> object:
+        """
+        Returns the value of series-invariant field, retrieved
+        from first file of recording, and checked against
+        current file each _series_check files.
+
+        Field with value different from cached one is reported,
+        and retrieved from each file for the rest of recording
+        """
+        if path not in self._series_cache:
+            result = self._getField(list(path))
+            self._series_cache[path] = (result, True)
+            return result
+
+        cached, invariant = self._series_cache[path]
+        if not invariant:
+            return self._getField(list(path))
+        if self._series_check <= 0 or self.index % self._series_check:
+            return cached
+
+        result = self._getField(list(path))
+        if result != cached:
+            logger.warning("{}: field '{}' changed within recording "
+                           "({} -> {}), it will be retrieved from "
+                           "each file"
+                           .format(self.recIdentity(),
+                                   "/".join(str(p) for p in path),
+                                   cached, result))
+            self._series_cache[path] = (result, False)
+            # templates using this field are evaluated for each file
+            self._template_cache = None
+        return result
+
+    @classmethod
+    def _compilePath(cls, path: list) -> list:
+        """
+        Virtual function that prepares the path to the field,
+        as passed to _getField, for ex. resolving the names
+        into format-specific keys. Called once per field
+
+        Parameters
+        ----------
+        path: list(str)
+            list of nested values
+
+        Returns
+        -------
+        list
+        """
+        return path
+
     def getAttribute(self, attribute: str,
                      default=None):
         """
@@ -560,9 +914,12 @@ class baseModule(abstract):
             return res
 
     def setAttribute(self, attribute: str, value):
+        # attributes set externally are not series-invariant
+        self._template_cache = None
         self.attributes[attribute] = value
 
     def resetAttribute(self, attribute):
+        self._template_cache = None
         self.attributes.pop(attribute)
 
     def getDynamicField(self, field: str,
@@ -593,28 +950,24 @@ class baseModule(abstract):
 
         if not isinstance(field, str) or field == "":
             return field
+        key = self.__templateKey(field, default, cleanup, raw)
+        if key is not None and key in self._template_cache:
+            res = self._template_cache[key]
+            if isinstance(res, (list, dict)):
+                res = res.copy()
+            return res
+
+        template = _template.getTemplate(field)
         res = ""
-        start = 0
-        while start < len(field):
-            pos = field.find('<', start)
-            if pos < 0:
-                res += field[start:]
-                break
-            res += field[start:pos]
+        for segment in template.segments:
+            kind = segment[0]
+            if kind == _template.TEXT:
+                res += segment[1]
+                continue
 
             try:
-                if field[pos + 1] == "<":
-                    pos += 2
-                    seek = ">>"
-                else:
-                    pos += 1
-                    seek = ">"
-                pos2 = field.find(seek, pos)
-                if pos2 < 0:
-                    raise IndexError("closing {} from {} not found in {}"
-                                     .format(seek, pos, field))
-                query = field[pos:pos2]
-                if seek == '>':
+                if kind == _template.ATTRIBUTE:
+                    query = segment[1]
                     result = self.getAttribute(query, default)
                     if result is None:
                         logger.log(log_lvl,
@@ -626,44 +979,45 @@ class baseModule(abstract):
                             result = query
                         else:
                             result = None
-                else:
-                    prefix = ""
-                    if ":" in query:
-                        prefix, query = query.split(":", 1)
-                    if prefix == "":
-                        result = self._getCharacteristic(query)
-                    elif prefix == "bids":
+                        # missing values are reported for each file
+                        key = None
+                elif kind == _template.CHARACTERISTIC:
+                    result = self._getCharacteristic(segment[1])
+                elif kind == _template.LABEL:
+                    prefix, query = segment[1:]
+                    if prefix == "bids":
                         result = self.labels[query]
                     elif prefix == "custom":
                         result = self.custom[query]
                     elif prefix == "sub_tsv":
-                        # result = self.sub_BIDSvalues[query]
                         result = self._bidsSession.sub_values[query]
-                    elif prefix == "rec_tsv":
+                    else:
                         result = self._bidsSession.rec_values[query]
-                    elif prefix == "fname":
-                        search = re.search("{}-([a-zA-Z0-9]+)".format(query),
-                                           self.currentFile(False))
-                        if search:
-                            result = search.group(1)
-                        else:
-                            logger.log(log_lvl,
-                                       "{}: Can't find '{}' "
-                                       "attribute from '{}'"
-                                       .format(self.recIdentity(),
-                                               query,
-                                               self.currentFile(False)))
-                            if not raw:
-                                result = query
-                            else:
-                                result = None
+                elif kind == _template.FNAME:
+                    query, regex = segment[1:]
+                    search = regex.search(self.currentFile(False))
+                    if search:
+                        result = search.group(1)
                     else:
-                        raise KeyError("Unknown prefix {}".format(prefix))
+                        logger.log(log_lvl,
+                                   "{}: Can't find '{}' "
+                                   "attribute from '{}'"
+                                   .format(self.recIdentity(),
+                                           query,
+                                           self.currentFile(False)))
+                        if not raw:
+                            result = query
+                        else:
+                            result = None
+                else:
+                    error = segment[1]
+                    raise type(error)(*error.args)
                 # if field is composed only of one entry
-                if raw and pos2 - pos + 2 * len(seek) == len(field):
+                if raw and template.single:
+                    if key is not None:
+                        self.__cacheTemplate(key, result)
                     return result
                 res += str(result)
-                start = pos2 + len(seek)
             except Exception as e:
                 logger.error("{}: Malformed field "
                              "'{}': {}"
@@ -671,8 +1025,40 @@ class baseModule(abstract):
                 raise
         if cleanup:
             res = tools.cleanup_value(res)
+        if key is not None:
+            self.__cacheTemplate(key, res)
         return res
 
+    def __templateKey(self, field: str, default: object,
+                      cleanup: bool, raw: bool) -> tuple:
+        """
+        Returns the key of template value in _template_cache,
+        or None if template must be evaluated for each file
+        """
+        if self._template_cache is None:
+            return None
+        scope = self.templateScope(field)
+        if scope == Dependencies.FILE:
+            return None
+        if scope == Dependencies.SERIES and not self._cache_series:
+            return None
+        key = (field, type(default), default, cleanup, raw)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def __cacheTemplate(self, key: tuple, value: object) -> None:
+        """
+        Stores value of series-invariant template
+        """
+        if self._template_cache is None:
+            return
+        if isinstance(value, (list, dict)):
+            value = value.copy()
+        self._template_cache[key] = value
+
     def setBidsSession(self, session: BidsSession) -> None:
         """
         Set session class
@@ -681,6 +1067,7 @@ class baseModule(abstract):
             logger.warning("{}: Resetting BidsSession"
                            .format(self.recIdentity()))
         self._bidsSession = BidsSession(session.subject, session.session)
+        self._template_cache = dict()
         self._bidsSession.in_path = session.in_path
         self._bidsSession.sub_values = {key: val
                                         for key, val
@@ -918,17 +1305,76 @@ class baseModule(abstract):
             index of file in registered files list
         """
         path = os.path.join(self._recPath, self.files[index])
-        if not self.isValidFile(path):
+        # files modified since validation are validated again
+        self._inventory.refresh(self.files[index])
+        if not self._inventory.isValid(type(self), self.files[index]):
             raise ValueError("{}: {} is not valid file"
                              .format(self.formatIdentity(), path))
 
         self.index = index
+        self._values_cache.clear()
+        if self._series_check > 0 and index % self._series_check == 0\
+                and self._template_cache:
+            # series-invariant templates are evaluated again,
+            # checking the values of their fields
+            self._template_cache.clear()
         self._loadFile(path)
         self.setAcqTime()
         self.attributes = {}
         # for key in self.attributes:
         #     self.attributes[key] = self.getField(key)
 
+    @classmethod
+    def setPrefetch(cls, depth: int, max_size: int = 256) -> None:
+        """
+        Sets the read-ahead of file headers for all modules
+
+        Parameters
+        ----------
+        depth: int
+            maximum number of headers parsed in advance,
+            if 0, read-ahead is disabled
+        max_size: int
+            maximum total size (in MB) of files read in advance
+        """
+        baseModule._prefetch_depth = max(depth, 0)
+        baseModule._prefetch_size = max_size * 2**20
+
+    def _getHeader(self, path: str) -> object:
+        """
+        Returns the header of file at given path, parsed by
+        _readHeader. If read-ahead is enabled, the headers of
+        next files of the recording are parsed in background
+        threads.
+
+        Parameters
+        ----------
+        path: str
+            path to the file
+
+        Returns
+        -------
+        object:
+            parsed header
+        """
+        if self._prefetch_depth <= 0:
+            return self._readHeader(path)
+        if self._prefetcher is None:
+            self._prefetcher = prefetch.Prefetcher(
+                    self._readHeader,
+                    [os.path.join(self._recPath, f) for f in self.files],
+                    self._prefetch_depth,
+                    self._prefetch_size)
+        return self._prefetcher.get(path)
+
+    def _closePrefetch(self) -> None:
+        """
+        Stops the read-ahead of file headers
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
     def setRecPath(self, folder: str) -> int:
         """
         Set given folder as folder containing all files for serie.
@@ -953,20 +1399,26 @@ class baseModule(abstract):
         if not os.path.isdir(folder):
             raise NotADirectoryError("Path {} is not a folder"
                                      .format(folder))
+        self._closePrefetch()
         self._recPath = os.path.normpath(folder)
+        _handles.release(self._recPath)
         self.clearCache()
+        self._values_cache.clear()
+        self._series_cache.clear()
+        self._template_cache = dict()
         self.files.clear()
         self.index = -1
 
-        for file in sorted(os.listdir(self._recPath)):
-            if os.path.basename(file).startswith('.'):
+        inventory = _inventory.getInventory(self._recPath)
+        self._inventory = inventory
+        for file in inventory.names():
+            if file.startswith('.'):
                 logger.warning('{}/{}: Ignoring hidden file: {}'
                                .format(self.Module(),
                                        self.Type(),
                                        file))
                 continue
-            full_path = os.path.join(self._recPath, file)
-            if self.isValidFile(full_path):
+            if inventory.isValid(type(self), file):
                 self.files.append(file)
         if len(self.files) == 0:
             logger.warning("{}/{}: No valid files found in {}"
@@ -990,6 +1442,7 @@ class baseModule(abstract):
         Returns True in sucess, False othrwise
         """
         if self.index + 1 >= len(self.files):
+            self._closePrefetch()
             return False
         self.loadFile(self.index + 1)
         return True
@@ -1025,7 +1478,8 @@ class baseModule(abstract):
     #########################
     # Bids-related methodes #
     #########################
-    def bidsify(self, bidsfolder: str) -> None:
+    def bidsify(self, bidsfolder: str, scans: list = None,
+                outputs: list = None) -> str:
         """
         Copy current file to the destination, change the name
         to the bidsified one, and export metadata to json
@@ -1036,6 +1490,15 @@ class baseModule(abstract):
         ----------
         bidsfolder: str
             path to root of output bids folder
+        scans: list
+            if given, the scans.tsv entry of bidsified file
+            is appended to this list as tuple (path to scans.tsv,
+            line) instead of being written to scans.tsv,
+            to be written later by writeScans
+        outputs: list
+            if given, the paths to all written files
+            (data, auxiliary files and json) are appended
+            to this list
 
         Returns
         -------
@@ -1072,8 +1535,8 @@ class baseModule(abstract):
                                                     bidsname,
                                                     ext))
 
-        self._copy_bidsified(outdir, bidsname, ext)
-        self._post_copy_bidsified(outdir, bidsname, ext)
+        written = self._copy_bidsified(outdir, bidsname, ext)
+        written.extend(self._post_copy_bidsified(outdir, bidsname, ext))
 
         with open(os.path.join(outdir, bidsname + ".json"), "w") as f:
             js_dict = self.exportMeta()
@@ -1081,6 +1544,9 @@ class baseModule(abstract):
                        for key, val in js_dict.items()
                        if val is not None}
             json.dump(js_dict, f, indent=2, cls=ExtendEncoder)
+        written.append(os.path.join(outdir, bidsname + ".json"))
+        if outputs is not None:
+            outputs.extend(written)
 
         self.rec_BIDSvalues["filename"] = os.path.join(self.Modality(),
                                                        bidsname
@@ -1092,26 +1558,74 @@ class baseModule(abstract):
                     microsecond=0,
                     tzinfo=None)
 
-        scans = os.path.join(bidsfolder,
-                             self.getBidsPrefix('/'),
-                             '{}_scans'.format(self.getBidsPrefix()))
-        scans_tsv = scans + ".tsv"
-        scans_json = scans + ".json"
-
-        if os.path.isfile(scans_tsv):
-            with open(scans_tsv, "a") as f:
-                f.write(self.rec_BIDSfields.GetLine(
-                    self.rec_BIDSvalues))
-                f.write('\n')
+        scans_tsv = os.path.join(bidsfolder,
+                                 self.getBidsPrefix('/'),
+                                 '{}_scans.tsv'.format(self.getBidsPrefix()))
+        line = self.rec_BIDSfields.GetLine(self.rec_BIDSvalues)
+        if scans is None:
+            self.writeScans(scans_tsv, [line])
         else:
-            with open(scans_tsv, "w") as f:
-                f.write(self.rec_BIDSfields.GetHeader())
+            scans.append((scans_tsv, line))
+        return os.path.join(outdir, bidsname + ext)
+
+    @classmethod
+    def writeScans(cls, scans_tsv: str, lines: list) -> None:
+        """
+        Appends lines to given scans.tsv file. If file do not
+        exists, it is created with the header line, and
+        the definitions of columns are exported into
+        corresponding json file.
+
+        Lines for files already listed in scans.tsv, or listed
+        several times in lines, replace the existing ones, so
+        no duplicated rows are created
+
+        Parameters
+        ----------
+        scans_tsv: str
+            path to the scans.tsv file
+        lines: list
+            list of lines (without new line) to write
+        """
+        batch = OrderedDict()
+        for line in lines:
+            batch[line.split('\t', 1)[0]] = line
+        lines = list(batch.values())
+
+        new_file = not os.path.isfile(scans_tsv)
+        if not new_file:
+            with open(scans_tsv, "r") as f:
+                existing = f.read().splitlines()
+            listed = {line.split('\t', 1)[0]: i
+                      for i, line in enumerate(existing) if i > 0}
+            appended = list()
+            replaced = False
+            for line in lines:
+                i = listed.get(line.split('\t', 1)[0])
+                if i is None:
+                    listed[line.split('\t', 1)[0]] = len(existing)
+                    existing.append(line)
+                    appended.append(line)
+                elif existing[i] != line:
+                    existing[i] = line
+                    replaced = True
+            if replaced:
+                with open(scans_tsv, "w") as f:
+                    for line in existing:
+                        f.write(line)
+                        f.write('\n')
+                return
+            lines = appended
+        with open(scans_tsv, "a") as f:
+            if new_file:
+                f.write(cls.rec_BIDSfields.GetHeader())
                 f.write('\n')
-                f.write(self.rec_BIDSfields.GetLine(
-                    self.rec_BIDSvalues))
+            for line in lines:
+                f.write(line)
                 f.write('\n')
-            self.rec_BIDSfields.DumpDefinitions(scans_json)
-        return os.path.join(outdir, bidsname + ext)
+        if new_file:
+            cls.rec_BIDSfields.DumpDefinitions(
+                    os.path.splitext(scans_tsv)[0] + ".json")
 
     def setLabels(self, run: Run = None):
         """
@@ -1161,18 +1675,36 @@ class baseModule(abstract):
             if key:
                 if isinstance(val, list):
                     self.metaAuxiliary[key] = [
-                            MetaField(key, None,
-                                      self.getDynamicField(v,
-                                                           cleanup=False,
-                                                           raw=True))
-                            for v in val]
+                            self.__getAuxField(
+                                (key, i),
+                                self.getDynamicField(v,
+                                                     cleanup=False,
+                                                     raw=True))
+                            for i, v in enumerate(val)]
                 else:
-                    self.metaAuxiliary[key] = MetaField(
-                            key, None,
+                    self.metaAuxiliary[key] = self.__getAuxField(
+                            (key, None),
                             self.getDynamicField(val,
                                                  cleanup=False,
                                                  raw=True))
 
+    def __getAuxField(self, pos: tuple, value: object) -> MetaField:
+        """
+        Returns auxiliary metafield at given position,
+        set to given value.
+
+        Metafields are created once per recording object
+        and reused for the following files
+        """
+        field = self._aux_fields.get(pos)
+        if field is None:
+            field = MetaField(pos[0], None, value)
+            self._aux_fields[pos] = field
+        else:
+            field.default = value
+            field.value = value
+        return field
+
     def getBidsPrefix(self, sep: str = '_') -> str:
         """
         Generates the subject/session prefix using separator,
@@ -1243,42 +1775,62 @@ class baseModule(abstract):
         definitions: dict
             dictionary with metadata fields definitions
         """
+        key = (type(self), self.manufacturer, id(definitions))
+        resolved = self._meta_definitions.get(key)
+        if resolved is None:
+            resolved = self.__resolveMetaFields(definitions)
+            self._meta_definitions[key] = resolved
+
+        tables = (self.metaFields_req,
+                  self.metaFields_rec,
+                  self.metaFields_opt)
+        for table, mod, key, val in resolved:
+            if isinstance(val, list):
+                tables[table][mod][key] = [MetaField(f[0],
+                                                     scaling=None,
+                                                     default=f[1])
+                                           for f in val]
+            else:
+                tables[table][mod][key] = MetaField(val[0],
+                                                    scaling=None,
+                                                    default=val[1])
+        self._meta_plan.clear()
+
+    def __resolveMetaFields(self, definitions: dict) -> list:
+        """
+        Resolves the definitions of current metafields for
+        current manufacturer, falling back to "Unknown" ones
+
+        Parameters
+        ----------
+        definitions: dict
+            dictionary with metadata fields definitions
+
+        Returns
+        -------
+        list:
+            list of (table index, modality, key, definition)
+        """
         if self.manufacturer in definitions:
             meta = definitions[self.manufacturer]
         else:
             meta = None
         meta_default = definitions["Unknown"]
 
-        for metaFields in (self.metaFields_req,
-                           self.metaFields_rec,
-                           self.metaFields_opt):
+        res = list()
+        for table, metaFields in enumerate((self.metaFields_req,
+                                            self.metaFields_rec,
+                                            self.metaFields_opt)):
             for mod in metaFields:
                 for key in metaFields[mod]:
                     if meta and key in meta:
                         val = meta[key]
-                        if isinstance(val, list):
-                            metaFields[mod][key] = [MetaField(f[0],
-                                                              scaling=None,
-                                                              default=f[1])
-                                                    for f in val]
-                        else:
-                            metaFields[mod][key]\
-                                = MetaField(val[0],
-                                            scaling=None,
-                                            default=val[1])
+                        res.append((table, mod, key, val))
+                        if not isinstance(val, list):
                             continue
                     if key in meta_default:
-                        val = meta_default[key]
-                        if isinstance(val, list):
-                            metaFields[mod][key] = [MetaField(f[0],
-                                                              scaling=None,
-                                                              default=f[1])
-                                                    for f in val]
-                        else:
-                            metaFields[mod][key]\
-                                = MetaField(val[0],
-                                            scaling=None,
-                                            default=val[1])
+                        res.append((table, mod, key, meta_default[key]))
+        return res
 
     def testMetaFields(self):
         """
@@ -1305,6 +1857,7 @@ class baseModule(abstract):
                         pass
                     if res is None:
                         metaFields[mod][key] = None
+        self._meta_plan.clear()
 
     def generateMeta(self) -> dict:
         """
@@ -1316,40 +1869,10 @@ class baseModule(abstract):
                          .format(self.Module(), self.Type()))
             raise ValueError("Modality wasn't defined")
 
-        mod = self._modality
-        if mod in self.metaFields_req:
-            for key, field in self.metaFields_req[mod].items():
-                if field is None:
-                    continue
-                if key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
-        if mod in self.metaFields_rec:
-            for key, field in self.metaFields_rec[mod].items():
-                if field is not None and key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
-        if mod in self.metaFields_opt:
-            for key, field in self.metaFields_opt[mod].items():
-                if field is not None and key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
-        mod = "__common__"
-        if mod in self.metaFields_req:
-            for key, field in self.metaFields_req[mod].items():
-                if field is not None and key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
-        if mod in self.metaFields_rec:
-            for key, field in self.metaFields_rec[mod].items():
-                if field is not None and key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
-        if mod in self.metaFields_opt:
-            for key, field in self.metaFields_opt[mod].items():
-                if field is not None and key not in self.metaAuxiliary:
-                    field.value = self.__getMetaFieldSecure(field,
-                                                            field.default)
+        for key, field, required in self.__getMetaPlan():
+            if field is not None and key not in self.metaAuxiliary:
+                field.value = self.__getMetaFieldSecure(field,
+                                                        field.default)
 
     def exportMeta(self) -> dict:
         """
@@ -1375,34 +1898,62 @@ class baseModule(abstract):
         self.__fillMetaDict(exp, self.metaAuxiliary,
                             required=False,
                             ignore_null=True)
-        mod = self._modality
-        if mod in self.metaFields_req:
-            self.__fillMetaDict(exp, self.metaFields_req[mod],
-                                required=True,
-                                ignore_null=False)
-        if mod in self.metaFields_rec:
-            self.__fillMetaDict(exp, self.metaFields_rec[mod],
-                                required=False,
-                                ignore_null=False)
-        if mod in self.metaFields_opt:
-            self.__fillMetaDict(exp, self.metaFields_opt[mod],
-                                required=False,
-                                ignore_null=False)
-        mod = "__common__"
-        if mod in self.metaFields_req:
-            self.__fillMetaDict(exp, self.metaFields_req[mod],
-                                required=True,
-                                ignore_null=False)
-        if mod in self.metaFields_rec:
-            self.__fillMetaDict(exp, self.metaFields_rec[mod],
-                                required=False,
-                                ignore_null=False)
-        if mod in self.metaFields_opt:
-            self.__fillMetaDict(exp, self.metaFields_opt[mod],
-                                required=False,
-                                ignore_null=False)
+        for key, field, required in self.__getMetaPlan():
+            if key in exp:
+                continue
+            if not field:
+                if required:
+                    logger.warning("{}: Required field {} not set"
+                                   .format(self.recIdentity(),
+                                           key))
+                exp[key] = None
+            elif isinstance(field, list):
+                exp[key] = [f.value for f in field]
+            else:
+                exp[key] = field.value
         return exp
 
+    def __getMetaPlan(self) -> list:
+        """
+        Returns the metafields of current modality, in order
+        of export:
+            1. Modality required
+            2. Modality recommended
+            3. Modality optional
+            4. Common required
+            5. Common recommended
+            6. Common optional
+
+        Only first occurence of each key is retained. The list
+        is built once per modality, and rebuilt after
+        setupMetaFields and testMetaFields.
+
+        Returns
+        -------
+        list:
+            list of (key, metafield, required)
+        """
+        mod = self._modality
+        plan = self._meta_plan.get(mod)
+        if plan is not None:
+            return plan
+
+        plan = list()
+        keys = set()
+        for m in (mod, "__common__"):
+            for metaFields, required in ((self.metaFields_req, True),
+                                         (self.metaFields_rec, False),
+                                         (self.metaFields_opt, False)):
+                if m not in metaFields:
+                    continue
+                for key, field in metaFields[m].items():
+                    if key in keys:
+                        continue
+                    keys.add(key)
+                    plan.append((key, field, required))
+        self._meta_plan[mod] = plan
+        return plan
+
     def __fillMetaDict(self,
                        exportDict: dict, metaFields: dict,
                        required: bool, ignore_null: bool) -> None:
@@ -1515,6 +2066,32 @@ class baseModule(abstract):
     #####################################
     # Recording identification methodes #
     #####################################
+    def getMatchValue(self, attribute: str, store: bool = True) -> object:
+        """
+        Returns the value of attribute, as matched against
+        runs attributes. Attributes starting with '<' are
+        interpreted as dynamic fields.
+
+        Parameter
+        ---------
+        attribute: str
+            Attribute name to retrieve
+        store: bool
+            if False, value retrieved from metadata is not
+            stored in attributes
+
+        Returns
+        -------
+        object
+        """
+        if attribute.startswith('<'):
+            return self.getDynamicField(attribute,
+                                        cleanup=False,
+                                        raw=True)
+        if not store and attribute not in self.attributes:
+            return self.getField(attribute, None)
+        return self.getAttribute(attribute)
+
     def matchAttribute(self, attribute: str, pattern: str) -> bool:
         """
         Return True if given attribute value matches pattern,
@@ -1531,12 +2108,7 @@ class baseModule(abstract):
         -------
         bool
         """
-        if attribute.startswith('<'):
-            attval = self.getDynamicField(attribute,
-                                          cleanup=False,
-                                          raw=True)
-        else:
-            attval = self.getAttribute(attribute)
+        attval = self.getMatchValue(attribute)
         if attval is None:
             return False
         if pattern is None:
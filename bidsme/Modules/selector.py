@@ -23,9 +23,11 @@
 # along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
 ##############################################################################
 
+import os
 from collections import OrderedDict
 
 from . import MRI, EEG, PET
+from . import _inventory
 
 types_list = OrderedDict(
              {"MRI": (MRI.hmriNIFTI, MRI.bidsmeNIFTI,
@@ -65,6 +67,9 @@ def selectFile(file: str, module: str = ""):
     """
     Returns first class for wich given file is correct
 
+    The file signature is read once and shared by
+    all tested classes
+
     Parameters
     ----------
     folder: str
@@ -72,14 +77,18 @@ def selectFile(file: str, module: str = ""):
     module: str
         restrict type of class
     """
+    if not os.path.isfile(file):
+        return None
+    folder, name = os.path.split(file)
+    inventory = _inventory.getInventory(folder or os.curdir)
     if module == "":
         for m in types_list:
             for cls in types_list[m]:
-                if cls.isValidFile(file):
+                if inventory.isValid(cls, name):
                     return cls
     else:
         for cls in types_list[module]:
-            if cls.isValidFile(file):
+            if inventory.isValid(cls, name):
                 return cls
     return None
 
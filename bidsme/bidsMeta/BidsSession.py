@@ -235,16 +235,41 @@ class BidsSession(object):
             if True, allow conflicting entries
         """
         self.sub_values["participant_id"] = self.subject
-        if self.subject in self.__sub_values:
-            last_values = self.__sub_values[self.subject][-1]
+        self.__registerValues(self.sub_values, self.session, conflicting)
+        # self.sub_values = self.__sub_columns.GetTemplate()
+
+    @classmethod
+    def __registerValues(cls, values: dict, session: str,
+                         conflicting: bool) -> None:
+        """
+        Merges given participant values with already
+        registered ones. Undefined values are completed
+        from last registered entry, which is replaced by
+        merged values. In case of conflict, merged values are
+        added as a new entry (if conflicting is True), or
+        ValueError is raised
+
+        Parameters
+        ----------
+        values: dict
+            participant values to register, must contain
+            participant_id
+        session: str
+            session Id, used for reporting
+        conflicting: bool
+            if True, allow conflicting entries
+        """
+        subject = values["participant_id"]
+        if subject in cls.__sub_values:
+            last_values = cls.__sub_values[subject][-1]
             conflict = False
-            for key in self.sub_values:
-                if key not in self.getSubjectColumns():
+            for key in values:
+                if key not in cls.getSubjectColumns():
                     continue
                 old_val = last_values[key]
-                new_val = self.sub_values[key]
+                new_val = values[key]
                 if new_val is None or pandas.isna(new_val):
-                    self.sub_values[key] = old_val
+                    values[key] = old_val
                 elif old_val is None or pandas.isna(old_val):
                     pass
                 elif old_val != new_val:
@@ -253,22 +278,59 @@ class BidsSession(object):
                 if conflicting:
                     logger.warning("{}/{}: participants contains "
                                    "conflicting values for {}"
-                                   .format(self.subject,
-                                           self.session,
+                                   .format(subject,
+                                           session,
                                            key))
-                    self.__sub_values[self.subject].append(
-                            copy(self.sub_values))
+                    cls.__sub_values[subject].append(copy(values))
                 else:
                     logger.critical("{}/{}: {} conflicts with {}"
-                                    .format(self.subject, self.session,
-                                            last_values, self.sub_values)
+                                    .format(subject, session,
+                                            last_values, values)
                                     )
                     raise ValueError("Conflicting participant values")
             else:
-                self.__sub_values[self.subject][-1] = copy(self.sub_values)
+                cls.__sub_values[subject][-1] = copy(values)
         else:
-            self.__sub_values[self.subject] = [copy(self.sub_values)]
-        # self.sub_values = self.__sub_columns.GetTemplate()
+            cls.__sub_values[subject] = [copy(values)]
+
+    @classmethod
+    def getSubjectValues(cls) -> dict:
+        """
+        Returns a copy of all registered participants values,
+        as dictionary with participant Id as key and list of
+        registered entries as value
+
+        Returns
+        -------
+        dict
+        """
+        return copy(cls.__sub_values)
+
+    @classmethod
+    def resetSubjectValues(cls) -> None:
+        """
+        Removes all registered participants values
+        """
+        cls.__sub_values = dict()
+
+    @classmethod
+    def mergeSubjectValues(cls, sub_values: dict,
+                           conflicting: bool = False) -> None:
+        """
+        Registers participants values retrieved by getSubjectValues
+        (for ex. in a worker process), entry by entry, following
+        the same rules as registerFields
+
+        Parameters
+        ----------
+        sub_values: dict
+            participants values to merge
+        conflicting: bool
+            if True, allow conflicting entries
+        """
+        for subject in sub_values:
+            for values in sub_values[subject]:
+                cls.__registerValues(copy(values), None, conflicting)
 
     @classmethod
     def exportParticipants(cls, output: str) -> None:
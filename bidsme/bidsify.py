@@ -27,6 +27,7 @@
 import os
 import logging
 import pandas
+from copy import deepcopy
 
 from bidsme import exceptions
 from bidsme import plugins
@@ -34,17 +35,54 @@ from bidsme import Modules
 
 from bidsme.tools import paths
 from bidsme.tools import tools
+from bidsme.tools import parallel
+from bidsme.tools import info
+from bidsme.tools import sourceindex
 from bidsme.bidsmap import Bidsmap
 from bidsme.bidsMeta import BidsSession
 from bidsme.bidsMeta import BidsTable
 
 logger = logging.getLogger(__name__)
 
+# bidsmap used by worker processes
+worker_bidsmap = None
+
+
+def iscompleted(destination: str,
+                src_index: sourceindex.SourceIndex,
+                path: str, run: str) -> dict:
+    """
+    Returns the completion record of given source file, if it was
+    bidsified from unchanged recording with same run, and all its
+    outputs are present and unchanged, None otherwise
+
+    Parameters
+    ----------
+    destination: str
+        root folder of bidsified dataset
+    src_index: SourceIndex
+        index of bidsified files
+    path: str
+        path to the source file
+    run: str
+        digest of run used to bidsify file
+    """
+    record = src_index.getOutput(path, run)
+    if record is None:
+        return None
+    for output, checksum in record["outputs"]:
+        if sourceindex.checksum(os.path.join(destination, output))\
+                != checksum:
+            return None
+    return record
+
 
 def coin(destination: str,
          recording: Modules.baseModule,
          bidsmap: Bidsmap,
-         dry_run: bool) -> None:
+         dry_run: bool,
+         scans: list = None,
+         src_index: sourceindex.SourceIndex = None) -> None:
     """
     Converts the session dicom-files into BIDS-valid nifti-files
     in the corresponding bidsfolder and extracts personals
@@ -55,6 +93,13 @@ def coin(destination: str,
     :param personals:   The dictionary with the personal information
     :param subprefix:   The prefix common for all source subject-folders
     :param sesprefix:   The prefix common for all source session-folders
+    :param scans:       List collecting the scans.tsv entries, if None
+                        entries are written directly to scans.tsv
+    :param src_index:   Index of bidsified files, if given, the files
+                        already bidsified are skipped, and the partially
+                        bidsified ones are bidsified again; a file
+                        bidsified from another source raises
+                        FileExistsError
     :return:            Nothing
     """
     if plugins.RunPlugin("SequenceEP", recording) < 0:
@@ -99,15 +144,61 @@ def coin(destination: str,
         bidsname = recording.getBidsname()
         bidsmodality = os.path.join(out_path, recording.Modality())
 
+        if src_index is not None:
+            # provenance and example are set by the first matching file
+            run_dump = r_obj.dump(empty_attributes=False)
+            for key in ("provenance", "example", "checked"):
+                run_dump.pop(key, None)
+            run_digest = sourceindex.digest(modality, run_dump, bidsname)
+            json_out = os.path.relpath(os.path.join(bidsmodality,
+                                                    bidsname + '.json'),
+                                       destination)
+            claimed = src_index.claim(json_out, recording.currentFile())
+            if claimed is not None:
+                e = "{}/{}.json exists at destination, bidsified from {}"\
+                    .format(bidsmodality, bidsname, claimed)
+                logger.error(e)
+                raise FileExistsError(e)
+            record = iscompleted(destination, src_index,
+                                 recording.currentFile(), run_digest)
+            if record is not None:
+                logger.info("{}: already bidsified as {}"
+                            .format(recording.recIdentity(), bidsname))
+                if scans is not None:
+                    scans_tsv, line = record["scans"]
+                    scans.append((os.path.join(destination, scans_tsv),
+                                  line))
+                continue
+            # not claimed by other source, so left by interrupted run
+            if os.path.isfile(os.path.join(bidsmodality,
+                                           bidsname + '.json')):
+                logger.warning("{}: {}/{}.json is incomplete, "
+                               "bidsifying again"
+                               .format(recording.recIdentity(),
+                                       bidsmodality, bidsname))
         # Check if file already exists
-        if os.path.isfile(os.path.join(bidsmodality,
-                                       bidsname + '.json')):
+        elif os.path.isfile(os.path.join(bidsmodality,
+                                         bidsname + '.json')):
             e = "{}/{}.json exists at destination"\
                 .format(bidsmodality, bidsname)
             logger.error(e)
             raise FileExistsError(e)
         if not dry_run:
-            outfile = recording.bidsify(destination)
+            file_scans = list()
+            outputs = list()
+            outfile = recording.bidsify(destination, file_scans, outputs)
+            if scans is None:
+                writescans(file_scans)
+            else:
+                scans.extend(file_scans)
+            if src_index is not None:
+                scans_tsv, line = file_scans[0]
+                src_index.setOutput(
+                        recording.currentFile(), run_digest,
+                        [(os.path.relpath(output, destination),
+                          sourceindex.checksum(output))
+                         for output in outputs],
+                        (os.path.relpath(scans_tsv, destination), line))
             plugins.RunPlugin("FileEP", outfile, recording)
     if not dry_run:
         plugins.RunPlugin("SequenceEndEP", out_path, recording)
@@ -115,6 +206,134 @@ def coin(destination: str,
         plugins.RunPlugin("SequenceEndEP", None, recording)
 
 
+def bidsifyrun(destination: str,
+               scan: BidsSession,
+               run: str,
+               module: str,
+               bidsmap: Bidsmap,
+               dry_run: bool,
+               src_index: sourceindex.SourceIndex = None) -> list:
+    """
+    Bidsify all files of given run folder
+
+    Parameters
+    ----------
+    destination: str
+        root folder of bidsified dataset
+    scan: BidsSession
+        session object with locked subject and session
+    run: str
+        path to the run folder
+    module: str
+        name of data type (module) of run
+    bidsmap: Bidsmap
+        bidsmap used to identify recordings
+    dry_run: bool
+        if set to True, no disk writing operations
+        will be performed
+    src_index: SourceIndex
+        index of bidsified files, used to resume bidsification
+
+    Returns
+    -------
+    list:
+        list of (path to scans.tsv, line) entries
+        for bidsified files
+    """
+    scans = list()
+    cls = Modules.select(run, module)
+    if cls is None:
+        logger.error("Failed to identify data in {}"
+                     .format(run))
+        return scans
+    recording = cls(rec_path=run)
+    if not recording or len(recording.files) == 0:
+        logger.error("unable to load data in folder {}"
+                     .format(run))
+        return scans
+    recording.setBidsSession(scan)
+    try:
+        coin(destination, recording, bidsmap, dry_run, scans, src_index)
+    except Exception as err:
+        exceptions.ReportError(err)
+        logger.error("Error processing folder {} in file {}"
+                     .format(run, recording.currentFile(True)))
+    return scans
+
+
+def workerrun(destination: str,
+              scan: BidsSession,
+              run: str,
+              module: str,
+              dry_run: bool,
+              src_index: sourceindex.SourceIndex = None) -> list:
+    """
+    Executes bidsifyrun in worker process, using the bidsmap
+    loaded by initworker
+    """
+    return bidsifyrun(destination, scan, run, module,
+                      worker_bidsmap, dry_run, src_index)
+
+
+def initworker(bidsmapfile: str) -> None:
+    """
+    Loads bidsmap in worker process, if not inherited
+    from main process
+    """
+    global worker_bidsmap
+    if worker_bidsmap is None:
+        worker_bidsmap = Bidsmap(bidsmapfile)
+
+
+def writescans(scans: list) -> None:
+    """
+    Writes the collected scans.tsv entries, each file being
+    opened once, and lines written in the order of collection
+
+    Parameters
+    ----------
+    scans: list
+        list of (path to scans.tsv, line) entries
+    """
+    lines = dict()
+    for scans_tsv, line in scans:
+        lines.setdefault(scans_tsv, []).append(line)
+    for scans_tsv, tsv_lines in lines.items():
+        Modules.baseModule.writeScans(scans_tsv, tsv_lines)
+
+
+def endsessions(pending: list, wait: bool) -> None:
+    """
+    Collects the runs bidsified in worker processes, writes
+    scans.tsv for each finished session and executes SessionEndEP
+    and SubjectEndEP, following the original order of sessions
+    and subjects
+
+    Parameters
+    ----------
+    pending: list
+        list of (BidsSession, [tasks]) for sessions, and
+        (BidsSession, None) for subjects, waiting for
+        their runs, processed entries are removed from list
+    wait: bool
+        if True, waits for all runs to finish, if False
+        stops at first session with unfinished runs
+    """
+    while pending:
+        scan, tasks = pending[0]
+        if tasks is None:
+            plugins.RunPlugin("SubjectEndEP", scan)
+        else:
+            if not wait and not all(task.ready() for task in tasks):
+                return
+            scans = list()
+            for task in tasks:
+                scans.extend(parallel.collectResult(task, conflicting=True))
+            writescans(scans)
+            plugins.RunPlugin("SessionEndEP", scan)
+        pending.pop(0)
+
+
 def bidsify(source: str, destination: str,
             plugin_file: str = "",
             plugin_opt: dict = {},
@@ -124,7 +343,13 @@ def bidsify(source: str, destination: str,
             ses_skip_dir: bool = False,
             part_template: str = "",
             bidsmapfile: str = "bidsmap.yaml",
-            dry_run: bool = False
+            partial_headers: bool = False,
+            series_fields: bool = False,
+            series_check: int = 0,
+            dry_run: bool = False,
+            jobs: int = 1,
+            resume: bool = False,
+            fingerprint: bool = False
             ) -> None:
     """
     Bidsify prepearde dataset in source and place it in
@@ -171,9 +396,29 @@ def bidsify(source: str, destination: str,
         The name of bidsmap file, will be searched for
         in destination/code/bidsmap directory, unless
         path is absolute
+    partial_headers: bool
+        if set to True, only the fields used by bidsmap
+        are parsed from file headers, if supported by format
+    series_fields: bool
+        if set to True, the values of series-invariant fields
+        are retrieved once per recording
+    series_check: int
+        if positive, the cached values of series-invariant
+        fields are checked each series_check files
     dry_run: bool
         if set to True, no disk writing operations
         will be performed
+    jobs: int
+        number of worker processes used to bidsify runs,
+        if 1, runs are bidsified sequentially in main process
+    resume: bool
+        if set to True, files already bidsified from unchanged
+        source with unchanged run are skipped, and partially
+        bidsified files are bidsified again, using the index of
+        source recordings in destination/code/bidsme
+    fingerprint: bool
+        if set to True, the content fingerprint of files is
+        used to detect changed recordings
     """
 
     logger.info("-------------- Prepearing data -------------")
@@ -233,6 +478,10 @@ def bidsify(source: str, destination: str,
         logger.critical("Map contains {} unchecked runs"
                         .format(nunchecked))
         raise Exception("Unchecked runs present")
+    if partial_headers:
+        bidsmap.declareFields()
+    if series_fields:
+        bidsmap.declareSeriesFields(series_check)
 
     ###############
     # Plugin setup
@@ -278,112 +527,154 @@ def bidsify(source: str, destination: str,
     # df_sub = pandas.read_csv(new_sub_file,
     # old_sub = None
 
+    src_index = None
+    if resume and not dry_run:
+        src_index = sourceindex.SourceIndex(
+                destination, "bidsify",
+                sourceindex.digest(info.version(),
+                                   sourceindex.fileDigest(plugin_file),
+                                   plugin_opt),
+                fingerprint)
+
     ##############################
     # Subjects loop
     ##############################
-    n_subjects = len(source_sub_table.df["participant_id"])
-    for index, sub_row in source_sub_table.df.iterrows():
-        sub_no = index + 1
-        sub_id = sub_row["participant_id"]
-        sub_dir = os.path.join(source, sub_id)
-        if not os.path.isdir(sub_dir):
-            logger.error("{}: Not found in {}"
-                         .format(sub_id, source))
-            continue
-
-        scan = BidsSession()
-        scan.in_path = sub_dir
-        scan.subject = sub_id
-
-        #################################################
-        # Cloning df_sub row values in scans sub_values
-        #################################################
-        for column in source_sub_table.df.columns:
-            if pandas.isna(sub_row[column]):
-                scan.sub_values[column] = None
-            else:
-                scan.sub_values[column] = sub_row[column]
+    pool = None
+    if jobs > 1:
+        global worker_bidsmap
+        worker_bidsmap = bidsmap
+        pool = parallel.createPool(jobs, part_template,
+                                   plugin_file,
+                                   dict(source=source,
+                                        destination=destination,
+                                        dry=dry_run,
+                                        **plugin_opt),
+                                   initworker, (bidsmapfile,))
+    # sessions and subjects waiting for runs processed by workers
+    pending = list()
 
-        if plugins.RunPlugin("SubjectEP", scan) < 0:
-            logger.warning("Subject {} discarded by {}"
-                           .format(scan.subject, "SubjectEP"))
-            continue
-        # locking subjects here allows renaming in bidsification
-        # the files will be stored in appropriate folders
-        scan.lock_subject()
+    try:
+        n_subjects = len(source_sub_table.df["participant_id"])
+        for index, sub_row in source_sub_table.df.iterrows():
+            sub_no = index + 1
+            sub_id = sub_row["participant_id"]
+            sub_dir = os.path.join(source, sub_id)
+            if not os.path.isdir(sub_dir):
+                logger.error("{}: Not found in {}"
+                             .format(sub_id, source))
+                continue
 
-        if not scan.isSubValid():
-            logger.error("{}: Subject id '{}' is not valid"
-                         .format(sub_id, scan.subject))
-            continue
+            scan = BidsSession()
+            scan.in_path = sub_dir
+            scan.subject = sub_id
+
+            #################################################
+            # Cloning df_sub row values in scans sub_values
+            #################################################
+            for column in source_sub_table.df.columns:
+                if pandas.isna(sub_row[column]):
+                    scan.sub_values[column] = None
+                else:
+                    scan.sub_values[column] = sub_row[column]
+
+            if plugins.RunPlugin("SubjectEP", scan) < 0:
+                logger.warning("Subject {} discarded by {}"
+                               .format(scan.subject, "SubjectEP"))
+                continue
+            # locking subjects here allows renaming in bidsification
+            # the files will be stored in appropriate folders
+            scan.lock_subject()
 
-        if tools.skipEntity(scan.subject, sub_list,
-                            dest_sub_table.getIndexes()
-                            if sub_skip_tsv else None,
-                            destination if sub_skip_dir else ""):
-            logger.info("Skipping subject '{}'"
-                        .format(scan.subject))
-            continue
+            if not scan.isSubValid():
+                logger.error("{}: Subject id '{}' is not valid"
+                             .format(sub_id, scan.subject))
+                continue
 
-        ses_dirs = tools.lsdirs(sub_dir, 'ses-*')
-        if not ses_dirs:
-            logger.error("{}: No sessions found in: {}"
-                         .format(scan.subject, sub_dir))
-            continue
+            if tools.skipEntity(scan.subject, sub_list,
+                                dest_sub_table.getIndexes()
+                                if sub_skip_tsv else None,
+                                destination if sub_skip_dir else ""):
+                logger.info("Skipping subject '{}'"
+                            .format(scan.subject))
+                continue
 
-        for ses_dir in ses_dirs:
-            scan.in_path = ses_dir
-            logger.info("{} ({}/{}): Scanning folder {}"
-                        .format(scan.subject,
-                                sub_no,
-                                n_subjects,
-                                ses_dir))
-            scan.unlock_session()
-            scan.session = os.path.basename(ses_dir)
-            if plugins.RunPlugin("SessionEP", scan) < 0:
-                logger.warning("Session {} discarded by {}"
-                               .format(scan.session, "SessionEP"))
+            ses_dirs = tools.lsdirs(sub_dir, 'ses-*')
+            if not ses_dirs:
+                logger.error("{}: No sessions found in: {}"
+                             .format(scan.subject, sub_dir))
                 continue
 
-            scan.lock()
+            for ses_dir in ses_dirs:
+                scan.in_path = ses_dir
+                logger.info("{} ({}/{}): Scanning folder {}"
+                            .format(scan.subject,
+                                    sub_no,
+                                    n_subjects,
+                                    ses_dir))
+                scan.unlock_session()
+                scan.session = os.path.basename(ses_dir)
+                if plugins.RunPlugin("SessionEP", scan) < 0:
+                    logger.warning("Session {} discarded by {}"
+                                   .format(scan.session, "SessionEP"))
+                    continue
 
-            if ses_skip_dir and tools.skipEntity(scan.session,
-                                                 [], None,
-                                                 os.path.join(destination,
-                                                              scan.subject)):
-                logger.info("Skipping session '{}'"
-                            .format(scan.session))
-                continue
+                scan.lock()
 
-            for module in Modules.selector.types_list:
-                mod_dir = os.path.join(ses_dir, module)
-                if not os.path.isdir(mod_dir):
-                    logger.debug("Module {} not found in {}"
-                                 .format(module, ses_dir))
+                if ses_skip_dir and tools.skipEntity(
+                        scan.session, [], None,
+                        os.path.join(destination, scan.subject)):
+                    logger.info("Skipping session '{}'"
+                                .format(scan.session))
                     continue
-                for run in tools.lsdirs(mod_dir):
-                    scan.in_path = run
-                    cls = Modules.select(run, module)
-                    if cls is None:
-                        logger.error("Failed to identify data in {}"
-                                     .format(run))
-                        continue
-                    recording = cls(rec_path=run)
-                    if not recording or len(recording.files) == 0:
-                        logger.error("unable to load data in folder {}"
-                                     .format(run))
-                        continue
-                    recording.setBidsSession(scan)
-                    try:
-                        coin(destination, recording, bidsmap, dry_run)
-                    except Exception as err:
-                        exceptions.ReportError(err)
-                        logger.error("Error processing folder {} in file {}"
-                                     .format(run, recording.currentFile(True)))
-            plugins.RunPlugin("SessionEndEP", scan)
 
-        scan.in_path = sub_dir
-        plugins.RunPlugin("SubjectEndEP", scan)
+                scans = list()
+                tasks = list()
+                for module in Modules.selector.types_list:
+                    mod_dir = os.path.join(ses_dir, module)
+                    if not os.path.isdir(mod_dir):
+                        logger.debug("Module {} not found in {}"
+                                     .format(module, ses_dir))
+                        continue
+                    for run in tools.lsdirs(mod_dir):
+                        scan.in_path = run
+                        if pool is None:
+                            scans.extend(bidsifyrun(destination, scan,
+                                                    run, module,
+                                                    bidsmap, dry_run,
+                                                    src_index))
+                        else:
+                            tasks.append(pool.apply_async(
+                                parallel.runTask,
+                                (workerrun, destination, deepcopy(scan),
+                                 run, module, dry_run, src_index)))
+                scan.in_path = ses_dir
+                if pool is None:
+                    writescans(scans)
+                    plugins.RunPlugin("SessionEndEP", scan)
+                else:
+                    pending.append((deepcopy(scan), tasks))
+                    endsessions(pending, False)
+
+            scan.in_path = sub_dir
+            if pool is None:
+                plugins.RunPlugin("SubjectEndEP", scan)
+            else:
+                pending.append((scan, None))
+                endsessions(pending, False)
+
+        if pool is not None:
+            endsessions(pending, True)
+            # workers exit once all tasks are done, terminating
+            # the pool may deadlock and is used only on errors
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if src_index is not None:
+            src_index.close()
 
     ##################################
     # Merging the participants table
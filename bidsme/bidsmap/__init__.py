@@ -1,4 +1,6 @@
+from ._dependencies import Dependencies
 from ._run import Run
+from ._matcher import Matcher
 from ._bidsmap import Bidsmap
 
-__all__ = ["Run", "Bidsmap"]
+__all__ = ["Dependencies", "Run", "Matcher", "Bidsmap"]
@@ -34,6 +34,8 @@ from bidsme.tools import info
 from bidsme.tools.yaml import yaml
 
 from ._run import Run
+from ._dependencies import Dependencies
+from ._matcher import Matcher
 from bidsme import Modules
 
 logger = logging.getLogger(__name__)
@@ -42,7 +44,9 @@ logger = logging.getLogger(__name__)
 class Bidsmap(object):
     __slots__ = ["Modules",
                  "filename",
-                 "version"
+                 "version",
+                 "series_fields",   # module: format: include/exclude
+                 "_matchers"    # (module, format): Matcher
                  ]
 
     def __init__(self, yamlfile='bidsmap.yaml'):
@@ -53,6 +57,8 @@ class Bidsmap(object):
             YAML file to load
         """
         self.version = info.bidsversion()
+        self._matchers = dict()
+        self.series_fields = dict()
 
         self.Modules = {mod: {t.__name__: dict() for t in types}
                         for mod, types in Modules.types_list.items()
@@ -90,6 +96,9 @@ class Bidsmap(object):
                            .format(yamlfile, ver, info.version())
                            )
 
+        self.__loadSeriesFields(yaml_map.get("__series_fields__"),
+                                yamlfile)
+
         # Over Modules (MRI, EEG etc..)
         for module in self.Modules:
             if module not in yaml_map or not yaml_map[module]:
@@ -155,10 +164,50 @@ class Bidsmap(object):
                             raise
                         self.Modules[module][f_name][m_name][ind] = r
 
+    def __loadSeriesFields(self, section: dict, yamlfile: str) -> None:
+        """
+        Loads the '__series_fields__' section of bidsmap, listing
+        for each module and format the fields to include to or
+        exclude from series-invariant fields declared by format:
+
+        __series_fields__:
+          MRI:
+            DICOM:
+              include: [EchoTime]
+              exclude: [PatientAge]
+        """
+        if not section:
+            return
+        if not isinstance(section, dict):
+            logger.error("{}: Malformed __series_fields__ section"
+                         .format(os.path.basename(yamlfile)))
+            raise TypeError("Malformed map")
+        for module, formats in section.items():
+            if module not in self.Modules or not isinstance(formats, dict):
+                logger.warning("__series_fields__: module {} not found"
+                               .format(module))
+                continue
+            for f_name, fields in formats.items():
+                if f_name not in self.Modules[module]:
+                    logger.warning("__series_fields__: type {}/{} not found"
+                                   .format(module, f_name))
+                    continue
+                if not isinstance(fields, dict):
+                    logger.error("__series_fields__: {}/{} must be "
+                                 "a dictionary with include and "
+                                 "exclude lists".format(module, f_name))
+                    raise TypeError("Malformed map")
+                self.series_fields.setdefault(module, dict())[f_name] = {
+                        "include": list(fields.get("include") or []),
+                        "exclude": list(fields.get("exclude") or [])}
+
     def match_run(self, recording: object,
                   check_multiple: bool = True, fix: bool = False) -> tuple:
         """
-        Matches run for given recording
+        Matches run for given recording.
+        Matched runs are cached by values of recording
+        attributes, the cache is reset when runs are added
+        or merged
 
         Parameters:
         -----------
@@ -180,30 +229,29 @@ class Bidsmap(object):
         res_index = None
         res_run = None
         d = self.Modules[recording.Module()][recording.Type()]
-        for modality, r_list in d.items():
-            for idx, run in enumerate(r_list):
-                if recording.match_run(run):
-                    if check_multiple:
-                        if res_mod is None:
-                            recording.setLabels(run)
-                            res_mod = modality
-                            res_index = idx
-                            res_run = run
-                            if not run.provenance:
-                                run.provenance = recording.currentFile()
-                                run.checked = False
-                                run.example = "{}/{}".format(
-                                        modality,
-                                        recording.getBidsname())
-                            logger.debug("Checked run: {}/{}"
-                                         .format(res_mod, res_index))
-                        else:
-                            logger.warning("{}/{}: also checks run: {}/{}"
-                                           .format(res_mod, res_index,
-                                                   modality, idx))
-                    else:
-                        recording.setLabels(run)
-                        break
+        matcher = self.getMatcher(recording.Module(), recording.Type())
+        for modality, idx, run in matcher.matches(recording):
+            if check_multiple:
+                if res_mod is None:
+                    recording.setLabels(run)
+                    res_mod = modality
+                    res_index = idx
+                    res_run = run
+                    if not run.provenance:
+                        run.provenance = recording.currentFile()
+                        run.checked = False
+                        run.example = "{}/{}".format(
+                                modality,
+                                recording.getBidsname())
+                    logger.debug("Checked run: {}/{}"
+                                 .format(res_mod, res_index))
+                else:
+                    logger.warning("{}/{}: also checks run: {}/{}"
+                                   .format(res_mod, res_index,
+                                           modality, idx))
+            else:
+                recording.setLabels(run)
+                break
         if res_mod and res_mod != d[res_mod][res_index].modality:
             logger.warning("Run {}/{}/{} mismach modality {}"
                            .format(recording.formatIdentity(),
@@ -216,12 +264,45 @@ class Bidsmap(object):
                 if val:
                     res_run.set_attribute(att, recording.getField(att))
             res_run.provenance = recording.currentFile()
+            res_run.example = "{}/{}".format(res_mod,
+                                             recording.getBidsname())
         if res_run is None:
             res_run = Run(modality="__unknown__",
                           attribute=recording.attributes,
                           provenance=recording.currentFile())
         return (res_mod, res_index, res_run)
 
+    def getMatcher(self, module: str, form: str) -> Matcher:
+        """
+        Returns the matcher of runs of given module and format.
+        Matchers are created at first use, and are reset when
+        runs are added or merged.
+
+        Parameters:
+        -----------
+        module: str
+            name of module
+        form: str
+            name of format
+
+        Returns:
+        --------
+        Matcher
+        """
+        key = (module, form)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = Matcher(self.Modules[module][form])
+            self._matchers[key] = matcher
+        return matcher
+
+    def resetMatchers(self) -> None:
+        """
+        Removes compiled matchers. Must be called if attributes
+        of runs are modified outside of Bidsmap methods
+        """
+        self._matchers.clear()
+
     def add_run(self, run: Run, module: str, form: str) -> tuple:
         """
         Add new run to list for given module and format.
@@ -244,6 +325,7 @@ class Bidsmap(object):
         """
         run = copy(run)
         run.save()
+        self._matchers.pop((module, form), None)
         if run.modality in self.Modules[module][form]:
             self.Modules[module][form][run.modality].append(run)
         else:
@@ -252,6 +334,98 @@ class Bidsmap(object):
                 len(self.Modules[module][form][run.modality]) - 1,
                 run)
 
+    def merge(self, other: "Bidsmap", dedupe: bool = True) -> None:
+        """
+        Merges runs from other bidsmap into this one, following
+        the order of runs in other.
+
+        If dedupe is True, runs equivalent to an existing one
+        (same modality, suffix, attributes and defined entities)
+        are not added, instead the existing run is completed:
+        provenance and example are taken from other run if not
+        yet defined, and missing json fields and entities are
+        added. Non-equivalent runs are appended.
+
+        Merging partial bidsmaps created from a same original
+        map in the order of processing gives the same result as
+        processing all recordings with one bidsmap.
+
+        Parameters:
+        -----------
+        other: Bidsmap
+            bidsmap to merge
+        dedupe: bool
+            if True, equivalent runs are merged, if False all
+            runs from other are appended
+        """
+        self.resetMatchers()
+        for module, formats in other.Modules.items():
+            for f_name, form in formats.items():
+                dest = self.Modules[module][f_name]
+                for modality, r_list in form.items():
+                    if modality not in dest:
+                        dest[modality] = list()
+                    d_list = dest[modality]
+                    for idx, run in enumerate(r_list):
+                        target = None
+                        if dedupe:
+                            # runs present in original map are
+                            # at same position
+                            if idx < len(d_list)\
+                                    and self.__equivalent(d_list[idx], run):
+                                target = d_list[idx]
+                            else:
+                                for r in d_list:
+                                    if self.__equivalent(r, run):
+                                        target = r
+                                        break
+                        if target is None:
+                            d_list.append(copy(run))
+                            continue
+                        if not target.provenance and run.provenance:
+                            target.provenance = run.provenance
+                            target.example = run.example
+                            target.checked = run.checked
+                        for key, val in run.entity.items():
+                            if key not in target.entity:
+                                target.entity[key] = val
+                        for key, val in run.json.items():
+                            if key not in target.json:
+                                target.json[key] = val
+
+    @staticmethod
+    def __equivalent(run1: Run, run2: Run) -> bool:
+        """
+        Checks if two runs are equivalent, i.e. have same
+        modality, suffix, attributes and defined entities
+        """
+        if run1.modality != run2.modality:
+            return False
+        if run1.suffix != run2.suffix:
+            return False
+        if run1.attribute != run2.attribute:
+            return False
+        ent1 = {key: val for key, val in run1.entity.items()
+                if val is not None}
+        ent2 = {key: val for key, val in run2.entity.items()
+                if val is not None}
+        return ent1 == ent2
+
+    def __getstate__(self) -> dict:
+        """
+        Matchers are not copied nor pickled, and are
+        re-created at first use
+        """
+        return {"Modules": self.Modules,
+                "filename": self.filename,
+                "version": self.version,
+                "series_fields": self.series_fields}
+
+    def __setstate__(self, state: dict) -> None:
+        for key, val in state.items():
+            setattr(self, key, val)
+        self._matchers = dict()
+
     def save(self, filename: str,
              empty_modules: bool = False,
              empty_attributes: bool = True) -> None:
@@ -272,6 +446,8 @@ class Bidsmap(object):
         # building dictionary
         d = dict()
         d["__bids__"] = self.version
+        if self.series_fields:
+            d["__series_fields__"] = self.series_fields
 
         # Modules
         for m_name, module in self.Modules.items():
@@ -346,6 +522,87 @@ class Bidsmap(object):
                               if val > 1}
         return (prov_duplicates, example_duplicates)
 
+    def getDependencies(self, module: str, form: str) -> Dependencies:
+        """
+        Returns the values used by all runs of given module
+        and format
+
+        Parameters:
+        -----------
+        module: str
+            name of module
+        form: str
+            name of format
+
+        Returns:
+        --------
+        Dependencies
+        """
+        res = Dependencies()
+        if module not in self.Modules or form not in self.Modules[module]:
+            return res
+        for runs in self.Modules[module][form].values():
+            for run in runs:
+                if run is not None:
+                    res.update(run.getDependencies())
+        return res
+
+    def declareFields(self, *others: "Bidsmap") -> None:
+        """
+        Declares to each format the fields used by the runs
+        of this and given bidsmaps, allowing formats to parse
+        only these fields from file headers
+
+        Parameters:
+        -----------
+        others: Bidsmap
+            additional bidsmaps used with this one
+        """
+        for module, types in Modules.types_list.items():
+            for cls in types:
+                deps = self.getDependencies(module, cls.__name__)
+                for other in others:
+                    deps.update(other.getDependencies(module, cls.__name__))
+                cls.setRequiredFields(deps.fieldNames())
+
+    def mergeSeriesFields(self, *others: "Bidsmap") -> None:
+        """
+        Copies the '__series_fields__' sections of given bidsmaps
+        for formats not defined in this one, so they are saved
+        with this bidsmap.
+
+        Parameters:
+        -----------
+        others: Bidsmap
+            additional bidsmaps used with this one
+        """
+        for other in others:
+            for module, formats in other.series_fields.items():
+                dest = self.series_fields.setdefault(module, dict())
+                for f_name, fields in formats.items():
+                    if f_name not in dest:
+                        dest[f_name] = copy(fields)
+
+    def declareSeriesFields(self, check: int = 0) -> None:
+        """
+        Enables for each format the caching of series-invariant
+        fields, declared by format and completed by
+        '__series_fields__' section of this bidsmap.
+
+        Parameters:
+        -----------
+        check: int
+            if positive, cached values are checked against
+            the value of file each check files
+        """
+        for module, types in Modules.types_list.items():
+            for cls in types:
+                fields = self.series_fields.get(module, {})\
+                        .get(cls.__name__, {})
+                cls.setSeriesFields(fields.get("include", ()),
+                                    fields.get("exclude", ()),
+                                    check)
+
     def countRuns(self, module: str = "") -> tuple:
         """
         returns tuple (run, template, unchecked) of
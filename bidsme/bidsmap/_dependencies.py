@@ -0,0 +1,203 @@
+###############################################################################
+# _dependencies.py defines Dependencies class that lists the values
+# referenced by templates and attributes of runs and metafields
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# characteristics ('<<name>>') with same value for all files of a serie
+series_characteristics = frozenset(("subject", "session",
+                                    "serieNumber", "serie",
+                                    "nfiles", "modality", "module",
+                                    "placeholder", "None"))
+
+# prefixes ('<<prefix:name>>') with same value for all files of a serie
+series_prefixes = frozenset(("sub_tsv",))
+
+
+class Dependencies(object):
+    """
+    Values referenced by templates and attributes, as interpreted by
+    Modules.baseModule.getDynamicField and getAttribute:
+        - fields ('<prefix:field/path>' in templates or attribute
+          names), retrieved from recording header, with their
+          transformation prefixes
+        - characteristics ('<<name>>'), retrieved from recording state
+        - labels ('<<prefix:name>>'), retrieved from bids labels,
+          custom values, participant and scans tables or file name
+
+    Dependencies are extracted without reading any file, and allows
+    to plan the reading of headers before processing recordings.
+    """
+    __slots__ = ["fields", "characteristics", "labels"]
+
+    # scopes of values
+    CONSTANT = "constant"
+    SERIES = "series"
+    FILE = "file"
+
+    def __init__(self):
+        # field (with path to nested values): set of prefixes
+        self.fields = dict()
+        # set of characteristics names
+        self.characteristics = set()
+        # prefix: set of names
+        self.labels = dict()
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.characteristics or self.labels)
+
+    def __repr__(self) -> str:
+        return "Dependencies(fields={}, characteristics={}, labels={})"\
+            .format(sorted(self.fields),
+                    sorted(self.characteristics),
+                    {k: sorted(v) for k, v in self.labels.items()})
+
+    def addField(self, field: str) -> None:
+        """
+        Adds a field, as passed to getField, i.e. with optional
+        transformation prefixes separated by ':'
+
+        Parameters
+        ----------
+        field: str
+            field to add, e.g. 'scale-3:EchoTime'
+        """
+        actions = field.split(":")
+        name = actions.pop(-1)
+        self.fields.setdefault(name, set()).update(actions)
+
+    def addTemplate(self, template: object) -> None:
+        """
+        Adds all values referenced in given template.
+        Lists and dictionaries are searched recursively, other
+        non-string values are ignored
+
+        Parameters
+        ----------
+        template: str, list, dict
+            template to parse
+        """
+        if isinstance(template, dict):
+            for val in template.values():
+                self.addTemplate(val)
+            return
+        if isinstance(template, (list, tuple)):
+            for val in template:
+                self.addTemplate(val)
+            return
+        if not isinstance(template, str):
+            return
+
+        start = 0
+        while True:
+            pos = template.find('<', start)
+            if pos < 0:
+                break
+            if template[pos + 1:pos + 2] == "<":
+                pos2 = template.find(">>", pos + 2)
+                if pos2 < 0:
+                    break
+                query = template[pos + 2:pos2]
+                if ":" in query:
+                    prefix, query = query.split(":", 1)
+                else:
+                    prefix = ""
+                if prefix == "":
+                    self.characteristics.add(query)
+                else:
+                    self.labels.setdefault(prefix, set()).add(query)
+                start = pos2 + 2
+            else:
+                pos2 = template.find(">", pos + 1)
+                if pos2 < 0:
+                    break
+                self.addField(template[pos + 1:pos2])
+                start = pos2 + 1
+
+    def update(self, other: "Dependencies") -> None:
+        """
+        Adds all values referenced by other dependencies
+        """
+        for name, actions in other.fields.items():
+            self.fields.setdefault(name, set()).update(actions)
+        self.characteristics.update(other.characteristics)
+        for prefix, names in other.labels.items():
+            self.labels.setdefault(prefix, set()).update(names)
+
+    def fieldNames(self) -> set:
+        """
+        Returns set of referenced fields, without prefixes
+        """
+        return set(self.fields)
+
+    def prefixes(self) -> set:
+        """
+        Returns set of all transformation prefixes of
+        fields and of prefixes of labels
+        """
+        res = set(self.labels)
+        for actions in self.fields.values():
+            res.update(actions)
+        return res
+
+    def scopes(self, cls: type) -> dict:
+        """
+        Classifies each referenced value as per-series ('series')
+        or per-file ('file'), i.e. if its value is the same for all
+        files of a serie or may change from file to file.
+
+        Fields are classified by fieldScope of given format class,
+        the values are keyed by template notation:
+        'field', '<<characteristic>>' and '<<prefix:label>>'
+
+        Parameters
+        ----------
+        cls: type
+            format class used to classify fields
+
+        Returns
+        -------
+        dict
+        """
+        res = dict()
+        for name in self.fields:
+            res[name] = cls.fieldScope(name)
+        for name in self.characteristics:
+            res["<<{}>>".format(name)] = self.SERIES\
+                if name in series_characteristics else self.FILE
+        for prefix, names in self.labels.items():
+            for name in names:
+                res["<<{}:{}>>".format(prefix, name)] = self.SERIES\
+                    if prefix in series_prefixes else self.FILE
+        return res
+
+    def isSeriesInvariant(self, cls: type) -> bool:
+        """
+        Returns True if all referenced values are the same
+        for all files of a serie of given format class
+        """
+        return all(scope == self.SERIES
+                   for scope in self.scopes(cls).values())
@@ -0,0 +1,308 @@
+###############################################################################
+# _matcher.py defines Matcher class that matches recordings against
+# the runs of one format, using compiled attributes patterns
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import re
+import logging
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# maximum number of distinct attributes values kept in cache
+max_cached = 4096
+
+# characters with special meaning in regular expressions
+regex_chars = frozenset(".^$*+?{}[]\\|()")
+
+# kinds of compiled patterns
+_EQUAL = 0    # non-string value, compared by equality
+_REGEX = 1    # compiled regular expression
+_INVALID = 2  # invalid regular expression, fails when matched
+
+
+def isLiteral(pattern: object) -> bool:
+    """
+    Returns True if pattern is a string without regular expression
+    special characters, i.e. matches only the string itself
+    """
+    return isinstance(pattern, str)\
+        and regex_chars.isdisjoint(pattern)
+
+
+def compilePattern(pattern: object) -> list:
+    """
+    Compiles the pattern of an attribute, as interpreted
+    by tools.match_value: strings are regular expressions
+    matching the whole (stripped) value, other values are
+    compared by equality. Lists match if any of their
+    elements match.
+
+    Invalid regular expressions are reported, and raises
+    re.error only when matched, as uncompiled ones.
+
+    Parameters
+    ----------
+    pattern: object
+        pattern to compile
+
+    Returns
+    -------
+    list
+        list of (kind, compiled pattern)
+    """
+    if not isinstance(pattern, list):
+        pattern = [pattern]
+    res = list()
+    for val in pattern:
+        if not isinstance(val, str):
+            res.append((_EQUAL, val))
+            continue
+        val = val.strip()
+        try:
+            res.append((_REGEX, re.compile(val)))
+        except re.error as e:
+            logger.warning("Invalid attribute pattern '{}': {}"
+                           .format(val, e))
+            res.append((_INVALID, val))
+    return res
+
+
+def matchCompiled(value: object, compiled: list) -> bool:
+    """
+    Returns True if value matches one of compiled patterns
+    """
+    str_val = None
+    for kind, pattern in compiled:
+        if kind == _EQUAL:
+            if value == pattern:
+                return True
+            continue
+        if str_val is None:
+            str_val = str(value).strip()
+        if kind == _INVALID:
+            # raises same exception as uncompiled pattern
+            re.fullmatch(pattern, str_val)
+        elif pattern.fullmatch(str_val) is not None:
+            return True
+    return False
+
+
+class Matcher(object):
+    """
+    Matches recordings against the runs of one format of bidsmap.
+
+    Attributes patterns are compiled once, and runs are indexed
+    by the value of their first matched attribute if it is
+    a literal string (or list of literal strings). For a given
+    recording, only the runs listed under the value of their
+    indexed attribute, and the not indexed ones, are evaluated.
+
+    The runs are evaluated in the order of bidsmap, and the result
+    is the same as recording.match_run for each run.
+
+    The matched runs are cached by the values of all attributes
+    used by runs, so recordings with same values (for ex. files
+    of a same serie) are matched only once.
+    """
+    __slots__ = ["runs", "attributes", "_index", "_unindexed",
+                 "_cache", "hits", "misses"]
+
+    def __init__(self, form: dict):
+        """
+        Parameters
+        ----------
+        form: dict
+            dictionary modality: list of runs, as stored
+            in Bidsmap.Modules[module][format]
+        """
+        # list of (modality, index, run, compiled attributes)
+        self.runs = list()
+        # list of all matched attributes, in order of appearence
+        self.attributes = list()
+        # indexed attribute: {literal value: list of positions}
+        self._index = dict()
+        # positions of not indexed runs
+        self._unindexed = list()
+        # attributes values: list of matched runs
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        attributes = dict()
+        for modality, r_list in form.items():
+            for idx, run in enumerate(r_list):
+                if run is None:
+                    continue
+                compiled = [(attr, compilePattern(pattern))
+                            for attr, pattern in run.attribute.items()
+                            if pattern is not None]
+                if run.attribute and not compiled:
+                    # run with only void attributes never matches
+                    continue
+                pos = len(self.runs)
+                self.runs.append((modality, idx, run, compiled))
+                for attr, _ in compiled:
+                    attributes[attr] = None
+                self.__indexRun(pos, run)
+        self.attributes = list(attributes)
+
+    def __indexRun(self, pos: int, run: object) -> None:
+        """
+        Adds run at given position to the index, using its first
+        attribute with defined pattern
+        """
+        for attr, pattern in run.attribute.items():
+            if pattern is None:
+                continue
+            values = pattern if isinstance(pattern, list) else [pattern]
+            if values and all(isLiteral(val) for val in values):
+                bucket = self._index.setdefault(attr, dict())
+                for val in values:
+                    bucket.setdefault(val.strip(), list()).append(pos)
+                return
+            break
+        self._unindexed.append(pos)
+
+    def values(self, recording: object) -> dict:
+        """
+        Returns the values of all attributes used by runs
+        for given recording, without storing them in
+        recording attributes
+        """
+        return {attr: recording.getMatchValue(attr, store=False)
+                for attr in self.attributes}
+
+    def candidates(self, values: dict) -> list:
+        """
+        Returns ordered list of positions of runs that may
+        match given attributes values
+        """
+        res = set(self._unindexed)
+        for attr, bucket in self._index.items():
+            value = values.get(attr)
+            if value is None:
+                continue
+            res.update(bucket.get(str(value).strip(), ()))
+        return sorted(res)
+
+    def key(self, values: dict) -> tuple:
+        """
+        Returns the key of given attributes values.
+
+        Values are represented by their type and string, as
+        values with same type and string match same patterns
+        """
+        res = list()
+        for attr in self.attributes:
+            value = values.get(attr)
+            res.append((type(value), str(value)))
+        return tuple(res)
+
+    def matches(self, recording: object) -> list:
+        """
+        Returns list of runs matched by given recording,
+        in order of bidsmap.
+
+        Recording attributes are completed with the attributes
+        retrieved when matching runs one by one, i.e. up to
+        the first not matching attribute of each run, so they
+        do not depend on the cache and index
+
+        Returns
+        -------
+        list of tuple
+            (modality, run index, run)
+        """
+        values = self.values(recording)
+        key = self.key(values)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            res, touched = cached
+        else:
+            self.misses += 1
+            res, touched = self.__match(values)
+            self._cache[key] = (res, touched)
+            while len(self._cache) > max_cached:
+                self._cache.popitem(last=False)
+        for attr in touched:
+            if attr not in recording.attributes:
+                recording.attributes[attr] = values[attr]
+        return res
+
+    def matchValues(self, values: dict) -> list:
+        """
+        Returns list of runs matched by given attributes
+        values, as returned by values method, in order of
+        bidsmap. Missing values are considered as undefined.
+
+        Returns
+        -------
+        list of tuple
+            (modality, run index, run)
+        """
+        return self.__match(values)[0]
+
+    def __match(self, values: dict) -> tuple:
+        """
+        Matches runs against given attributes values
+
+        Returns
+        -------
+        tuple(list, list)
+            list of matched (modality, run index, run),
+            and list of retrieved (non-dynamic) attributes,
+            in order of retrieval
+        """
+        res = list()
+        touched = dict()
+        candidates = set(self.candidates(values))
+        for pos, (modality, idx, run, compiled) in enumerate(self.runs):
+            if pos not in candidates:
+                # only the indexed (first) attribute is retrieved
+                touched[compiled[0][0]] = None
+                continue
+            if self.matchRun(values, compiled, touched):
+                res.append((modality, idx, run))
+        return res, [attr for attr in touched if not attr.startswith('<')]
+
+    @staticmethod
+    def matchRun(values: dict, compiled: list,
+                 touched: dict = None) -> bool:
+        """
+        Returns True if attributes values match all compiled
+        attributes. Run without attributes matches any values.
+
+        If touched is given, the retrieved attributes
+        are added to it
+        """
+        for attr, patterns in compiled:
+            if touched is not None:
+                touched[attr] = None
+            value = values.get(attr)
+            if value is None or not matchCompiled(value, patterns):
+                return False
+        return True
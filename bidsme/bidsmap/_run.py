@@ -30,6 +30,8 @@ from collections import OrderedDict
 
 from bidsme.tools.tools import check_type
 
+from ._dependencies import Dependencies
+
 logger = logging.getLogger(__name__)
 
 
@@ -432,6 +434,25 @@ class Run(object):
 
         return d
 
+    def getDependencies(self) -> Dependencies:
+        """
+        Returns the values used by run: the matched attributes,
+        and the values referenced in entities, suffix and json
+        templates
+
+        Returns
+        -------
+        Dependencies
+        """
+        res = Dependencies()
+        for attr, val in self.attribute.items():
+            if val is not None:
+                res.addField(attr)
+        res.addTemplate(list(self.entity.values()))
+        res.addTemplate(self.suffix)
+        res.addTemplate(self.json)
+        return res
+
     def genEntities(self, entities: list):
         """
         Completes the existing entities by entities from list
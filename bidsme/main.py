@@ -34,9 +34,12 @@ from bidsme.process import process
 from bidsme.bidsify import bidsify
 from bidsme.mapper import mapper
 
+from bidsme.Modules import baseModule
+
 from bidsme.tools import config
 from bidsme.tools import info
 from bidsme.tools import paths
+from bidsme.tools import prefetch
 
 
 def init(level="INFO",
@@ -115,6 +118,7 @@ def main(arguments: list):
     logger = init(args.level, args.formatter, args.quiet, log_dir)
 
     code = 0
+    baseModule.setPrefetch(args.prefetch, args.prefetch_size)
 
     try:
         if args.cmd == "prepare":
@@ -132,7 +136,10 @@ def main(arguments: list):
                     sub_no_dir=args.no_subject,
                     ses_no_dir=args.no_session,
                     data_dirs=args.recfolder,
-                    dry_run=args.dry_run
+                    dry_run=args.dry_run,
+                    jobs=args.jobs,
+                    incremental=args.incremental,
+                    fingerprint=args.fingerprint
                     )
         elif args.cmd == "process":
             process(source=args.source,
@@ -145,6 +152,9 @@ def main(arguments: list):
                     ses_skip_dir=args.skip_existing_sessions,
                     part_template=args.part_template,
                     bidsmapfile=args.bidsmap,
+                    partial_headers=args.partial_headers,
+                    series_fields=args.series_fields,
+                    series_check=args.series_check,
                     dry_run=args.dry_run
                     )
         elif args.cmd == "bidsify":
@@ -158,7 +168,13 @@ def main(arguments: list):
                     ses_skip_dir=args.skip_existing_sessions,
                     part_template=args.part_template,
                     bidsmapfile=args.bidsmap,
-                    dry_run=args.dry_run
+                    partial_headers=args.partial_headers,
+                    series_fields=args.series_fields,
+                    series_check=args.series_check,
+                    dry_run=args.dry_run,
+                    jobs=args.jobs,
+                    resume=args.resume,
+                    fingerprint=args.fingerprint
                     )
         elif args.cmd == "map":
             mapper(source=args.source,
@@ -172,7 +188,13 @@ def main(arguments: list):
                    process_all=args.process_all,
                    bidsmapfile=args.bidsmap,
                    map_template=args.template,
-                   dry_run=args.dry_run
+                   partial_headers=args.partial_headers,
+                   series_fields=args.series_fields,
+                   series_check=args.series_check,
+                   dry_run=args.dry_run,
+                   jobs=args.jobs,
+                   incremental=args.incremental,
+                   fingerprint=args.fingerprint
                    )
         else:
             raise ValueError("Invalid command")
@@ -182,6 +204,7 @@ def main(arguments: list):
 
     logger.info('-------------- FINISHED! -------------------')
     errors = info.reporterrors(logger)
+    prefetch.reportcounters(logger)
     logger.info("Took {} seconds".format(time.process_time()))
     logger.info('--------------------------------------------')
     if code == 0 and errors > 0:
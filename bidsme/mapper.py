@@ -27,6 +27,7 @@ import os
 import logging
 import pandas
 import glob
+from copy import deepcopy
 
 from bidsme import bidsmap
 from bidsme import plugins
@@ -35,18 +36,25 @@ from bidsme import Modules
 from bidsme.tools import paths
 from bidsme.tools import info
 from bidsme.tools import tools
+from bidsme.tools import parallel
+from bidsme.tools import sourceindex
 
 from bidsme.bidsMeta import BidsSession
 from bidsme.bidsMeta import BidsTable
 
 logger = logging.getLogger(__name__)
 
+# template and unknown bidsmap used by worker processes
+worker_maps = None
+
 
 def createmap(destination,
               recording: Modules.baseModule,
               bidsmap,
               template,
-              bidsmap_unk) -> None:
+              bidsmap_unk,
+              records: list = None,
+              match_values: bool = False) -> None:
 
     if plugins.RunPlugin("SequenceEP", recording) < 0:
         logger.warning("Sequence {} discarded by {}"
@@ -95,6 +103,15 @@ def createmap(destination,
                     recording.Module(),
                     recording.Type()
                     )
+        if records is not None:
+            record = sourceindex.SourceIndex.fileRecord(recording)
+            record["run"] = (modality, r_index)
+            if match_values:
+                # allows to match file against runs added from template
+                record["values"] = template.getMatcher(
+                        recording.Module(),
+                        recording.Type()).values(recording)
+            records.append(record)
 
         if modality != "__ignore__":
             bidsified_name = "{}/{}".format(modality, recording.getBidsname())
@@ -141,6 +158,540 @@ def createmap(destination,
     return first_name
 
 
+def maprecording(destination: str,
+                 scan: BidsSession,
+                 run: str,
+                 module: str,
+                 bidsified_list: list,
+                 bidsmap_new: bidsmap.Bidsmap,
+                 template: bidsmap.Bidsmap,
+                 bidsmap_unk: bidsmap.Bidsmap,
+                 src_index: sourceindex.SourceIndex = None,
+                 matched: list = None) -> bool:
+    """
+    Maps all files of given recording folder, updating
+    working bidsmap and bidsmap of unknown recordings
+
+    Parameters
+    ----------
+    destination: str
+        root folder of bidsified dataset
+    scan: BidsSession
+        session object with locked subject and session
+    run: str
+        path to the recording folder
+    module: str
+        name of data type (module) of recording
+    bidsified_list: list
+        list of bidsified names of first files of
+        recordings of session, updated with current one
+    bidsmap_new: Bidsmap
+        working bidsmap
+    template: Bidsmap
+        template bidsmap
+    bidsmap_unk: Bidsmap
+        bidsmap collecting unknown recordings
+    src_index: SourceIndex
+        index of mapped recordings
+    matched: list
+        if given, (session, folder, module, format, records,
+        messages count, bidsified names) of mapped recording
+        is appended to it, the records of files containing
+        the values of attributes of template runs, and the
+        bidsified names being the ones of session before
+        mapping recording
+
+    Returns
+    -------
+    bool:
+        True if recording generated errors or warnings
+    """
+    cls = Modules.selector.select(run, module)
+    if cls is None:
+        logger.error("Failed to identify data in {}"
+                     .format(os.path.dirname(run)))
+        return False
+    recording = cls(rec_path=run)
+    if not recording or len(recording.files) == 0:
+        logger.error("unable to load data in folder {}"
+                     .format(run))
+    recording.setBidsSession(scan)
+    names = list(bidsified_list)
+    err_count = info.counthandler.level2count.copy()
+    records = None
+    if src_index is not None or matched is not None:
+        records = list()
+    try:
+        first_name = createmap(destination, recording,
+                               bidsmap_new, template,
+                               bidsmap_unk, records,
+                               matched is not None)
+        if first_name in bidsified_list:
+            logger.error("Matches example of "
+                         "already processed run {}"
+                         .format(first_name))
+        elif first_name is not None:
+            bidsified_list.append(first_name)
+    except Exception as err:
+        first_name = None
+        logger.error("Error processing folder {} "
+                     "in file {}: {}"
+                     .format(run, recording.currentFile(True),
+                             err))
+    err_count = info.msg_count(err_count)
+    if matched is not None:
+        matched.append((deepcopy(scan), run, module, cls.Type(), records,
+                        err_count, names))
+    if src_index is not None:
+        if err_count:
+            src_index.discard(run)
+        else:
+            src_index.store(
+                    run, module, cls.Type(),
+                    {"name": first_name,
+                     "runs": [r["run"] for r in records],
+                     "section": sectiondigest(bidsmap_new,
+                                              module,
+                                              cls.Type())},
+                    records)
+    if err_count:
+        logger.info("Recording generated several "
+                    "errors/warnings")
+        return True
+    return False
+
+
+def mapsubject(destination: str,
+               scan: BidsSession,
+               ses_dirs: list,
+               sub_no: int, n_subjects: int,
+               ses_skip_dir: bool,
+               process_all: bool,
+               bidsmap_new: bidsmap.Bidsmap,
+               template: bidsmap.Bidsmap,
+               bidsmap_unk: bidsmap.Bidsmap,
+               matched: list = None,
+               src_index: sourceindex.SourceIndex = None,
+               start: tuple = None) -> bool:
+    """
+    Maps all recordings of given subject, updating working
+    bidsmap and bidsmap of unknown recordings
+
+    If src_index is given, the recordings unchanged since their
+    last mapping are skipped if the runs of their format in
+    working bidsmap are unchanged, and the recordings mapped
+    without errors or warnings are recorded in index
+
+    If start is given, the mapping restarts from given recording,
+    skipping the preceding sessions and recordings
+
+    Parameters
+    ----------
+    destination: str
+        root folder of bidsified dataset
+    scan: BidsSession
+        session object with locked subject
+    ses_dirs: list
+        list of session folders of subject
+    sub_no: int
+        number of subject, used for reporting
+    n_subjects: int
+        total number of subjects, used for reporting
+    ses_skip_dir: bool
+        if set to True, sessions with already
+        created directories will be ignored
+    process_all: bool
+        if set to False, mapping stops at first recording
+        that generated errors or warnings
+    bidsmap_new: Bidsmap
+        working bidsmap
+    template: Bidsmap
+        template bidsmap
+    bidsmap_unk: Bidsmap
+        bidsmap collecting unknown recordings
+    matched: list
+        if given, the mapped recordings are added to it,
+        as described in maprecording
+    src_index: SourceIndex
+        index of mapped recordings
+    start: tuple
+        (session, folder, bidsified names) of recording to
+        start from, with session object of its session, and
+        bidsified names of its preceding recordings
+
+    Returns
+    -------
+    bool:
+        True if mapping was stopped by erroneous recording
+    """
+    skip_subject = False
+    start_run = None
+    if start is not None:
+        scan, start_run, bidsified_list = start
+        ses_dirs = ses_dirs[ses_dirs.index(scan.in_path):]
+
+    for ses_dir in ses_dirs:
+        if start_run is None:
+            scan.in_path = ses_dir
+            logger.info("{} ({}/{}): Scanning folder {}"
+                        .format(scan.subject,
+                                sub_no,
+                                n_subjects,
+                                ses_dir))
+            scan.unlock_session()
+            scan.session = os.path.basename(ses_dir)
+            if plugins.RunPlugin("SessionEP", scan) < 0:
+                logger.warning("Session {} discarded by {}"
+                               .format(scan.session, "SessionEP"))
+                continue
+            scan.lock()
+
+            if ses_skip_dir and\
+                    tools.skipEntity(scan.session,
+                                     [], None,
+                                     os.path.join(destination,
+                                                  scan.subject)):
+                logger.info("Skipping session '{}'"
+                            .format(scan.session))
+                continue
+
+            bidsified_list = []
+
+        for module in Modules.selector.types_list:
+            mod_dir = os.path.join(ses_dir, module)
+            if not os.path.isdir(mod_dir):
+                logger.debug("Module {} not found in {}"
+                             .format(module, ses_dir))
+                continue
+            for run in tools.lsdirs(mod_dir):
+                if start_run is not None:
+                    # skipping recordings preceding start one
+                    if run != start_run:
+                        continue
+                    start_run = None
+                cached = None
+                if src_index is not None:
+                    cached = src_index.lookup(run)
+                if cached is not None\
+                        and isunchanged(bidsmap_new, module, cached[1],
+                                        cached[2]):
+                    logger.info("Skipping unchanged recording {}"
+                                .format(run))
+                    first_name = cached[2]["name"]
+                    if first_name in bidsified_list:
+                        logger.error("Matches example of "
+                                     "already processed run {}"
+                                     .format(first_name))
+                    elif first_name is not None:
+                        bidsified_list.append(first_name)
+                    continue
+                if maprecording(destination, scan, run, module,
+                                bidsified_list, bidsmap_new, template,
+                                bidsmap_unk, src_index, matched):
+                    skip_subject = True and (not process_all)
+                    break
+            if skip_subject:
+                break
+        if skip_subject:
+            break
+    return skip_subject
+
+
+def workersubject(destination: str,
+                  scan: BidsSession,
+                  ses_dirs: list,
+                  sub_no: int, n_subjects: int,
+                  ses_skip_dir: bool,
+                  process_all: bool,
+                  bidsmap_new: bidsmap.Bidsmap,
+                  src_index: sourceindex.SourceIndex = None) -> tuple:
+    """
+    Executes mapsubject in worker process, starting from
+    the snapshot of working bidsmap and an empty unknown bidsmap
+
+    Returns
+    -------
+    tuple(bool, Bidsmap, Bidsmap, list):
+        result of mapsubject, partial working and unknown
+        bidsmaps, and mapped recordings, as described in
+        maprecording
+    """
+    bidsmap_unk = deepcopy(worker_maps[1])
+    matched = list()
+    skip_subject = mapsubject(destination, scan, ses_dirs,
+                              sub_no, n_subjects,
+                              ses_skip_dir, process_all,
+                              bidsmap_new, worker_maps[0], bidsmap_unk,
+                              matched, src_index)
+    return skip_subject, bidsmap_new, bidsmap_unk, matched
+
+
+def initworker(templatefile: str,
+               unknownfile: str) -> None:
+    """
+    Loads template and unknown bidsmaps in worker process,
+    if not inherited from main process
+    """
+    global worker_maps
+    if worker_maps is None:
+        worker_maps = (bidsmap.Bidsmap(templatefile),
+                       bidsmap.Bidsmap(unknownfile))
+
+
+def runscount(bidsmap_new: bidsmap.Bidsmap) -> dict:
+    """
+    Returns number of runs in bidsmap for each
+    (module, format, modality)
+    """
+    res = dict()
+    for module, formats in bidsmap_new.Modules.items():
+        for f_name, form in formats.items():
+            for modality, r_list in form.items():
+                res[(module, f_name, modality)] = len(r_list)
+    return res
+
+
+def addedruns(bidsmap_new: bidsmap.Bidsmap, snapshot: dict) -> dict:
+    """
+    Returns the runs added to bidsmap since snapshot
+    of runs count was taken
+
+    Returns
+    -------
+    dict:
+        (module, format): {modality: list of added runs}
+    """
+    res = dict()
+    for (module, f_name, modality), count in runscount(bidsmap_new).items():
+        start = snapshot.get((module, f_name, modality), 0)
+        if count > start:
+            r_list = bidsmap_new.Modules[module][f_name][modality]
+            res.setdefault((module, f_name), dict())[modality] =\
+                r_list[start:]
+    return res
+
+
+def firstconflict(snapshot: dict, matched: list, added: dict) -> int:
+    """
+    Returns the position of first recording mapped by worker
+    which mapping may have been different with the runs added
+    to working bidsmap since snapshot.
+
+    A file matching only existing runs would match them also in
+    sequential mapping, as runs are matched in order, unless it
+    matches also an added run, generating a warning. A file
+    matching a run created by worker would have matched first an
+    added run, or generated warning creating a new run, in both
+    cases the following mapping may be different.
+
+    Parameters
+    ----------
+    snapshot: dict
+        runs count of working bidsmap at submission
+    matched: list
+        recordings mapped by worker, as described in maprecording
+    added: dict
+        runs added since snapshot, as returned by addedruns
+
+    Returns
+    -------
+    int:
+        position of recording in matched, None if all
+        recordings would be mapped identically
+    """
+    if not added:
+        return None
+    matchers = {key: bidsmap.Matcher(form) for key, form in added.items()}
+    for pos, (scan, run, module, form, records, _, _) in enumerate(matched):
+        matcher = matchers.get((module, form))
+        if matcher is None:
+            continue
+        for record in records or []:
+            modality, r_index = record["run"]
+            if r_index >= snapshot.get((module, form, modality), 0):
+                return pos
+            if matcher.matchValues(record.get("values", {})):
+                return pos
+    return None
+
+
+def sectiondigest(bidsmap_new: bidsmap.Bidsmap,
+                  module: str, form: str) -> str:
+    """
+    Returns digest of runs in bidsmap for given module and format.
+
+    The provenance and example of unchecked runs are not used,
+    as they are not kept when bidsmap is loaded
+    """
+    section = bidsmap_new.Modules.get(module, {}).get(form, {})
+    dump = dict()
+    for modality, r_list in section.items():
+        dump[modality] = list()
+        for run in r_list:
+            d = run.dump(empty_attributes=False)
+            if not run.checked:
+                d.pop("provenance", None)
+                d.pop("example", None)
+            dump[modality].append(d)
+    return sourceindex.digest(dump)
+
+
+def isunchanged(bidsmap_new: bidsmap.Bidsmap,
+                module: str, form: str, result: dict) -> bool:
+    """
+    Returns True if mapping of recording, with result stored
+    in index, would not change the working bidsmap, i.e. the
+    runs of its format are unchanged and all runs matched by
+    recording are checked
+    """
+    if result["section"] != sectiondigest(bidsmap_new, module, form):
+        return False
+    section = bidsmap_new.Modules[module][form]
+    for modality, r_index in result["runs"]:
+        if not section[modality][r_index].checked:
+            return False
+    return True
+
+
+def mergesubjects(tasks: list,
+                  destination: str,
+                  n_subjects: int,
+                  ses_skip_dir: bool,
+                  process_all: bool,
+                  bidsmap_new: bidsmap.Bidsmap,
+                  template: bidsmap.Bidsmap,
+                  bidsmap_unk: bidsmap.Bidsmap,
+                  wait: bool,
+                  src_index: sourceindex.SourceIndex = None) -> bool:
+    """
+    Merges partial bidsmaps produced by workers into working
+    and unknown bidsmaps, following the original order of
+    subjects.
+
+    A worker maps subject using the snapshot of working bidsmap
+    taken at submission. Its partial bidsmap is merged with
+    deduplication of equivalent runs. If runs were added meanwhile
+    by preceding subjects, the recordings mapped by worker are kept
+    up to the first one which mapping may depend on added runs,
+    as described in firstconflict. The mapping of subject restarts
+    from this recording in main process, with up-to-date bidsmap.
+    The result is identical to the sequential mapping.
+
+    Parameters
+    ----------
+    tasks: list
+        list of (task, runs count, sessions folders, subject number)
+        of subjects
+        waiting to be merged, merged tasks are removed from list
+    destination: str
+        root folder of bidsified dataset
+    n_subjects: int
+        total number of subjects, used for reporting
+    ses_skip_dir: bool
+        if set to True, sessions with already
+        created directories will be ignored
+    process_all: bool
+        if set to False, mapping stops at first recording
+        that generated errors or warnings
+    bidsmap_new: Bidsmap
+        working bidsmap
+    template: Bidsmap
+        template bidsmap
+    bidsmap_unk: Bidsmap
+        bidsmap of unknown recordings
+    wait: bool
+        if True, waits for all subjects to finish, if False
+        stops at first unfinished subject
+    src_index: SourceIndex
+        index of mapped recordings
+
+    Returns
+    -------
+    bool:
+        True if a merged subject stopped on erroneous recording,
+        in this case remaining tasks are discarded
+    """
+    while tasks:
+        if not wait and not tasks[0][0].ready():
+            return False
+        task, snapshot, ses_dirs, sub_no = tasks.pop(0)
+        result, sub_values, err_count, prefetch_count = task.get()
+        skip_subject, sub_map, sub_unk, matched = result
+        parallel.mergeResult(sub_values, err_count, prefetch_count)
+
+        pos = firstconflict(snapshot, matched,
+                            addedruns(bidsmap_new, snapshot))
+        if pos is not None:
+            excludeRecordings(sub_map, sub_unk, snapshot, matched, pos)
+            for entry in matched[pos:]:
+                info.add_count({lvl: -count
+                                for lvl, count in entry[5].items()})
+        bidsmap_new.merge(sub_map, dedupe=True)
+        bidsmap_unk.merge(sub_unk, dedupe=False)
+
+        if pos is not None:
+            scan, run, _, _, _, _, names = matched[pos]
+            logger.info("{}: working bidsmap changed during mapping, "
+                        "mapping again from this recording".format(run))
+            skip_subject = mapsubject(destination, None, ses_dirs,
+                                      sub_no, n_subjects,
+                                      ses_skip_dir, process_all,
+                                      bidsmap_new, template,
+                                      bidsmap_unk, None, src_index,
+                                      (scan, run, names))
+        if skip_subject:
+            tasks.clear()
+            return True
+    return False
+
+
+def excludeRecordings(sub_map: bidsmap.Bidsmap,
+                      sub_unk: bidsmap.Bidsmap,
+                      snapshot: dict,
+                      matched: list,
+                      pos: int) -> None:
+    """
+    Removes from partial bidsmaps produced by worker the runs
+    created for recordings starting from given position, and
+    the unknown runs of these recordings
+
+    Parameters
+    ----------
+    sub_map: Bidsmap
+        partial working bidsmap
+    sub_unk: Bidsmap
+        partial unknown bidsmap
+    snapshot: dict
+        runs count of working bidsmap at submission
+    matched: list
+        recordings mapped by worker, as described in maprecording
+    pos: int
+        position in matched of first excluded recording
+    """
+    used = set()
+    for scan, run, module, form, records, _, _ in matched[:pos]:
+        for record in records or []:
+            used.add((module, form) + tuple(record["run"]))
+    excluded = set(os.path.normpath(entry[1]) for entry in matched[pos:])
+
+    for module, formats in sub_map.Modules.items():
+        for f_name, form in formats.items():
+            for modality, r_list in form.items():
+                start = snapshot.get((module, f_name, modality), 0)
+                form[modality] = r_list[:start] + [
+                        r for idx, r in enumerate(r_list[start:], start)
+                        if (module, f_name, modality, idx) in used]
+    sub_map.resetMatchers()
+
+    for module, formats in sub_unk.Modules.items():
+        for f_name, form in formats.items():
+            for modality, r_list in form.items():
+                form[modality] = [
+                        r for r in r_list
+                        if os.path.dirname(os.path.normpath(r.provenance))
+                        not in excluded]
+
+
 def mapper(source: str, destination: str,
            plugin_file: str = "",
            plugin_opt: dict = {},
@@ -151,7 +702,13 @@ def mapper(source: str, destination: str,
            process_all: bool = False,
            bidsmapfile: str = "bidsmap.yaml",
            map_template: str = "bidsmap_template.yaml",
-           dry_run: bool = False
+           partial_headers: bool = False,
+           series_fields: bool = False,
+           series_check: int = 0,
+           dry_run: bool = False,
+           jobs: int = 1,
+           incremental: bool = False,
+           fingerprint: bool = False
            ) -> None:
     """
     Generates bidsmap.yaml from prepeared dataset and
@@ -195,9 +752,28 @@ def mapper(source: str, destination: str,
     map_template: str
         The name of template map. The file is searched
         in heuristics folder
+    partial_headers: bool
+        if set to True, only the fields used by bidsmap
+        are parsed from file headers, if supported by format
+    series_fields: bool
+        if set to True, the values of series-invariant fields
+        are retrieved once per recording
+    series_check: int
+        if positive, the cached values of series-invariant
+        fields are checked each series_check files
     dry_run: bool
         if set to True, no disk writing operations
         will be performed
+    jobs: int
+        number of worker processes used to map subjects,
+        if 1, subjects are mapped sequentially in main process
+    incremental: bool
+        if set to True, recordings unchanged since their last
+        mapping are skipped, using the index of source
+        recordings in destination/code/bidsme
+    fingerprint: bool
+        if set to True, the content fingerprint of files is
+        used to detect changed recordings
     """
 
     logger.info("------------ Generating bidsmap ------------")
@@ -228,6 +804,7 @@ def mapper(source: str, destination: str,
         logger.warning("Unable to find template map {}"
                        .format(map_template))
     template = bidsmap.Bidsmap(fname)
+    template_file = fname
 
     fname = paths.findFile(bidsmapfile,
                            bidscodefolder,
@@ -247,6 +824,11 @@ def mapper(source: str, destination: str,
     if os.path.isfile(bidsunknown):
         os.remove(bidsunknown)
     bidsmap_unk = bidsmap.Bidsmap(bidsunknown)
+    if partial_headers:
+        bidsmap_new.declareFields(template)
+    bidsmap_new.mergeSeriesFields(template)
+    if series_fields:
+        bidsmap_new.declareSeriesFields(series_check)
 
     ###############
     # Plugin setup
@@ -284,128 +866,121 @@ def mapper(source: str, destination: str,
                                duplicatedFile="__duplicated.tsv",
                                checkDefinitions=False)
 
+    src_index = None
+    if incremental and not dry_run:
+        src_index = sourceindex.SourceIndex(
+                destination, "map",
+                sourceindex.digest(info.version(),
+                                   sourceindex.fileDigest(plugin_file),
+                                   plugin_opt,
+                                   sourceindex.fileDigest(template_file)),
+                fingerprint)
+
     ##############################
     # Subjects loop
     ##############################
-    n_subjects = len(source_sub_table.df["participant_id"])
-    for index, sub_row in source_sub_table.df.iterrows():
-        skip_subject = False
-
-        sub_no = index + 1
-        sub_id = sub_row["participant_id"]
-        sub_dir = os.path.join(source, sub_id)
-        if not os.path.isdir(sub_dir):
-            logger.error("{}: Not found in {}"
-                         .format(sub_id, source))
-            continue
-
-        scan = BidsSession()
-        scan.in_path = sub_dir
-        scan.subject = sub_id
+    pool = None
+    if jobs > 1:
+        global worker_maps
+        worker_maps = (template, bidsmap_unk)
+        pool = parallel.createPool(jobs,
+                                   source_sub_table.getDefinitionsPath(),
+                                   plugin_file,
+                                   dict(source=source,
+                                        destination=destination,
+                                        dry=True,
+                                        **plugin_opt),
+                                   initworker,
+                                   (template_file, bidsunknown))
+    # subjects mapped by workers, waiting to be merged
+    tasks = list()
 
-        #################################################
-        # Cloning df_sub row values in scans sub_values
-        #################################################
-        for column in source_sub_table.df.columns:
-            if pandas.isna(sub_row[column]):
-                scan.sub_values[column] = None
-            else:
-                scan.sub_values[column] = sub_row[column]
+    try:
+        n_subjects = len(source_sub_table.df["participant_id"])
+        for index, sub_row in source_sub_table.df.iterrows():
+            sub_no = index + 1
+            sub_id = sub_row["participant_id"]
+            sub_dir = os.path.join(source, sub_id)
+            if not os.path.isdir(sub_dir):
+                logger.error("{}: Not found in {}"
+                             .format(sub_id, source))
+                continue
 
-        if plugins.RunPlugin("SubjectEP", scan) < 0:
-            logger.warning("Subject {} discarded by {}"
-                           .format(scan.subject, "SubjectEP"))
-            continue
-        scan.lock_subject()
-        if not scan.isSubValid():
-            logger.error("{}: Subject id '{}' is not valid"
-                         .format(sub_id, scan.subject))
-            continue
+            scan = BidsSession()
+            scan.in_path = sub_dir
+            scan.subject = sub_id
 
-        if tools.skipEntity(scan.subject, sub_list,
-                            dest_sub_table.getIndexes()
-                            if sub_skip_tsv else None,
-                            destination if sub_skip_dir else ""):
-            logger.info("Skipping subject '{}'"
-                        .format(scan.subject))
-            continue
+            #################################################
+            # Cloning df_sub row values in scans sub_values
+            #################################################
+            for column in source_sub_table.df.columns:
+                if pandas.isna(sub_row[column]):
+                    scan.sub_values[column] = None
+                else:
+                    scan.sub_values[column] = sub_row[column]
 
-        ses_dirs = tools.lsdirs(sub_dir, 'ses-*')
-        if not ses_dirs:
-            logger.error("{}: No sessions found in: {}"
-                         .format(scan.subject, sub_dir))
-            continue
-
-        for ses_dir in ses_dirs:
-            scan.in_path = ses_dir
-            logger.info("{} ({}/{}): Scanning folder {}"
-                        .format(scan.subject,
-                                sub_no,
-                                n_subjects,
-                                ses_dir))
-            scan.unlock_session()
-            scan.session = os.path.basename(ses_dir)
-            if plugins.RunPlugin("SessionEP", scan) < 0:
-                logger.warning("Session {} discarded by {}"
-                               .format(scan.session, "SessionEP"))
+            if plugins.RunPlugin("SubjectEP", scan) < 0:
+                logger.warning("Subject {} discarded by {}"
+                               .format(scan.subject, "SubjectEP"))
+                continue
+            scan.lock_subject()
+            if not scan.isSubValid():
+                logger.error("{}: Subject id '{}' is not valid"
+                             .format(sub_id, scan.subject))
                 continue
-            scan.lock()
 
-            if ses_skip_dir and tools.skipEntity(scan.session,
-                                                 [], None,
-                                                 os.path.join(destination,
-                                                              scan.subject)):
-                logger.info("Skipping session '{}'"
-                            .format(scan.session))
+            if tools.skipEntity(scan.subject, sub_list,
+                                dest_sub_table.getIndexes()
+                                if sub_skip_tsv else None,
+                                destination if sub_skip_dir else ""):
+                logger.info("Skipping subject '{}'"
+                            .format(scan.subject))
                 continue
 
-            bidsified_list = []
+            ses_dirs = tools.lsdirs(sub_dir, 'ses-*')
+            if not ses_dirs:
+                logger.error("{}: No sessions found in: {}"
+                             .format(scan.subject, sub_dir))
+                continue
 
-            for module in Modules.selector.types_list:
-                mod_dir = os.path.join(ses_dir, module)
-                if not os.path.isdir(mod_dir):
-                    logger.debug("Module {} not found in {}"
-                                 .format(module, ses_dir))
-                    continue
-                for run in tools.lsdirs(mod_dir):
-                    cls = Modules.selector.select(run, module)
-                    if cls is None:
-                        logger.error("Failed to identify data in {}"
-                                     .format(mod_dir))
-                        continue
-                    recording = cls(rec_path=run)
-                    if not recording or len(recording.files) == 0:
-                        logger.error("unable to load data in folder {}"
-                                     .format(run))
-                    recording.setBidsSession(scan)
-                    err_count = info.counthandler.level2count.copy()
-                    try:
-                        first_name = createmap(destination, recording,
-                                               bidsmap_new, template,
-                                               bidsmap_unk)
-                        if first_name in bidsified_list:
-                            logger.error("Matches example of "
-                                         "already processed run {}"
-                                         .format(first_name))
-                        elif first_name is not None:
-                            bidsified_list.append(first_name)
-                    except Exception as err:
-                        logger.error("Error processing folder {} "
-                                     "in file {}: {}"
-                                     .format(run, recording.currentFile(True),
-                                             err))
-                    err_count = info.msg_count(err_count)
-                    if err_count:
-                        logger.info("Recording generated several "
-                                    "errors/warnings")
-                        skip_subject = True and (not process_all)
-                        break
+            if pool is None:
+                skip_subject = mapsubject(destination, scan, ses_dirs,
+                                          sub_no, n_subjects,
+                                          ses_skip_dir, process_all,
+                                          bidsmap_new, template, bidsmap_unk,
+                                          None, src_index)
                 if skip_subject:
                     break
-            if skip_subject:
-                break
-        if skip_subject:
-            break
+            else:
+                task = pool.apply_async(
+                    parallel.runTask,
+                    (workersubject, destination, deepcopy(scan), ses_dirs,
+                     sub_no, n_subjects, ses_skip_dir, process_all,
+                     deepcopy(bidsmap_new), src_index))
+                tasks.append((task, runscount(bidsmap_new),
+                              ses_dirs, sub_no))
+                if mergesubjects(tasks, destination, n_subjects,
+                                 ses_skip_dir, process_all,
+                                 bidsmap_new, template, bidsmap_unk,
+                                 False, src_index):
+                    break
+
+        if pool is not None:
+            mergesubjects(tasks, destination, n_subjects,
+                          ses_skip_dir, process_all,
+                          bidsmap_new, template, bidsmap_unk,
+                          True, src_index)
+            # workers exit once all tasks are done, terminating
+            # the pool may deadlock and is used only on errors
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if src_index is not None:
+            src_index.close()
 
     if not dry_run:
         # Save the bidsmap to the bidsmap YAML-file
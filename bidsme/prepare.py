@@ -26,6 +26,7 @@
 
 import os
 import logging
+from copy import deepcopy
 
 from bidsme import exceptions
 from bidsme import plugins
@@ -33,6 +34,9 @@ from bidsme import Modules
 
 from bidsme.tools import tools
 from bidsme.tools import paths
+from bidsme.tools import parallel
+from bidsme.tools import info
+from bidsme.tools import sourceindex
 
 from bidsme.bidsMeta import BidsSession
 from bidsme.bidsMeta import BidsTable
@@ -44,7 +48,8 @@ logger = logging.getLogger(__name__)
 def sortsession(outfolder: str,
                 session: BidsSession,
                 recording: object,
-                dry_run: bool) -> None:
+                dry_run: bool,
+                records: list = None) -> None:
 
     recording.setBidsSession(session)
 
@@ -87,16 +92,240 @@ def sortsession(outfolder: str,
                 recording.recIdentity(index=False))
         if not dry_run:
             os.makedirs(serie, exist_ok=True)
-            outfile = recording.copyRawFile(serie)
+            outputs = recording.copyRawFile(serie)
+            outfile = outputs[0]
             if recording.switches["exportHeader"]:
                 recording.exportHeader(serie)
             plugins.RunPlugin("FileEP", outfile, recording)
+            if records is not None:
+                records.append(sourceindex.SourceIndex.fileRecord(
+                    recording, [os.path.relpath(output, outfolder)
+                                for output in outputs]))
         else:
             plugins.RunPlugin("FileEP", None, recording)
 
     plugins.RunPlugin("SequenceEndEP", outfolder, recording)
 
 
+def isprepared(outfolder: str,
+               src_index: sourceindex.SourceIndex,
+               rec_dir: str) -> bool:
+    """
+    Returns True if given recording folder is unchanged since
+    its last successful preparation, and all prepared files
+    are still present in destination
+
+    Parameters
+    ----------
+    outfolder: str
+        destination folder of prepared dataset
+    src_index: SourceIndex
+        index of prepared recordings
+    rec_dir: str
+        path to the recording folder
+    """
+    if src_index.lookup(rec_dir) is None:
+        return False
+    for record in src_index.getFiles(rec_dir):
+        for output in record["output"]:
+            if not os.path.isfile(os.path.join(outfolder, output)):
+                return False
+    return True
+
+
+def preparesession(outfolder: str,
+                   scan: BidsSession,
+                   ses_dir: str,
+                   data_dirs: dict,
+                   dry_run: bool,
+                   src_index: sourceindex.SourceIndex = None,
+                   incremental: bool = False,
+                   resumed: set = frozenset()) -> None:
+    """
+    Prepares all recordings found in data folders of given
+    session folder, and executes SessionEndEP
+
+    If src_index is given, successfully prepared recordings
+    are recorded in index, and a checkpoint is added to its
+    journal after each recording, with participants values
+    registered by it, and after the session.
+    If incremental is set, recordings unchanged since their
+    last preparation are skipped, otherwise only the unchanged
+    recordings from resumed set are skipped
+
+    Parameters
+    ----------
+    outfolder: str
+        destination folder of prepared dataset
+    scan: BidsSession
+        session object with locked subject and session
+    ses_dir: str
+        path to the session folder
+    data_dirs: dict
+        dictionary of data folders and data types
+    dry_run: bool
+        if set to True, no disk writing operations
+        will be performed
+    src_index: SourceIndex
+        index of prepared recordings
+    incremental: bool
+        if True, all unchanged recordings are skipped
+    resumed: set
+        recording folders prepared by interrupted execution
+    """
+    for rec_dirs, rec_type in data_dirs.items():
+        rec_dirs = tools.lsdirs(ses_dir, rec_dirs)
+        for rec_dir in rec_dirs:
+            if not os.path.isdir(rec_dir):
+                logger.warning("Sub: '{}', Ses: '{}': "
+                               "'{}' don't exists "
+                               "or not a folder"
+                               .format(scan.subject,
+                                       scan.session,
+                                       rec_dir))
+                continue
+            if src_index is not None\
+                    and (incremental
+                         or os.path.normpath(rec_dir) in resumed)\
+                    and isprepared(outfolder, src_index, rec_dir):
+                logger.info("Skipping unchanged recording {}"
+                            .format(rec_dir))
+                continue
+            cls = Modules.select(rec_dir, rec_type)
+            if cls is None:
+                logger.warning("Unable to identify data in folder {}"
+                               .format(rec_dir))
+                continue
+            recording = cls(rec_path=rec_dir)
+            if not recording or len(recording.files) == 0:
+                logger.warning("unable to load data in folder {}"
+                               .format(rec_dir))
+            records = None if src_index is None else list()
+            err_count = info.counthandler.level2count.copy()
+            sub_values = {sub: list(values) for sub, values
+                          in BidsSession.getSubjectValues().items()}
+            try:
+                sortsession(outfolder, scan, recording, dry_run, records)
+            except Exception as err:
+                exceptions.ReportError(err)
+                logger.error("Error processing folder {} in file {}"
+                             .format(rec_dir,
+                                     recording.currentFile(True)))
+            if src_index is not None:
+                err_count = info.msg_count(err_count)
+                if "ERROR" in err_count or "CRITICAL" in err_count:
+                    src_index.discard(rec_dir)
+                else:
+                    src_index.store(rec_dir, cls.Module(), cls.Type(),
+                                    {}, records)
+                    src_index.checkpoint("series", rec_dir, ses_dir,
+                                         changedvalues(sub_values))
+    plugins.RunPlugin("SessionEndEP", scan)
+    if src_index is not None:
+        src_index.checkpoint("session", ses_dir)
+
+
+def changedvalues(sub_values: dict) -> dict:
+    """
+    Returns the participants values of subjects whose entries
+    changed since given copy of registered values
+
+    Parameters
+    ----------
+    sub_values: dict
+        copy of participants values, with copied
+        lists of entries
+
+    Returns
+    -------
+    dict
+    """
+    res = dict()
+    for sub, values in BidsSession.getSubjectValues().items():
+        if sub_values.get(sub) != values:
+            res[sub] = values
+    return res
+
+
+def resumejournal(outfolder: str,
+                  src_index: sourceindex.SourceIndex) -> tuple:
+    """
+    Loads the journal of interrupted preparation, restoring
+    the participants values registered by it.
+
+    Journal created with different configuration is cleared.
+
+    Parameters
+    ----------
+    outfolder: str
+        destination folder of prepared dataset
+    src_index: SourceIndex
+        index of prepared recordings
+
+    Returns
+    -------
+    tuple(set, set):
+        set of prepared recording folders and set of completed
+        session folders whose recordings are unchanged
+    """
+    journal = src_index.getJournal()
+    if not journal:
+        return set(), set()
+    if any(entry["config"] != src_index.config for entry in journal):
+        logger.warning("Configuration changed since interrupted "
+                       "preparation, restarting from begining")
+        src_index.clearJournal()
+        return set(), set()
+
+    series = dict()
+    sessions = set()
+    for entry in journal:
+        if entry["kind"] == "series":
+            series.setdefault(entry["parent"], list()).append(
+                    entry["path"])
+            BidsSession.mergeSubjectValues(entry["sub_values"], True)
+        elif entry["kind"] == "session":
+            sessions.add(entry["path"])
+
+    completed = set()
+    for ses_dir in sessions:
+        if all(isprepared(outfolder, src_index, rec_dir)
+               for rec_dir in series.get(ses_dir, [])):
+            completed.add(ses_dir)
+
+    logger.info("Resuming interrupted preparation: {} recordings in "
+                "{} sessions already prepared"
+                .format(sum(len(v) for v in series.values()),
+                        len(completed)))
+    return set(sum(series.values(), [])), completed
+
+
+def endsubjects(pending: list, wait: bool) -> None:
+    """
+    Collects results of sessions processed in worker processes
+    and executes SubjectEndEP for each subject whose sessions are
+    all processed, following the original order of subjects.
+
+    Parameters
+    ----------
+    pending: list
+        list of (BidsSession, [tasks]) for subjects waiting
+        for their sessions, processed subjects are removed
+        from list
+    wait: bool
+        if True, waits for all sessions to finish, if False
+        stops at first subject with unfinished sessions
+    """
+    while pending:
+        scan, tasks = pending[0]
+        if not wait and not all(task.ready() for task in tasks):
+            return
+        for task in tasks:
+            parallel.collectResult(task, conflicting=True)
+        plugins.RunPlugin("SubjectEndEP", scan)
+        pending.pop(0)
+
+
 def prepare(source: str, destination: str,
             plugin_file: str = "",
             plugin_opt: dict = {},
@@ -110,7 +339,10 @@ def prepare(source: str, destination: str,
             sub_no_dir: bool = False,
             ses_no_dir: bool = False,
             data_dirs: dict = {},
-            dry_run: bool = False
+            dry_run: bool = False,
+            jobs: int = 1,
+            incremental: bool = False,
+            fingerprint: bool = False
             ) -> None:
     """
     Prepare data from surce folder and place it in
@@ -128,6 +360,13 @@ def prepare(source: str, destination: str,
     A list of treated subjects will be created/updated
     in destination/participants.tsv file
 
+    The prepared recordings and sessions are journaled, with
+    participants values, in the index of source recordings in
+    destination/code/bidsme. If preparation is interrupted,
+    the next execution with same configuration skips the
+    sessions and recordings already prepared, and restores
+    their participants values
+
     Parameters
     ----------
     source: str
@@ -186,6 +425,16 @@ def prepare(source: str, destination: str,
     dry_run: bool
         if set to True, no disk writing operations
         will be performed
+    jobs: int
+        number of worker processes used to prepare sessions,
+        if 1, sessions are prepared sequentially in main process
+    incremental: bool
+        if set to True, recordings unchanged since their last
+        preparation are skipped, using the index of source
+        recordings in destination/code/bidsme
+    fingerprint: bool
+        if set to True, the content fingerprint of files is
+        used to detect changed recordings
     """
 
     logger.info("-------------- Prepearing data -------------")
@@ -257,102 +506,134 @@ def prepare(source: str, destination: str,
         logger.warning("No subject folders found")
 
     if not data_dirs:
-        data_dirs = {}
-
-    for sub_dir in sub_dirs:
-        scan = BidsSession()
-        scan.in_path = sub_dir
-        # get name of subject from folder name
-        if not sub_no_dir:
-            scan.subject = os.path.basename(sub_dir)
-            scan.subject = scan.subject[len(sub_prefix):]
-        if plugins.RunPlugin("SubjectEP", scan) < 0:
-            logger.warning("Subject {} discarded by {}"
-                           .format(scan.subject, "SubjectEP"))
-            continue
-        scan.lock_subject()
-
-        if scan.subject is not None:
-            if tools.skipEntity(scan.subject, sub_list,
-                                sub_table.getIndexes()
-                                if sub_skip_tsv else None,
-                                destination if sub_skip_dir else ""):
-                logger.info("Skipping subject '{}'"
-                            .format(scan.subject))
-                continue
+        data_dirs = {"": ""}
+
+    src_index = None
+    resumed = set()
+    completed = set()
+    if not dry_run:
+        src_index = sourceindex.SourceIndex(
+                destination, "prepare",
+                sourceindex.digest(info.version(),
+                                   sourceindex.fileDigest(plugin_file),
+                                   plugin_opt, data_dirs,
+                                   sub_prefix, ses_prefix,
+                                   sub_no_dir, ses_no_dir),
+                fingerprint)
+        resumed, completed = resumejournal(destination, src_index)
+
+    pool = None
+    if jobs > 1:
+        pool = parallel.createPool(jobs, part_template,
+                                   plugin_file,
+                                   dict(source=source,
+                                        destination=destination,
+                                        dry=dry_run,
+                                        **plugin_opt))
+    # subjects with sessions still processed by workers
+    pending = list()
 
-        if not ses_no_dir:
-            ses_dirs = tools.lsdirs(
-                    os.path.join(sub_dir, ses_prefix_dir),
-                    ses_prefix + '*')
-        else:
-            ses_dirs = [sub_dir]
-        if not ses_dirs:
-            logger.warning("No session folders found")
+    try:
+        for sub_dir in sub_dirs:
+            scan = BidsSession()
+            scan.in_path = sub_dir
+            # get name of subject from folder name
+            if not sub_no_dir:
+                scan.subject = os.path.basename(sub_dir)
+                scan.subject = scan.subject[len(sub_prefix):]
+            if plugins.RunPlugin("SubjectEP", scan) < 0:
+                logger.warning("Subject {} discarded by {}"
+                               .format(scan.subject, "SubjectEP"))
+                continue
+            scan.lock_subject()
+
+            if scan.subject is not None:
+                if tools.skipEntity(scan.subject, sub_list,
+                                    sub_table.getIndexes()
+                                    if sub_skip_tsv else None,
+                                    destination if sub_skip_dir else ""):
+                    logger.info("Skipping subject '{}'"
+                                .format(scan.subject))
+                    continue
 
-        for ses_dir in ses_dirs:
-            scan.in_path = ses_dir
-            logger.info("Scanning folder {}".format(ses_dir))
             if not ses_no_dir:
-                scan.unlock_session()
-                scan.session = os.path.basename(ses_dir)
-                scan.session = scan.session[len(ses_prefix):]
+                ses_dirs = tools.lsdirs(
+                        os.path.join(sub_dir, ses_prefix_dir),
+                        ses_prefix + '*')
             else:
-                scan.unlock_session()
-                scan.session = ""
-            if plugins.RunPlugin("SessionEP", scan) < 0:
-                logger.warning("Session {} discarded by {}"
-                               .format(scan.session, "SessionEP"))
-                continue
+                ses_dirs = [sub_dir]
+            if not ses_dirs:
+                logger.warning("No session folders found")
+
+            tasks = list()
+            for ses_dir in ses_dirs:
+                scan.in_path = ses_dir
+                logger.info("Scanning folder {}".format(ses_dir))
+                if not ses_no_dir:
+                    scan.unlock_session()
+                    scan.session = os.path.basename(ses_dir)
+                    scan.session = scan.session[len(ses_prefix):]
+                else:
+                    scan.unlock_session()
+                    scan.session = ""
+                if plugins.RunPlugin("SessionEP", scan) < 0:
+                    logger.warning("Session {} discarded by {}"
+                                   .format(scan.session, "SessionEP"))
+                    continue
 
-            scan.lock()
-
-            if scan.session is not None:
-                skip = False
-                if ses_skip_dir:
-                    if os.path.isdir(os.path.join(destination,
-                                                  scan.subject,
-                                                  scan.session)):
-                        logger.debug("{} dir exists".format(scan.session))
-                        skip = True
-                if skip:
-                    logger.info("Skipping session '{}'"
+                scan.lock()
+
+                if os.path.normpath(ses_dir) in completed:
+                    logger.info("Skipping session '{}' prepared "
+                                "by interrupted execution"
                                 .format(scan.session))
                     continue
 
-            if not data_dirs:
-                data_dirs[""] = ""
-            for rec_dirs, rec_type in data_dirs.items():
-                rec_dirs = tools.lsdirs(ses_dir, rec_dirs)
-                for rec_dir in rec_dirs:
-                    if not os.path.isdir(rec_dir):
-                        logger.warning("Sub: '{}', Ses: '{}': "
-                                       "'{}' don't exists "
-                                       "or not a folder"
-                                       .format(scan.subject,
-                                               scan.session,
-                                               rec_dir))
-                        continue
-                    cls = Modules.select(rec_dir, rec_type)
-                    if cls is None:
-                        logger.warning("Unable to identify data in folder {}"
-                                       .format(rec_dir))
+                if scan.session is not None:
+                    skip = False
+                    if ses_skip_dir:
+                        if os.path.isdir(os.path.join(destination,
+                                                      scan.subject,
+                                                      scan.session)):
+                            logger.debug("{} dir exists"
+                                         .format(scan.session))
+                            skip = True
+                    if skip:
+                        logger.info("Skipping session '{}'"
+                                    .format(scan.session))
                         continue
-                    recording = cls(rec_path=rec_dir)
-                    if not recording or len(recording.files) == 0:
-                        logger.warning("unable to load data in folder {}"
-                                       .format(rec_dir))
-                    try:
-                        sortsession(destination, scan, recording, dry_run)
-                    except Exception as err:
-                        exceptions.ReportError(err)
-                        logger.error("Error processing folder {} in file {}"
-                                     .format(rec_dir,
-                                             recording.currentFile(True)))
-            plugins.RunPlugin("SessionEndEP", scan)
-
-        scan.in_path = sub_dir
-        plugins.RunPlugin("SubjectEndEP", scan)
+
+                if pool is None:
+                    preparesession(destination, scan, ses_dir,
+                                   data_dirs, dry_run, src_index,
+                                   incremental, resumed)
+                else:
+                    tasks.append(pool.apply_async(
+                        parallel.runTask,
+                        (preparesession, destination, deepcopy(scan),
+                         ses_dir, data_dirs, dry_run, src_index,
+                         incremental, resumed)))
+
+            scan.in_path = sub_dir
+            if pool is None:
+                plugins.RunPlugin("SubjectEndEP", scan)
+            else:
+                pending.append((scan, tasks))
+                endsubjects(pending, False)
+
+        if pool is not None:
+            endsubjects(pending, True)
+            # workers exit once all tasks are done, terminating
+            # the pool may deadlock and is used only on errors
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if src_index is not None:
+            src_index.close()
 
     ##################################
     # Merging the participants table
@@ -382,4 +663,8 @@ def prepare(source: str, destination: str,
                             .format(sub_table.getDuplicatesPath()))
                 sub_table.save_table(selection=df_dupl, useDuplicates=True)
 
+    if src_index is not None:
+        src_index.clearJournal()
+        src_index.close()
+
     plugins.RunPlugin("FinaliseEP")
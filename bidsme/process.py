@@ -129,6 +129,9 @@ def process(source: str, destination: str,
             ses_skip_dir: bool = False,
             part_template: str = "",
             bidsmapfile: str = "bidsmap.yaml",
+            partial_headers: bool = False,
+            series_fields: bool = False,
+            series_check: int = 0,
             dry_run: bool = False
             ) -> None:
     """
@@ -181,6 +184,15 @@ def process(source: str, destination: str,
         The name of bidsmap file, will be searched for
         in destination/code/bidsmap directory, unless
         path is absolute
+    partial_headers: bool
+        if set to True, only the fields used by bidsmap
+        are parsed from file headers, if supported by format
+    series_fields: bool
+        if set to True, the values of series-invariant fields
+        are retrieved once per recording
+    series_check: int
+        if positive, the cached values of series-invariant
+        fields are checked each series_check files
     dry_run: bool
         if set to True, no disk writing operations
         will be performed
@@ -243,6 +255,10 @@ def process(source: str, destination: str,
         logger.critical("Map contains {} unchecked runs"
                         .format(nunchecked))
         raise Exception("Unchecked runs present")
+    if partial_headers:
+        bidsmap.declareFields()
+    if series_fields:
+        bidsmap.declareSeriesFields(series_check)
 
     ###############
     # Plugin setup
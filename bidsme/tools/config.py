@@ -234,6 +234,9 @@ def saveConfig(args: argparse.Namespace) -> None:
     config["selection"]["skip_existing"] = args.skip_existing
     config["selection"]["skip_session"] = args.skip_existing_sessions
 
+    config["parallel"]["prefetch"] = args.prefetch
+    config["parallel"]["prefetch_size"] = args.prefetch_size
+
     if args.cmd == "prepare":
         config[args.cmd]["part_template"] = args.part_template
         config[args.cmd]["sub_prefix"] = args.sub_prefix
@@ -241,15 +244,33 @@ def saveConfig(args: argparse.Namespace) -> None:
         config[args.cmd]["no_subject"] = args.no_subject
         config[args.cmd]["no_session"] = args.no_session
         config[args.cmd]["rec_folders"] = args.recfolder
+        config["parallel"]["jobs"] = args.jobs
+        config["index"]["incremental"] = args.incremental
+        config["index"]["fingerprint"] = args.fingerprint
     elif args.cmd == "bidsify":
         config["maps"]["map"] = args.bidsmap
+        config["maps"]["partial_headers"] = args.partial_headers
+        config["maps"]["series_fields"] = args.series_fields
+        config["maps"]["series_check"] = args.series_check
         config[args.cmd]["part_template"] = args.part_template
+        config["parallel"]["jobs"] = args.jobs
+        config["index"]["resume"] = args.resume
+        config["index"]["fingerprint"] = args.fingerprint
     elif args.cmd == "process":
         config["maps"]["map"] = args.bidsmap
+        config["maps"]["partial_headers"] = args.partial_headers
+        config["maps"]["series_fields"] = args.series_fields
+        config["maps"]["series_check"] = args.series_check
         config[args.cmd]["part_template"] = args.part_template
     elif args.cmd == "map":
         config["maps"]["map"] = args.bidsmap
+        config["maps"]["partial_headers"] = args.partial_headers
+        config["maps"]["series_fields"] = args.series_fields
+        config["maps"]["series_check"] = args.series_check
         config["maps"]["template"] = args.template
+        config["parallel"]["jobs"] = args.jobs
+        config["index"]["incremental"] = args.incremental
+        config["index"]["fingerprint"] = args.fingerprint
 
     if args.configuration:
         with open(args.configuration, "w") as f:
@@ -335,6 +356,26 @@ def setSubParser(parser, cmd):
             action="store_true"
             )
 
+    gr_prefetch = parser.add_argument_group(
+            title="read-ahead arguments",
+            description="Options for parsing the headers of files "
+            "in advance, in background threads")
+    gr_prefetch.add_argument(
+            "--prefetch",
+            help="Number of file headers parsed in advance, "
+            "0 to disable read-ahead",
+            metavar="N",
+            type=int,
+            default=config["parallel"]["prefetch"]
+            )
+    gr_prefetch.add_argument(
+            "--prefetch-size",
+            help="Maximum total size (in MB) of files parsed in advance",
+            metavar="MB",
+            type=int,
+            default=config["parallel"]["prefetch_size"]
+            )
+
     parser.add_argument(
             "--dry-run",
             help="Run in dry mode, i.e. without writting anything "
@@ -351,6 +392,46 @@ def setSubParser(parser, cmd):
             )
 
 
+def setParallel(parser):
+    gr_parallel = parser.add_argument_group(
+            title="parallel execution",
+            description="Options for distributing the work "
+            "between several processes")
+    gr_parallel.add_argument('-j', '--jobs',
+                             help='Number of worker processes, '
+                             '1 for sequential execution',
+                             metavar="N",
+                             type=int)
+    parser.set_defaults(jobs=config["parallel"]["jobs"])
+
+
+def setIndex(parser, resume: bool = False):
+    gr_index = parser.add_argument_group(
+            title="incremental execution",
+            description="Options for skipping the recordings unchanged "
+            "since last run, using the index of source recordings "
+            "in destination/code/bidsme/index.sqlite")
+    if resume:
+        gr_index.add_argument('--resume',
+                              help='Skip files already bidsified from '
+                              'unchanged recordings and runs, and '
+                              'bidsify again the incomplete ones',
+                              action='store_true')
+    else:
+        gr_index.add_argument('--incremental',
+                              help='Skip recordings unchanged since last '
+                              'successful run',
+                              action='store_true')
+    gr_index.add_argument('--fingerprint',
+                          help='Use the content of files, in addition '
+                          'to their size and modification time, to '
+                          'detect changed recordings',
+                          action='store_true')
+    parser.set_defaults(incremental=config["index"]["incremental"],
+                        resume=config["index"]["resume"],
+                        fingerprint=config["index"]["fingerprint"])
+
+
 def setPrepare(parser):
     gr_template = parser.add_argument_group(
             title="template commands",
@@ -392,6 +473,8 @@ def setPrepare(parser):
                          action=__appPluginOpt,
                          default={},
                          nargs="+")
+    setParallel(parser)
+    setIndex(parser)
     # Updating defaults
     cfg = config["prepare"]
     parser.set_defaults(
@@ -418,8 +501,32 @@ def setBidsify(parser):
                          help='The bidsmap YAML-file with the study '
                          'heuristics.'
                          )
+    gr_maps.add_argument('--partial-headers',
+                         help='Parse from file headers only the fields '
+                         'used by the bidsmap, other fields are parsed '
+                         'on demand',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-fields',
+                         help='Retrieve the values of series-invariant '
+                         'fields once per recording, assuming that '
+                         'recording contains only one serie',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-check',
+                         help='Check the cached values of '
+                         'series-invariant fields each N files, '
+                         '0 to disable checks',
+                         metavar="N",
+                         type=int
+                         )
+    setParallel(parser)
+    setIndex(parser, resume=True)
     parser.set_defaults(
             bidsmap=config["maps"]["map"],
+            partial_headers=config["maps"]["partial_headers"],
+            series_fields=config["maps"]["series_fields"],
+            series_check=config["maps"]["series_check"],
             part_template=config["bidsify"]["part_template"]
             )
 
@@ -439,8 +546,30 @@ def setProcess(parser):
                          help='The bidsmap YAML-file with the study '
                          'heuristics.'
                          )
+    gr_maps.add_argument('--partial-headers',
+                         help='Parse from file headers only the fields '
+                         'used by the bidsmap, other fields are parsed '
+                         'on demand',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-fields',
+                         help='Retrieve the values of series-invariant '
+                         'fields once per recording, assuming that '
+                         'recording contains only one serie',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-check',
+                         help='Check the cached values of '
+                         'series-invariant fields each N files, '
+                         '0 to disable checks',
+                         metavar="N",
+                         type=int
+                         )
     parser.set_defaults(
             bidsmap=config["maps"]["map"],
+            partial_headers=config["maps"]["partial_headers"],
+            series_fields=config["maps"]["series_fields"],
+            series_check=config["maps"]["series_check"],
             part_template=config["process"]["part_template"]
             )
 
@@ -453,6 +582,25 @@ def setMap(parser):
                          help='The bidsmap YAML-file with the study '
                          'heuristics.'
                          )
+    gr_maps.add_argument('--partial-headers',
+                         help='Parse from file headers only the fields '
+                         'used by the bidsmap, other fields are parsed '
+                         'on demand',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-fields',
+                         help='Retrieve the values of series-invariant '
+                         'fields once per recording, assuming that '
+                         'recording contains only one serie',
+                         action="store_true"
+                         )
+    gr_maps.add_argument('--series-check',
+                         help='Check the cached values of '
+                         'series-invariant fields each N files, '
+                         '0 to disable checks',
+                         metavar="N",
+                         type=int
+                         )
     gr_maps.add_argument('-t', '--template',
                          help='The bidsmap template with the default '
                          'heuristics')
@@ -461,6 +609,11 @@ def setMap(parser):
                          'generated error/warning',
                          action="store_true"
                          )
+    setParallel(parser)
+    setIndex(parser)
     parser.set_defaults(
             bidsmap=config["maps"]["map"],
+            partial_headers=config["maps"]["partial_headers"],
+            series_fields=config["maps"]["series_fields"],
+            series_check=config["maps"]["series_check"],
             template=config["maps"]["template"])
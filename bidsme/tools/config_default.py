@@ -29,7 +29,14 @@ config = {
             # name for template used by bidsmapper
             "template": "bidsmap_template.yaml",
             # name for main map file used by bidscoiner
-            "map": "bidsmap.yaml"
+            "map": "bidsmap.yaml",
+            # read from file headers only the fields used by bidsmap
+            "partial_headers": False,
+            # retrieve series-invariant fields once per recording
+            "series_fields": False,
+            # check cached series-invariant values each N files,
+            # 0 to disable checks
+            "series_check": 0
             },
         # Configuration of skipping subjects and sessions
         "selection": {
@@ -37,6 +44,25 @@ config = {
             "skip_existing": False,
             "skip_session": False
             },
+        # Configuration of parallel execution
+        "parallel": {
+            # number of worker processes, 1 for sequential execution
+            "jobs": 1,
+            # number of file headers read ahead in background threads,
+            # 0 to disable read-ahead
+            "prefetch": 0,
+            # maximum total size (in MB) of files read ahead
+            "prefetch_size": 256
+            },
+        # Configuration of incremental runs
+        "index": {
+            # skip recordings unchanged since last run
+            "incremental": False,
+            # skip files already bidsified, and redo partial ones
+            "resume": False,
+            # use content fingerprint to detect changed files
+            "fingerprint": False
+            },
         # Configuration realted to logging
         "logging": {
             # silence stdout output
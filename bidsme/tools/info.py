@@ -169,3 +169,13 @@ def msg_count(or_count: {}):
             msg_counts[lvl] = count
 
     return msg_counts
+
+
+def add_count(counts: dict) -> None:
+    """
+    Adds messages counts (for ex. reported by worker process)
+    to the global counter
+    """
+    for lvl, count in counts.items():
+        counthandler.level2count[lvl] = \
+                counthandler.level2count.get(lvl, 0) + count
@@ -0,0 +1,250 @@
+###############################################################################
+# parallel.py contains functions managing the pool of worker processes
+# used to distribute the treatment of dataset
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import logging
+import multiprocessing
+import multiprocessing.pool
+
+from bidsme import plugins
+from bidsme.bidsMeta import BidsSession
+from bidsme.Modules import baseModule
+from bidsme.Modules import types_list
+
+from . import info
+from . import prefetch
+
+logger = logging.getLogger(__name__)
+
+
+def getContext():
+    """
+    Returns the multiprocessing context used to create workers.
+
+    The 'fork' start method is preferred when aviable, so workers
+    inherit the logging configuration, the loaded plugin and
+    participants definitions from main process.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def initWorker(inherited: bool,
+               prefetch_opt: tuple,
+               required_fields: list,
+               series_fields: list,
+               part_template: str,
+               plugin_file: str,
+               plugin_init: dict,
+               initializer: callable,
+               initargs: tuple) -> None:
+    """
+    Initialize the worker process.
+
+    If worker do not inherit the state of main process,
+    the read-ahead of headers, required and series-invariant
+    fields of formats are configured,
+    participants definitions are loaded from part_template,
+    and plugin is imported and initialized by calling InitEP
+
+    Parameters
+    ----------
+    inherited: bool
+        if True, the state of main process is inherited
+    prefetch_opt: tuple
+        number of headers and maximum size (in MB) of read-ahead
+    required_fields: list
+        list of (module, format, fields) declared by
+        setRequiredFields
+    series_fields: list
+        list of (module, format, include, exclude, check)
+        declared by setSeriesFields
+    part_template: str
+        path to the json template of participants.tsv
+    plugin_file: str
+        path to the plugin file
+    plugin_init: dict
+        named parameters passed to InitEP
+    initializer: callable
+        additional command-specific initialisation function
+    initargs: tuple
+        arguments passed to initializer
+    """
+    if not inherited:
+        baseModule.setPrefetch(*prefetch_opt)
+        for module, form, fields in required_fields:
+            for cls in types_list[module]:
+                if cls.__name__ == form:
+                    cls.setRequiredFields(fields)
+        for module, form, include, exclude, check in series_fields:
+            for cls in types_list[module]:
+                if cls.__name__ == form:
+                    cls.setSeriesFields(include, exclude, check)
+        BidsSession.loadSubjectFields(part_template)
+        if plugin_file:
+            plugins.ImportPlugins(plugin_file)
+            plugins.InitPlugin(**plugin_init)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def createPool(jobs: int,
+               part_template: str,
+               plugin_file: str = "",
+               plugin_init: dict = {},
+               initializer: callable = None,
+               initargs: tuple = ()
+               ) -> multiprocessing.pool.Pool:
+    """
+    Creates pool of worker processes
+
+    Must be called after the initialisation of plugin and
+    participants definitions in the main process.
+
+    Parameters
+    ----------
+    jobs: int
+        number of worker processes
+    part_template: str
+        path to the json template of participants.tsv
+    plugin_file: str
+        path to the plugin file
+    plugin_init: dict
+        named parameters passed to InitEP
+    initializer: callable
+        additional command-specific initialisation function,
+        executed in each worker
+    initargs: tuple
+        arguments passed to initializer
+
+    Returns
+    -------
+    multiprocessing.pool.Pool
+    """
+    ctx = getContext()
+    inherited = ctx.get_start_method() == "fork"
+    logger.info("Starting {} worker processes ({})"
+                .format(jobs, ctx.get_start_method()))
+    return ctx.Pool(processes=jobs,
+                    initializer=initWorker,
+                    initargs=(inherited,
+                              (baseModule._prefetch_depth,
+                               baseModule._prefetch_size // 2**20),
+                              [(module, cls.__name__, cls._required_fields)
+                               for module, types in types_list.items()
+                               for cls in types
+                               if cls._required_fields is not None],
+                              [(module, cls.__name__,
+                                *cls._series_override, cls._series_check)
+                               for module, types in types_list.items()
+                               for cls in types
+                               if cls._cache_series],
+                              part_template,
+                              plugin_file, plugin_init,
+                              initializer, initargs)
+                    )
+
+
+def runTask(func: callable, *args) -> tuple:
+    """
+    Executes func with given arguments within worker process.
+
+    Participants values registered during the execution,
+    number of reported warnings and errors and statistics
+    of headers read-ahead are returned together with result
+    of function, and must be merged in main process
+    by collectResult
+
+    Parameters
+    ----------
+    func: callable
+        function to execute, must be defined at module level
+    args:
+        positional arguments passed to func
+
+    Returns
+    -------
+    tuple(object, dict, dict, dict):
+        result of function, participants values,
+        messages count and read-ahead statistics
+    """
+    BidsSession.resetSubjectValues()
+    err_count = info.counthandler.level2count.copy()
+    prefetch_count = prefetch.get_counters()
+    result = func(*args)
+    counts = prefetch.get_counters()
+    for key, val in prefetch_count.items():
+        counts[key] -= val
+    return (result,
+            BidsSession.getSubjectValues(),
+            info.msg_count(err_count),
+            counts)
+
+
+def collectResult(task: multiprocessing.pool.AsyncResult,
+                  conflicting: bool = True) -> object:
+    """
+    Waits for the end of task launched by runTask, and merges
+    its participants values and messages count into main process
+
+    Exceptions raised in worker are re-raised here
+
+    Parameters
+    ----------
+    task: AsyncResult
+        task to collect
+    conflicting: bool
+        if True, allow conflicting participants values
+
+    Returns
+    -------
+    object:
+        result of executed function
+    """
+    result, sub_values, err_count, prefetch_count = task.get()
+    mergeResult(sub_values, err_count, prefetch_count, conflicting)
+    return result
+
+
+def mergeResult(sub_values: dict, err_count: dict,
+                prefetch_count: dict,
+                conflicting: bool = True) -> None:
+    """
+    Merges participants values, messages count and
+    read-ahead statistics returned by runTask into main process
+
+    Parameters
+    ----------
+    sub_values: dict
+        participants values registered by task
+    err_count: dict
+        messages count reported by task
+    prefetch_count: dict
+        read-ahead statistics reported by task
+    conflicting: bool
+        if True, allow conflicting participants values
+    """
+    BidsSession.mergeSubjectValues(sub_values, conflicting)
+    info.add_count(err_count)
+    prefetch.add_counters(prefetch_count)
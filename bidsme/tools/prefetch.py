@@ -0,0 +1,186 @@
+###############################################################################
+# prefetch.py contains the class reading ahead the headers of recording
+# files in background threads
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import time
+import logging
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Statistics of read-ahead in current process:
+#   hits: headers parsed before being requested
+#   stalls: headers requested while being parsed
+#   misses: headers not prefetched, parsed on request
+#   stall_time: time (in seconds) spent waiting for parsing headers
+counters = {"hits": 0, "stalls": 0, "misses": 0, "stall_time": 0.}
+
+
+def get_counters() -> dict:
+    """
+    Returns copy of read-ahead statistics
+    """
+    return counters.copy()
+
+
+def add_counters(counts: dict) -> None:
+    """
+    Adds statistics (for ex. reported by worker process)
+    to the current ones
+    """
+    for key, val in counts.items():
+        counters[key] = counters.get(key, 0) + val
+
+
+def reportcounters(logger: logging.Logger) -> None:
+    """
+    Reports read-ahead statistics to given logger
+    """
+    total = counters["hits"] + counters["stalls"] + counters["misses"]
+    if total == 0:
+        return
+    logger.info("Header prefetch: {} hits, {} stalls, {} misses "
+                "({:.1f}% prefetched), {:.2f} s waiting"
+                .format(counters["hits"], counters["stalls"],
+                        counters["misses"],
+                        100. * (total - counters["misses"]) / total,
+                        counters["stall_time"]))
+
+
+class Prefetcher(object):
+    """
+    Parses headers of files of a recording in background threads,
+    reading ahead the files following the last requested one.
+
+    Headers are parsed by reader function, which must not modify
+    any shared state. The number of headers kept in memory is
+    limited by depth, and the total size of their files by
+    max_size. The size of file is used as upper bound of the
+    parsed header size.
+    """
+    __slots__ = ["_reader", "_files", "_positions",
+                 "_depth", "_max_size",
+                 "_pending", "_size", "_next",
+                 "_executor"]
+
+    def __init__(self, reader: callable, files: list,
+                 depth: int, max_size: int):
+        """
+        Parameters
+        ----------
+        reader: callable
+            function taking path to file and returning parsed header
+        files: list
+            list of paths to files, in reading order
+        depth: int
+            maximum number of headers read ahead
+        max_size: int
+            maximum total size (in bytes) of read-ahead files
+        """
+        self._reader = reader
+        self._files = list(files)
+        self._positions = {f: i for i, f in enumerate(self._files)}
+        self._depth = depth
+        self._max_size = max_size
+        # index: (future, file size)
+        self._pending = OrderedDict()
+        self._size = 0
+        self._next = 0
+        self._executor = None
+
+    def get(self, path: str) -> object:
+        """
+        Returns parsed header of file at given path, and
+        schedules reading of following files.
+
+        Exceptions raised by reader are re-raised here.
+        """
+        index = self._positions.get(path)
+        if index is None:
+            counters["misses"] += 1
+            return self._reader(path)
+
+        # dropping files that will not be requested
+        for idx in list(self._pending):
+            if idx < index:
+                self.__drop(idx)
+
+        if index in self._pending:
+            future, size = self._pending.pop(index)
+            self._size -= size
+            if future.done():
+                counters["hits"] += 1
+            else:
+                counters["stalls"] += 1
+                start = time.perf_counter()
+                future.exception()
+                counters["stall_time"] += time.perf_counter() - start
+            self._next = max(self._next, index + 1)
+            self.__schedule()
+            return future.result()
+
+        counters["misses"] += 1
+        self._next = max(self._next, index + 1)
+        self.__schedule()
+        return self._reader(path)
+
+    def close(self) -> None:
+        """
+        Cancels pending reads and stops threads
+        """
+        for idx in list(self._pending):
+            self.__drop(idx)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __drop(self, index: int) -> None:
+        future, size = self._pending.pop(index)
+        future.cancel()
+        self._size -= size
+
+    def __schedule(self) -> None:
+        """
+        Submits reading of next files, within the limits
+        of depth and size
+        """
+        while len(self._pending) < self._depth\
+                and self._next < len(self._files):
+            path = self._files[self._next]
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            if self._pending and self._size + size > self._max_size:
+                break
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                        max_workers=self._depth)
+            self._pending[self._next] = (
+                    self._executor.submit(self._reader, path),
+                    size)
+            self._size += size
+            self._next += 1
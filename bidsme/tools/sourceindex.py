@@ -0,0 +1,591 @@
+###############################################################################
+# sourceindex.py contains the persistent index of source recordings,
+# used to skip the unchanged recordings during incremental runs
+###############################################################################
+# Copyright (c) 2019-2020, University of Liège
+# Author: Nikita Beliy
+# Owner: Liege University https://www.uliege.be
+# Maintainer: Nikita Beliy
+# Email: Nikita.Beliy@uliege.be
+# Status: developpement
+###############################################################################
+# This file is part of BIDSme
+# BIDSme is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# eegBidsCreator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with BIDSme.  If not, see <https://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import json
+import uuid
+import sqlite3
+import hashlib
+import logging
+
+from bidsme.Modules import _inventory
+
+logger = logging.getLogger(__name__)
+
+# name of index file, created in destination/code/bidsme
+index_file = "index.sqlite"
+
+# number of bytes read from begining and end of file for fingerprint
+fingerprint_size = 65536
+
+_schema = [
+        "CREATE TABLE IF NOT EXISTS recordings ("
+        "command TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "digest TEXT NOT NULL, "
+        "config TEXT NOT NULL, "
+        "module TEXT, "
+        "format TEXT, "
+        "result TEXT, "
+        "PRIMARY KEY (command, path))",
+        "CREATE TABLE IF NOT EXISTS files ("
+        "command TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "folder TEXT NOT NULL, "
+        "size INTEGER, "
+        "mtime_ns INTEGER, "
+        "fingerprint TEXT, "
+        "module TEXT, "
+        "format TEXT, "
+        "rec_no TEXT, "
+        "rec_id TEXT, "
+        "sub_id TEXT, "
+        "ses_id TEXT, "
+        "acq_time TEXT, "
+        "attributes TEXT, "
+        "output TEXT, "
+        "PRIMARY KEY (command, path))",
+        "CREATE INDEX IF NOT EXISTS files_folder "
+        "ON files (command, folder)",
+        "CREATE TABLE IF NOT EXISTS outputs ("
+        "command TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "digest TEXT NOT NULL, "
+        "config TEXT NOT NULL, "
+        "run TEXT NOT NULL, "
+        "outputs TEXT, "
+        "scans TEXT, "
+        "PRIMARY KEY (command, path))",
+        "CREATE TABLE IF NOT EXISTS claims ("
+        "command TEXT NOT NULL, "
+        "output TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "execution TEXT NOT NULL, "
+        "PRIMARY KEY (command, output))",
+        "CREATE TABLE IF NOT EXISTS journal ("
+        "entry INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "command TEXT NOT NULL, "
+        "config TEXT NOT NULL, "
+        "kind TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "parent TEXT, "
+        "sub_values TEXT)"
+        ]
+
+
+def digest(*values) -> str:
+    """
+    Returns the hexadecimal digest of given values,
+    serialized in json
+    """
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str)
+                        .encode("utf-8")).hexdigest()
+
+
+def fileDigest(path: str) -> str:
+    """
+    Returns the hexadecimal digest of content of given file,
+    or empty string if file is not defined or not found
+    """
+    if not path or not os.path.isfile(path):
+        return ""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(path: str) -> str:
+    """
+    Returns the content fingerprint of given file,
+    calculated from its begining and its end
+    """
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(fingerprint_size))
+        size = os.fstat(f.fileno()).st_size
+        if size > fingerprint_size:
+            f.seek(max(fingerprint_size, size - fingerprint_size))
+            h.update(f.read(fingerprint_size))
+    return h.hexdigest()
+
+
+def checksum(path: str) -> str:
+    """
+    Returns the checksum of given file, composed from its size and
+    fingerprint, or None if file do not exists
+    """
+    if not os.path.isfile(path):
+        return None
+    return "{}:{}".format(os.path.getsize(path), fingerprint(path))
+
+
+class SourceIndex(object):
+    """
+    Persistent index of source recordings in SQLite database,
+    stored in destination/code/bidsme/index.sqlite
+
+    Each recording folder is identified by the digest of names,
+    sizes and modification times (and optionally the content
+    fingerprints) of its files, and of configuration of command
+    (plugin, options etc.). The result of successfull treatment
+    of recording is stored together with the metadata of each
+    of its files, and is returned in following runs if the
+    recording and configuration are unchanged.
+
+    The completion records of produced files, with the run used
+    and checksums of outputs, are stored for each source file.
+    Each produced file is claimed by its source file, so a file
+    produced from two different sources in same execution, or
+    already completed from another source, is detected.
+
+    The journal keeps the checkpoints of current execution of
+    command, with participants values registered up to each
+    checkpoint. It is cleared at successfull end of command, so
+    an interrupted execution can be continued from its last
+    checkpoint.
+
+    The connection to database is opened separately in each
+    process, so index can be passed to worker processes.
+    """
+    __slots__ = ["path", "command", "config", "use_fingerprint",
+                 "execution",
+                 "_connection", "_pid", "_digests"]
+
+    def __init__(self, destination: str, command: str,
+                 config: str, use_fingerprint: bool = False):
+        """
+        Parameters
+        ----------
+        destination: str
+            path to destination dataset
+        command: str
+            name of command using the index
+        config: str
+            digest of command configuration, results stored
+            with different configuration are ignored
+        use_fingerprint: bool
+            if True, the content fingerprint of files are used
+            to identify recordings
+        """
+        self.path = os.path.join(destination, "code", "bidsme",
+                                 index_file)
+        self.command = command
+        self.config = config
+        self.use_fingerprint = use_fingerprint
+        # identifier of current execution, shared with workers
+        self.execution = uuid.uuid4().hex
+        self._connection = None
+        self._pid = None
+        # folder: digest
+        self._digests = dict()
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path,
+                "command": self.command,
+                "config": self.config,
+                "use_fingerprint": self.use_fingerprint,
+                "execution": self.execution}
+
+    def __setstate__(self, state: dict) -> None:
+        for key, val in state.items():
+            setattr(self, key, val)
+        self._connection = None
+        self._pid = None
+        self._digests = dict()
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Returns connection to database for current process,
+        creating database if needed
+        """
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        self._pid = os.getpid()
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError as e:
+            logger.debug("{}: Unable to set WAL mode: {}"
+                         .format(self.path, e))
+        with self._connection:
+            for statement in _schema:
+                self._connection.execute(statement)
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Closes connection to database
+        """
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    def fileKey(self, path: str) -> tuple:
+        """
+        Returns the size, modification time and
+        fingerprint (if used) of given file
+        """
+        st = os.stat(path)
+        fp = fingerprint(path) if self.use_fingerprint else None
+        return (st.st_size, st.st_mtime_ns, fp)
+
+    def folderDigest(self, folder: str) -> str:
+        """
+        Returns the digest of files in given folder,
+        calculated from the names and keys of
+        all non-hidden files
+        """
+        folder = os.path.normpath(folder)
+        res = self._digests.get(folder)
+        if res is not None:
+            return res
+        inventory = _inventory.getInventory(folder)
+        keys = list()
+        for entry in inventory.entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            keys.append((entry.name,) + self.fileKey(entry.path))
+        res = digest(keys)
+        self._digests[folder] = res
+        return res
+
+    def lookup(self, folder: str) -> tuple:
+        """
+        Retrieves the stored result for given recording folder
+
+        Parameters
+        ----------
+        folder: str
+            path to the recording folder
+
+        Returns
+        -------
+        tuple(str, str, dict):
+            module and format names and stored result,
+            or None if recording is not indexed, or
+            changed since
+        """
+        folder = os.path.normpath(folder)
+        row = self.__connect().execute(
+                "SELECT digest, config, module, format, result "
+                "FROM recordings WHERE command = ? AND path = ?",
+                (self.command, folder)).fetchone()
+        if row is None:
+            return None
+        if row[1] != self.config or row[0] != self.folderDigest(folder):
+            return None
+        return (row[2], row[3], json.loads(row[4]))
+
+    def getFiles(self, folder: str) -> list:
+        """
+        Returns the list of indexed files of given
+        recording folder, as dictionaries
+
+        Parameters
+        ----------
+        folder: str
+            path to the recording folder
+
+        Returns
+        -------
+        list(dict)
+        """
+        folder = os.path.normpath(folder)
+        cur = self.__connect().execute(
+                "SELECT * FROM files WHERE command = ? AND folder = ? "
+                "ORDER BY path",
+                (self.command, folder))
+        names = [d[0] for d in cur.description]
+        res = list()
+        for row in cur:
+            values = dict(zip(names, row))
+            values["attributes"] = json.loads(values["attributes"])
+            values["output"] = json.loads(values["output"])
+            res.append(values)
+        return res
+
+    def store(self, folder: str, module: str, form: str,
+              result: dict, files: list) -> None:
+        """
+        Stores the result of treatment of recording
+        and metadata of its files
+
+        Parameters
+        ----------
+        folder: str
+            path to the recording folder
+        module: str
+            name of module of recording
+        form: str
+            name of format of recording
+        result: dict
+            json-serializable result of treatment
+        files: list(dict)
+            list of files metadata, as returned by fileRecord
+        """
+        folder = os.path.normpath(folder)
+        rec_digest = self.folderDigest(folder)
+        conn = self.__connect()
+        with conn:
+            conn.execute("DELETE FROM files WHERE command = ? "
+                         "AND folder = ?", (self.command, folder))
+            conn.execute("INSERT OR REPLACE INTO recordings "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (self.command, folder, rec_digest, self.config,
+                          module, form,
+                          json.dumps(result, default=str)))
+            for f in files:
+                size, mtime, fp = self.fileKey(f["path"])
+                conn.execute("INSERT OR REPLACE INTO files VALUES "
+                             "(?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                             "?, ?, ?, ?, ?, ?)",
+                             (self.command, f["path"], folder,
+                              size, mtime, fp,
+                              module, form,
+                              f["rec_no"], f["rec_id"],
+                              f["sub_id"], f["ses_id"],
+                              f["acq_time"],
+                              json.dumps(f["attributes"], default=str),
+                              json.dumps(f["output"])))
+
+    def getOutput(self, path: str, run: str) -> dict:
+        """
+        Retrieves the completion record of given source file
+
+        Parameters
+        ----------
+        path: str
+            path to the source file
+        run: str
+            digest of run used to produce outputs
+
+        Returns
+        -------
+        dict:
+            completion record with outputs (list of (path, checksum))
+            and scans (path to scans.tsv and line), or None if
+            file is not recorded, or its recording, configuration
+            or run changed since
+        """
+        path = os.path.normpath(path)
+        row = self.__connect().execute(
+                "SELECT digest, config, run, outputs, scans "
+                "FROM outputs WHERE command = ? AND path = ?",
+                (self.command, path)).fetchone()
+        if row is None:
+            return None
+        if row[1] != self.config or row[2] != run\
+                or row[0] != self.folderDigest(os.path.dirname(path)):
+            return None
+        return {"outputs": json.loads(row[3]),
+                "scans": json.loads(row[4])}
+
+    def setOutput(self, path: str, run: str,
+                  outputs: list, scans: tuple) -> None:
+        """
+        Stores the completion record of given source file
+
+        Parameters
+        ----------
+        path: str
+            path to the source file
+        run: str
+            digest of run used to produce outputs
+        outputs: list(tuple(str, str))
+            list of paths (relative to destination) and
+            checksums of produced files
+        scans: tuple(str, str)
+            path (relative to destination) to scans.tsv
+            and corresponding line
+        """
+        path = os.path.normpath(path)
+        conn = self.__connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO outputs "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (self.command, path,
+                          self.folderDigest(os.path.dirname(path)),
+                          self.config, run,
+                          json.dumps(outputs), json.dumps(scans)))
+
+    def claim(self, output: str, path: str) -> str:
+        """
+        Claims given output for given source file in current
+        execution.
+
+        The claim fails if output is already claimed by another
+        source file in current execution, or by another source
+        file which completion record contains this output.
+        Claims left by earlier executions for uncompleted
+        outputs are replaced.
+
+        Parameters
+        ----------
+        output: str
+            path (relative to destination) of produced file
+        path: str
+            path to the source file
+
+        Returns
+        -------
+        str:
+            path to the source file of conflicting claim,
+            or None if claim succeeded
+        """
+        path = os.path.normpath(path)
+        conn = self.__connect()
+        with conn:
+            # locking database, so claim is atomic between workers
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                    "SELECT path, execution FROM claims "
+                    "WHERE command = ? AND output = ?",
+                    (self.command, output)).fetchone()
+            if row is not None and row[0] != path:
+                if row[1] == self.execution:
+                    return row[0]
+                completed = conn.execute(
+                        "SELECT outputs FROM outputs "
+                        "WHERE command = ? AND path = ?",
+                        (self.command, row[0])).fetchone()
+                if completed is not None and\
+                        output in [out for out, _ in
+                                   json.loads(completed[0])]:
+                    return row[0]
+            conn.execute("INSERT OR REPLACE INTO claims "
+                         "VALUES (?, ?, ?, ?)",
+                         (self.command, output, path, self.execution))
+        return None
+
+    def discard(self, folder: str) -> None:
+        """
+        Removes given recording folder from index
+        """
+        folder = os.path.normpath(folder)
+        conn = self.__connect()
+        with conn:
+            conn.execute("DELETE FROM recordings WHERE command = ? "
+                         "AND path = ?", (self.command, folder))
+            conn.execute("DELETE FROM files WHERE command = ? "
+                         "AND folder = ?", (self.command, folder))
+
+    def checkpoint(self, kind: str, path: str, parent: str = None,
+                   sub_values: dict = None) -> None:
+        """
+        Adds a checkpoint to the journal, committed immediately
+
+        Parameters
+        ----------
+        kind: str
+            type of checkpoint (for ex. 'series' or 'session')
+        path: str
+            path to the completed folder
+        parent: str
+            path to the parent folder, if any
+        sub_values: dict
+            participants values registered since previous
+            checkpoint, as returned by BidsSession.getSubjectValues
+        """
+        conn = self.__connect()
+        with conn:
+            conn.execute("INSERT INTO journal "
+                         "(command, config, kind, path, parent, sub_values) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (self.command, self.config, kind,
+                          os.path.normpath(path),
+                          None if parent is None
+                          else os.path.normpath(parent),
+                          json.dumps(sub_values, default=str)))
+
+    def getJournal(self) -> list:
+        """
+        Returns the checkpoints of journal, in order of their
+        creation, as dictionaries with keys 'config', 'kind',
+        'path', 'parent' and 'sub_values'
+
+        Returns
+        -------
+        list(dict)
+        """
+        cur = self.__connect().execute(
+                "SELECT config, kind, path, parent, sub_values "
+                "FROM journal WHERE command = ? ORDER BY entry",
+                (self.command,))
+        res = list()
+        for row in cur:
+            res.append({"config": row[0],
+                        "kind": row[1],
+                        "path": row[2],
+                        "parent": row[3],
+                        "sub_values": json.loads(row[4]) or {}})
+        return res
+
+    def clearJournal(self) -> None:
+        """
+        Removes all checkpoints of journal
+        """
+        conn = self.__connect()
+        with conn:
+            conn.execute("DELETE FROM journal WHERE command = ?",
+                         (self.command,))
+
+    @staticmethod
+    def fileRecord(recording: object, output: list = None) -> dict:
+        """
+        Returns metadata of current file of recording,
+        to be stored in index
+
+        Parameters
+        ----------
+        recording: Modules.baseModule
+            recording with loaded file
+        output: list(str)
+            paths to the produced files, if any
+
+        Returns
+        -------
+        dict
+        """
+        try:
+            rec_no = recording.recNo()
+        except Exception:
+            rec_no = None
+        try:
+            rec_id = recording.recId()
+        except Exception:
+            rec_id = None
+        acq_time = recording.acqTime()
+        return {"path": os.path.normpath(recording.currentFile()),
+                "rec_no": None if rec_no is None else str(rec_no),
+                "rec_id": None if rec_id is None else str(rec_id),
+                "sub_id": recording.subId(),
+                "ses_id": recording.sesId(),
+                "acq_time": None if acq_time is None
+                else acq_time.isoformat(),
+                "attributes": dict(recording.attributes),
+                "output": output or list()}
@@ -0,0 +1,204 @@
+"""
+Generates the small EDF/BDF and BrainVision files used by tests.
+
+Run from this folder: python generate.py
+"""
+
+import numpy
+
+rng = numpy.random.default_rng(0)
+
+
+def tal_block(entries: list, size: int) -> bytes:
+    block = b"".join(entries)
+    assert len(block) <= size, (len(block), size)
+    return block.ljust(size, b"\x00")
+
+
+def field(values: list, size: int) -> bytes:
+    return b"".join(str(v).encode("latin-1").ljust(size) for v in values)
+
+
+def edf(name: str, labels: list, n_samples: list, records: list,
+        bdf: bool = False, reserved: str = None,
+        units: list = None, phys: list = None, dig: list = None) -> None:
+    """
+    Writes EDF (or BDF) file, records being a list, for each
+    data record, of arrays of integers for signals or of
+    bytes for annotations
+    """
+    n = len(labels)
+    units = units or ["uV"] * n
+    phys = phys or [(-32768, 32767)] * n
+    dig = dig or [(-32768, 32767)] * n
+    if reserved is None:
+        reserved = "24BIT" if bdf else "EDF+C"
+    hdr = b"\xffBIOSEMI" if bdf else b"0".ljust(8)
+    hdr += b"X X X X".ljust(80) + b"Startdate X X X X".ljust(80)
+    hdr += b"01.02.03" + b"04.05.06" + str(256 * (n + 1)).encode().ljust(8)
+    hdr += reserved.encode().ljust(44)
+    hdr += str(len(records)).encode().ljust(8) + b"1".ljust(8)
+    hdr += str(n).encode().ljust(4)
+    hdr += field(labels, 16) + field([""] * n, 80) + field(units, 8)
+    hdr += field([p[0] for p in phys], 8) + field([p[1] for p in phys], 8)
+    hdr += field([d[0] for d in dig], 8) + field([d[1] for d in dig], 8)
+    hdr += field([""] * n, 80) + field(n_samples, 8) + field([""] * n, 32)
+
+    size = 3 if bdf else 2
+    data = b""
+    for record in records:
+        for signal, ns in zip(record, n_samples):
+            if isinstance(signal, bytes):
+                data += tal_block([signal], ns * size)
+                continue
+            values = numpy.asarray(signal, dtype=numpy.int64)
+            assert len(values) == ns
+            if bdf:
+                values = values & 0xFFFFFF
+                data += numpy.stack([values & 0xFF,
+                                     (values >> 8) & 0xFF,
+                                     (values >> 16) & 0xFF], 1)\
+                    .astype(numpy.uint8).tobytes()
+            else:
+                data += values.astype("<i2").tobytes()
+    with open(name, "wb") as f:
+        f.write(hdr + data)
+
+
+def brainvision(name: str, channels: list, data: list,
+                fmt: str = "IEEE_FLOAT_32",
+                orientation: str = "MULTIPLEXED",
+                data_format: str = "BINARY",
+                markers: str = "") -> None:
+    """
+    Writes BrainVision header, markers and data files
+    """
+    hdr = ("Brain Vision Data Exchange Header File Version 1.0\n"
+           "[Common Infos]\nCodepage=UTF-8\n"
+           "DataFile={0}.eeg\nMarkerFile={0}.vmrk\n"
+           "DataFormat={1}\nDataOrientation={2}\n"
+           "NumberOfChannels={3}\nSamplingInterval=1000\n"
+           .format(name, data_format, orientation, len(channels)))
+    if data_format == "BINARY":
+        hdr += "[Binary Infos]\nBinaryFormat={}\n".format(fmt)
+    else:
+        hdr += ("[ASCII Infos]\nDecimalSymbol=,\n"
+                "SkipLines=1\nSkipColumns=0\n")
+    hdr += "[Channel Infos]\n"
+    hdr += "".join("Ch{}={}\n".format(i + 1, ch)
+                   for i, ch in enumerate(channels))
+    with open(name + ".vhdr", "w", encoding="utf-8") as f:
+        f.write(hdr)
+    with open(name + ".vmrk", "w", encoding="utf-8") as f:
+        f.write("Brain Vision Data Exchange Marker File, Version 1.0\n"
+                "[Common Infos]\nCodepage=UTF-8\nDataFile={}.eeg\n"
+                "[Marker Infos]\n"
+                "Mk1=New Segment,,1,1,0,20200101120000000000\n{}"
+                .format(name, markers))
+
+    data = numpy.asarray(data)
+    if data_format == "BINARY":
+        dtype = {"IEEE_FLOAT_32": "<f4", "INT_16": "<i2",
+                 "INT_32": "<i4"}[fmt]
+        data = data.astype(dtype)
+        if orientation == "MULTIPLEXED":
+            data = data.T
+        with open(name + ".eeg", "wb") as f:
+            f.write(numpy.ascontiguousarray(data).tobytes())
+    else:
+        lines = ["header line"]
+        for row in data.T:
+            lines.append(" ".join(("%.3f" % v).replace(".", ",")
+                                  for v in row))
+        with open(name + ".eeg", "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def pulses(n: int, positions: list, values: list,
+           width: int = 5) -> numpy.ndarray:
+    res = numpy.zeros(n, dtype=numpy.int64)
+    for pos, val in zip(positions, values):
+        res[pos:pos + width] = val
+    return res
+
+
+# 4 records of 1 s, at 100 Hz
+N = 100
+R = 4
+eeg = rng.integers(-100, 100, N * R)
+
+# EDF+ with trigger channel and annotations, including
+# channel-specific, multiple, non-ascii and out of range ones
+stim = pulses(N * R, [3, 50, 98, 101, 150, 220, 397],
+              [1, 2, 3, 5, 2, 4, 7], width=3)
+stim[300:320] = 6
+stim[310:315] = 9
+tals = [
+    b"+0.5\x14\x14\x00"
+    b"+0.7\x150.2\x14Start\x14\x00"
+    b"+0.7\x14Lamp@@Fp1\x14\x00"
+    b"+0.7\x14Lamp@@Status\x14\x00",
+    b"+1.5\x14\x14\x00"
+    b"+1.9\x14A\x14B\x14\x00"
+    b"+2\x151\x14Lamp\x14\x00",
+    b"+2.5\x14\x14\x00" + "+3.1\x14Café/\x14\x00".encode(),
+    b"+3.5\x14\x14\x00"
+    b"+4.3\x151\x14Long\x14\x00"
+    b"+9\x14Out\x14\x00"
+    b"-0.2\x151\x14Before\x14\x00",
+]
+edf("edf_annotations.edf", ["Fp1", "Status", "EDF Annotations"],
+    [N, N, 60],
+    [[eeg[i * N:(i + 1) * N], stim[i * N:(i + 1) * N], tals[i]]
+     for i in range(R)])
+
+# trigger channel sampled at half rate, and user-declared
+# trigger channel with scaled values
+stim2 = pulses(50 * R, [5, 60, 120], [3, 1, 8], width=4)
+resp = pulses(N * R, [10, 200], [1000, 2000], width=10)
+edf("edf_mixed_rate.edf", ["Fp1", "Trigger", "Resp"], [N, 50, N],
+    [[eeg[i * N:(i + 1) * N], stim2[i * 50:(i + 1) * 50],
+      resp[i * N:(i + 1) * N]] for i in range(R)],
+    units=["uV", "", "mV"],
+    phys=[(-3200, 3200), (-32768, 32767), (-32768, 32767)])
+
+# BDF status channel with high bits set
+status = pulses(N * R, [10, 100, 250],
+                [1 | (1 << 20), 3 | (1 << 18), 255], width=6) | (1 << 17)
+edf("bdf_status.bdf", ["Fp1", "Status"], [N, N],
+    [[eeg[i * N:(i + 1) * N], status[i * N:(i + 1) * N]]
+     for i in range(R)],
+    bdf=True, phys=[(-262144, 262143)] * 2, dig=[(-8388608, 8388607)] * 2)
+
+# BDF+ with annotations
+tals = [
+    b"+0\x14\x14\x00+0.25\x150.5\x14Go\x14\x00",
+    b"+1\x14\x14\x00+1.5\x14Stop\x14\x00",
+    b"+2\x14\x14\x00",
+    b"+3\x14\x14\x00+3.75\x14End\x14\x00",
+]
+edf("bdf_annotations.bdf", ["Fp1", "Status", "BDF Annotations"],
+    [N, N, 20],
+    [[eeg[i * N:(i + 1) * N], status[i * N:(i + 1) * N], tals[i]]
+     for i in range(R)],
+    bdf=True, reserved="BDF+C",
+    phys=[(-262144, 262143)] * 2 + [(-1, 1)],
+    dig=[(-8388608, 8388607)] * 2 + [(-8388608, 8388607)])
+
+# BrainVision files, 500 samples at 1000 Hz
+M = 500
+sti = pulses(M, [10, 100, 104, 300, 495], [1, 2, 4, 8, 16], width=3)
+markers = ("Mk2=Stimulus,S  1,50,1,0\n"
+           "Mk3=Response,R\\12,100,20,0\n"
+           "Mk4=Comment,late,499,10,0\n"
+           "Mk5=Comment,out,600,1,0\n")
+brainvision("bv_float", ["Fp1,,0.1,µV", "STI 014,,1,V"],
+            [rng.normal(size=M), sti], markers=markers)
+brainvision("bv_int16", ["Fp1,,0.1,µV", "STI 014,,1,V"],
+            [rng.integers(-5, 5, M), sti], fmt="INT_16",
+            orientation="VECTORIZED", markers=markers)
+brainvision("bv_ascii", ["Fp1,,0.1,µV", "STI 014,,0.5,V"],
+            [rng.normal(size=M), sti * 2], data_format="ASCII",
+            markers=markers)
+brainvision("bv_int32", ["Fp1,,0.1,µV", "Trig,,1,µV"],
+            [rng.normal(size=M), sti], fmt="INT_32", markers=markers)
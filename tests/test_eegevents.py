@@ -0,0 +1,85 @@
+"""
+Checks that events detected by StimChannel from chunks
+of samples do not depend on chunks boundaries, and are
+the same as detected by mne.find_events
+"""
+
+import os
+
+import numpy
+import pytest
+
+mne = pytest.importorskip("mne")
+
+from bidsme.Modules._formats import EEGevents  # noqa: E402
+from bidsme.Modules._formats import EEGheader  # noqa: E402
+
+data_dir = os.path.join(os.path.dirname(__file__), "data", "eeg")
+
+chunk_sizes = [1, 2, 3, 5, 7, 16, 64, 1000]
+
+
+def stimChannels() -> dict:
+    """
+    Returns synthetic trigger channels covering consecutive
+    steps, single-sample events, events at first and last
+    samples and negative values
+    """
+    n = 200
+    pulses = numpy.zeros(n)
+    pulses[[5, 6, 7, 40, 41, 90]] = 1
+    pulses[10:20] = 3
+    pulses[20:25] = 5
+    pulses[25:30] = 2
+    pulses[63:65] = 4
+    pulses[128:199] = 7
+    pulses[150:160] = 9
+
+    start = numpy.zeros(n)
+    start[0:10] = 2
+    start[50:60] = 1
+    start[190:] = 6
+
+    negative = numpy.zeros(n)
+    negative[10:20] = -3
+    negative[30:31] = 5
+    negative[60:90] = -1
+    negative[70:80] = 4
+
+    return {"pulses": pulses, "start": start, "negative": negative}
+
+
+def mneEvents(values: numpy.ndarray) -> numpy.ndarray:
+    info = mne.create_info(["STI"], 100., ["stim"])
+    raw = mne.io.RawArray(values[numpy.newaxis, :], info, verbose="ERROR")
+    events = mne.find_events(raw, stim_channel="STI",
+                             shortest_event=1, verbose="ERROR")
+    return events[:, [0, 2]]
+
+
+@pytest.mark.parametrize("name", ["pulses", "start", "negative"])
+@pytest.mark.parametrize("size", chunk_sizes)
+def test_chunks(name, size):
+    values = stimChannels()[name]
+    reference = mneEvents(values)
+    assert len(reference) > 0
+
+    detector = EEGevents.StimChannel(name)
+    for start in range(0, len(values), size):
+        detector.feed(values[start:start + size])
+    assert detector.n_samples == len(values)
+    numpy.testing.assert_array_equal(detector.events(), reference)
+
+
+@pytest.mark.parametrize("size", chunk_sizes)
+@pytest.mark.parametrize("name", ["edf_annotations.edf", "bdf_status.bdf",
+                                  "bv_float.vhdr", "bv_ascii.vhdr"])
+def test_file_chunks(name, size, monkeypatch):
+    path = os.path.join(data_dir, name)
+    ext = os.path.splitext(name)[1]
+    reference = EEGheader.reader[ext](path).load_events()
+
+    # chunk_size is in bytes, for 8-bytes values
+    monkeypatch.setattr(EEGevents, "chunk_size", size * 8)
+    events = EEGheader.reader[ext](path).load_events()
+    assert events.equals(reference)
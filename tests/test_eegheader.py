@@ -0,0 +1,144 @@
+"""
+Compares the metadata, annotations and events retrieved from
+EDF/BDF and BrainVision headers with the ones given by mne
+"""
+
+import os
+import warnings
+
+import pandas
+import pytest
+
+mne = pytest.importorskip("mne")
+
+from bidsme.Modules._formats import EEGheader  # noqa: E402
+from bidsme.Modules._formats import MNE  # noqa: E402
+
+data_dir = os.path.join(os.path.dirname(__file__), "data", "eeg")
+
+# file name: channels declared as triggers by user
+files = {"edf_annotations.edf": [],
+         "edf_mixed_rate.edf": ["Resp"],
+         "bdf_status.bdf": [],
+         "bdf_annotations.bdf": [],
+         "bv_float.vhdr": [],
+         "bv_int16.vhdr": [],
+         "bv_ascii.vhdr": [],
+         "bv_int32.vhdr": ["Trig"],
+         }
+
+readers = {".edf": "read_raw_edf", ".bdf": "read_raw_bdf",
+           ".vhdr": "read_raw_brainvision"}
+
+
+def extention(name: str) -> str:
+    return os.path.splitext(name)[1]
+
+
+def readRaw(name: str):
+    path = os.path.join(data_dir, name)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return getattr(mne.io, readers[extention(name)])(
+                path, preload=False, verbose="ERROR")
+
+
+def readHeader(name: str):
+    return EEGheader.reader[extention(name)](os.path.join(data_dir, name))
+
+
+def eventsList(df: pandas.DataFrame) -> list:
+    res = list()
+    for onset, row in df.iterrows():
+        value = None if pandas.isna(row["value"]) else int(row["value"])
+        res.append((round(onset, 6), round(float(row["duration"]), 6),
+                    int(row["sample"]), row["trial_type"], value))
+    return sorted(res, key=lambda r: (r[0], r[3]))
+
+
+def mneEvents(raw, stim_channels: list) -> list:
+    """
+    Returns list of events from mne annotations and
+    mne.find_events on trigger channels
+    """
+    sfreq = raw.info["sfreq"]
+    res = list()
+    for annot in raw.annotations:
+        desc = annot["description"]
+        if desc.endswith("/"):
+            desc = desc[:-1]
+        res.append((round(annot["onset"] - raw.first_time, 6),
+                    round(annot["duration"], 6),
+                    int(annot["onset"] * sfreq), desc, None))
+    for ch in raw.info["chs"]:
+        if ch["ch_name"] not in stim_channels and\
+                ch["kind"] != mne.io.constants.FIFF.FIFFV_STIM_CH:
+            continue
+        events = mne.find_events(raw, stim_channel=ch["ch_name"],
+                                 shortest_event=1, verbose="ERROR")
+        for sample, _, value in events:
+            sample -= raw.first_samp
+            res.append((round(sample / sfreq, 6), 0., int(sample),
+                        ch["ch_name"], int(value)))
+    return sorted(res, key=lambda r: (r[0], r[3]))
+
+
+@pytest.mark.parametrize("name", files)
+def test_info(name):
+    header = readHeader(name)
+    raw = readRaw(name)
+    assert header.info
+    for key, value in header.info.items():
+        assert value == raw.info[key], key
+
+
+@pytest.mark.parametrize("name", files)
+def test_channels(name):
+    header = readHeader(name)
+    raw = readRaw(name)
+    assert [ch[0] for ch in header.channels] == raw.ch_names
+    if header.duration is not None:
+        assert header.duration == pytest.approx(raw.times[-1])
+
+
+@pytest.mark.parametrize("name", files)
+def test_annotations(name):
+    # mne sorts annotations by onset
+    header = sorted(zip(*readHeader(name).annotations()),
+                    key=lambda a: (round(a[0], 6), a[2]))
+    annotations = readRaw(name).annotations
+    reference = sorted(zip(annotations.onset, annotations.duration,
+                           annotations.description),
+                       key=lambda a: (round(a[0], 6), a[2]))
+    assert len(header) == len(reference)
+    for annot, ref in zip(header, reference):
+        assert annot[0] == pytest.approx(ref[0], abs=1e-6)
+        assert annot[1] == pytest.approx(ref[1], abs=1e-6)
+        assert annot[2] == ref[2]
+
+
+@pytest.mark.parametrize("name", files)
+def test_events(name):
+    stim_channels = files[name]
+    reference = mneEvents(readRaw(name), stim_channels)
+    assert reference
+
+    header = readHeader(name)
+    assert eventsList(header.load_events(stim_channels=stim_channels))\
+        == reference
+
+    raw = MNE.MNE()
+    raw.load_raw(os.path.join(data_dir, name), extention(name))
+    assert eventsList(raw.load_events(stim_channels=stim_channels))\
+        == reference
+
+
+def test_mixed_rate_trigger():
+    # trigger channel at half rate is upsampled to sampling
+    # frequency of recording
+    header = readHeader("edf_mixed_rate.edf")
+    assert header.info["sfreq"] == 100.
+    events = header.load_events()
+    trigger = events[events["trial_type"] == "Trigger"]
+    assert list(trigger["sample"]) == [10, 120, 240]
+    assert list(trigger["value"]) == [3, 1, 8]
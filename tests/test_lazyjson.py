@@ -0,0 +1,167 @@
+"""
+Compares the objects partially decoded by _lazyjson.loadListItem
+with the ones decoded by json.load
+"""
+
+import json
+import logging
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from bidsme.Modules import _lazyjson  # noqa: E402
+
+key = "acqpar"
+
+# strings with escaped quotes, backslashes runs and
+# structural characters
+strings = ['a\\"b', 'c\\\\', '\\\\"', '\\\\\\"', '"', '\\',
+           '{"x": [1, 2]}', '],}', 'acqpar', '"acqpar": [',
+           "é中", "\\u00e9"]
+
+
+def write(tmp_path, data, text: str = None) -> str:
+    path = tmp_path / "dump.json"
+    if text is None:
+        text = json.dumps(data, indent=2)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def reference(path: str, index: int):
+    with open(path, "rb") as f:
+        return json.load(f)[key][index]
+
+
+def partialFailed(caplog) -> bool:
+    return any("partial decoding failed" in rec.getMessage()
+               for rec in caplog.records)
+
+
+@pytest.mark.parametrize("indent", [None, 0, 2])
+def test_strings(tmp_path, caplog, indent):
+    item = {s: s for s in strings}
+    item["list"] = strings
+    item["nested"] = {"inner": strings, "obj": {s: [s] for s in strings}}
+    data = {"before": strings, key: [{"x": strings}, item],
+            "after": item}
+    path = write(tmp_path, None, json.dumps(data, indent=indent))
+    caplog.set_level(logging.DEBUG, logger=_lazyjson.__name__)
+    for index in (0, 1, -1):
+        assert _lazyjson.loadListItem(path, key, index)\
+            == reference(path, index)
+    assert not partialFailed(caplog)
+
+
+def test_key_as_value(tmp_path, caplog):
+    # key appears as string value and nested key before the list
+    data = {"name": key,
+            "values": [key, {key: [{"wrong": True}]}],
+            "nested": {key: [{"wrong": True}]},
+            key: [{"right": True, "name": key}]}
+    path = write(tmp_path, data)
+    caplog.set_level(logging.DEBUG, logger=_lazyjson.__name__)
+    res = _lazyjson.loadListItem(path, key, 0)
+    assert res == {"right": True, "name": key}
+    assert not partialFailed(caplog)
+
+
+def test_lazy_values(tmp_path, caplog):
+    big_list = [{"i": i, "s": strings[i % len(strings)]}
+                for i in range(1000)]
+    big_obj = {"k{}".format(i): {"v": [i] * 10, "s": strings}
+               for i in range(200)}
+    item = {"small": 1, "list": big_list, "obj": big_obj,
+            "text": "x" * 10000, "deep": {"obj": big_obj}}
+    data = {key: [item]}
+    path = write(tmp_path, data)
+    assert len(json.dumps(big_list)) > _lazyjson.lazy_size
+
+    caplog.set_level(logging.DEBUG, logger=_lazyjson.__name__)
+    res = _lazyjson.loadListItem(path, key, 0)
+    assert not partialFailed(caplog)
+
+    # large lists and objects are not decoded until accessed,
+    # large strings are
+    assert res.isDecoded("small")
+    assert res.isDecoded("text")
+    for name in ("list", "obj", "deep"):
+        assert not res.isDecoded(name)
+
+    assert res["list"] == big_list
+    assert res.isDecoded("list")
+    assert not res.isDecoded("obj")
+
+    # large nested objects are decoded lazily as well
+    deep = res["deep"]
+    assert isinstance(deep, _lazyjson.LazyDict)
+    assert not deep.isDecoded("obj")
+    assert deep["obj"] == big_obj
+
+    assert res == reference(path, 0)
+    assert all(res.isDecoded(name) for name in res)
+
+
+@pytest.mark.parametrize("data, index", [
+    # list is not a list
+    ({key: {"0": {"a": 1}}}, "0"),
+    # item is not an object
+    ({key: [[1, 2], 3]}, 0),
+    ({key: [[1, 2], 3]}, 1),
+    ({key: ["text", {"a": 1}]}, 0),
+    ])
+def test_fallback(tmp_path, caplog, data, index):
+    path = write(tmp_path, data)
+    caplog.set_level(logging.DEBUG, logger=_lazyjson.__name__)
+    assert _lazyjson.loadListItem(path, key, index)\
+        == reference(path, index)
+    assert partialFailed(caplog)
+
+
+def test_fallback_errors(tmp_path):
+    # same exceptions as json.load
+    path = write(tmp_path, {key: [{"a": 1}]})
+    with pytest.raises(IndexError):
+        _lazyjson.loadListItem(path, key, 1)
+
+    # key only in nested object
+    path = write(tmp_path, {"other": {key: [{"a": 1}]}})
+    with pytest.raises(KeyError):
+        _lazyjson.loadListItem(path, key, 0)
+
+    path = write(tmp_path, None, '{"acqpar": [{"a": 1,}]}')
+    with pytest.raises(json.JSONDecodeError):
+        _lazyjson.loadListItem(path, key, 0)
+
+
+def randomValue(rng: random.Random, depth: int):
+    kind = rng.randrange(7 if depth < 4 else 4)
+    if kind == 0:
+        return rng.choice(strings + ["", " ", "x" * 50])
+    if kind == 1:
+        return rng.randint(-1000, 1000)
+    if kind == 2:
+        return rng.random()
+    if kind == 3:
+        return rng.choice([True, False, None])
+    if kind in (4, 5):
+        return {rng.choice(strings) + str(i): randomValue(rng, depth + 1)
+                for i in range(rng.randrange(30))}
+    return [randomValue(rng, depth + 1) for i in range(rng.randrange(30))]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random(tmp_path, monkeypatch, seed):
+    monkeypatch.setattr(_lazyjson, "lazy_size", 64)
+    rng = random.Random(seed)
+    data = {"before": randomValue(rng, 1),
+            key: [randomValue(rng, 3) for i in range(3)]
+            + [{"s{}".format(i): randomValue(rng, 1) for i in range(10)}],
+            "after": randomValue(rng, 1)}
+    indent = rng.choice([None, 1])
+    path = write(tmp_path, None, json.dumps(data, indent=indent))
+    for index in range(len(data[key])):
+        assert _lazyjson.loadListItem(path, key, index)\
+            == reference(path, index)
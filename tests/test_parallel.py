@@ -0,0 +1,162 @@
+"""
+End-to-end checks on a small synthetic NIfTI dataset: prepare,
+map and bidsify give the same results in sequential and parallel
+(-j N) executions, and bidsify --resume bidsifies again only
+the recordings with missing outputs
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+nibabel = pytest.importorskip("nibabel")
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(os.path.dirname(__file__), "data", "mri")
+
+jobs = 3
+
+
+def bidsme(*args, cwd: str) -> None:
+    subprocess.run([sys.executable, os.path.join(root_dir, "bidsme.py"),
+                    *args, "-q"],
+                   cwd=cwd, check=False,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def tree(path: str) -> dict:
+    """
+    Returns the content of all files in folder,
+    except the ones in code sub-folder
+    """
+    res = dict()
+    for dirpath, dirnames, filenames in os.walk(path):
+        if dirpath == path and "code" in dirnames:
+            dirnames.remove("code")
+        for name in filenames:
+            file = os.path.join(dirpath, name)
+            with open(file, "rb") as f:
+                res[os.path.relpath(file, path)] = f.read()
+    return res
+
+
+def mtimes(path: str) -> dict:
+    res = dict()
+    for dirpath, dirnames, filenames in os.walk(path):
+        if dirpath == path and "code" in dirnames:
+            dirnames.remove("code")
+        for name in filenames:
+            file = os.path.join(dirpath, name)
+            res[os.path.relpath(file, path)] = os.stat(file).st_mtime_ns
+    return res
+
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory) -> str:
+    """
+    Creates the source dataset of 4 subjects with 2 sessions
+    of 3 NIfTI series with json sidecars. Func series of
+    subjects 3 and 4 do not match template.
+    """
+    path = tmp_path_factory.mktemp("dataset")
+    for sub in range(1, 5):
+        for ses in ("A", "B"):
+            folder = os.path.join(path, "source",
+                                  "sub{:02d}".format(sub),
+                                  "ses" + ses, "nii")
+            os.makedirs(folder)
+            for ser in range(3):
+                img = nibabel.Nifti1Image(
+                        numpy.full((4, 4, 2), sub, dtype=numpy.int16),
+                        numpy.eye(4))
+                nibabel.save(img, os.path.join(folder,
+                                               "ser{}.nii".format(ser)))
+                with open(os.path.join(folder, "ser{}.json".format(ser)),
+                          "w") as f:
+                    json.dump({"ProtocolName": "prot{}".format(ser),
+                               "SeriesNumber": ser,
+                               "EchoTime": 0.01,
+                               "PatientAge": 20 + sub}, f)
+    return str(path)
+
+
+def prepare(workdir: str, name: str, *args) -> str:
+    os.makedirs(os.path.join(workdir, name))
+    bidsme("prepare", "source", name, "-r", "nii=MRI", *args, cwd=workdir)
+    return os.path.join(workdir, name)
+
+
+@pytest.fixture(scope="module")
+def prepared(workdir) -> str:
+    path = prepare(workdir, "prepared")
+    assert len(tree(path)) > 1
+    return path
+
+
+def bidsify(workdir: str, name: str, *args) -> str:
+    os.makedirs(os.path.join(workdir, name, "code", "bidsme"))
+    shutil.copy(os.path.join(data_dir, "bidsmap.yaml"),
+                os.path.join(workdir, name, "code", "bidsme"))
+    bidsme("bidsify", "prepared", name, *args, cwd=workdir)
+    return os.path.join(workdir, name)
+
+
+def test_prepare(workdir, prepared):
+    parallel = prepare(workdir, "prepared_j", "-j", str(jobs))
+    assert tree(parallel) == tree(prepared)
+
+
+@pytest.mark.parametrize("process_all", [False, True])
+def test_map(workdir, prepared, process_all):
+    template = os.path.join(data_dir, "template.yaml")
+    maps = list()
+    for n in (1, jobs):
+        name = "map_{}_{}".format(n, int(process_all))
+        os.makedirs(os.path.join(workdir, name))
+        args = ["-t", template, "-j", str(n)]
+        if process_all:
+            args.append("-a")
+        bidsme("map", "prepared", name, *args, cwd=workdir)
+        with open(os.path.join(workdir, name,
+                               "code", "bidsme", "bidsmap.yaml")) as f:
+            maps.append(f.read())
+    assert "provenance: prepared" in maps[0]
+    assert maps[1] == maps[0]
+
+
+def test_bidsify(workdir, prepared):
+    sequential = tree(bidsify(workdir, "bids"))
+    assert any(name.endswith("_bold.nii") for name in sequential)
+    assert tree(bidsify(workdir, "bids_j", "-j", str(jobs))) == sequential
+
+
+@pytest.mark.parametrize("n", [1, jobs])
+def test_resume(workdir, prepared, n):
+    reference = tree(bidsify(workdir, "bids_ref_{}".format(n)))
+
+    path = bidsify(workdir, "bids_resume_{}".format(n),
+                   "--resume", "-j", str(n))
+    assert tree(path) == reference
+
+    removed = os.path.join("sub-sub02", "ses-sesA", "func",
+                           "sub-sub02_ses-sesA_task-rest_bold.nii")
+    os.remove(os.path.join(path, removed))
+    before = mtimes(path)
+    bidsme("bidsify", "prepared", os.path.basename(path),
+           "--resume", "-j", str(n), cwd=workdir)
+    assert tree(path) == reference
+
+    # only the outputs of the recording with missing file are
+    # written again, together with tables
+    changed = set(name for name, mtime in mtimes(path).items()
+                  if before.get(name) != mtime)
+    changed = set(name for name in changed
+                  if not name.startswith("participants.")
+                  and "_scans." not in name)
+    assert changed <= {removed, removed[:-4] + ".json"}
+    assert removed in changed